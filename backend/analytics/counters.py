@@ -0,0 +1,227 @@
+"""
+Denormalized per-owner and per-manager status counters.
+
+Each owner and property manager has one PortfolioCounters row per scope
+holding the number of their properties, invoices and maintenance requests in
+each status, so a dashboard reads one row instead of scanning three tables.
+The API handlers that change a status call ``record_transition`` in the same
+transaction as the save; the counters move with F-expression UPDATEs.
+Writes that bypass the handlers (admin, shell) are repaired by the
+``reconcile_portfolio_counters`` command.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from api.models import Property
+from notifications.models import MaintenanceRequest
+from payments.models import Invoice
+from rentalhub.response_cache import response_cache
+from .models import PortfolioCounters
+
+Scope = PortfolioCounters.Scope
+
+# Counted model -> counter field prefix
+COUNTED = {
+    Property: 'property',
+    Invoice: 'invoice',
+    MaintenanceRequest: 'maintenance',
+}
+
+COUNTER_FIELDS = tuple(
+    f'{prefix}_{status.lower()}' for model, prefix in COUNTED.items() for status in model.Status.values
+)
+
+# Property column holding the user of each scope
+SCOPE_USER_FIELDS = {
+    Scope.OWNER: 'owner_id',
+    Scope.MANAGER: 'property_manager_id',
+}
+
+# Response cache tag prefix of each scope's dashboards
+SCOPE_CACHE_TAGS = {
+    Scope.OWNER: 'owner',
+    Scope.MANAGER: 'manager',
+}
+
+
+def counter_field(model, status):
+    # Statuses outside the model's choices are not counted
+    if status not in model.Status.values:
+        return None
+    return f'{COUNTED[model]}_{status.lower()}'
+
+
+def compute_counters(scope, user_ids):
+    """Counters for ``user_ids`` in ``scope`` computed from the raw tables."""
+    user_ids = list(user_ids)
+    user_field = SCOPE_USER_FIELDS[scope]
+    counters = {user_id: dict.fromkeys(COUNTER_FIELDS, 0) for user_id in user_ids}
+    for model in COUNTED:
+        lookup = user_field if model is Property else f'property__{user_field}'
+        rows = model.objects.filter(**{f'{lookup}__in': user_ids}).values_list(lookup, 'status').annotate(
+            count=Count('id')
+        ).order_by()
+        for user_id, status, count in rows:
+            field = counter_field(model, status)
+            if field is not None:
+                counters[user_id][field] = count
+    return counters
+
+
+def _property_users(property):
+    """(scope, user_id) pairs whose counters include ``property``."""
+    if not isinstance(property, Property):
+        property = Property.objects.only('owner_id', 'property_manager_id').get(pk=property)
+    return [
+        (scope, getattr(property, user_field))
+        for scope, user_field in SCOPE_USER_FIELDS.items()
+        if getattr(property, user_field) is not None
+    ]
+
+
+def _apply(scope, user_id, deltas):
+    # A user's first change creates their row from the raw tables, which
+    # already hold every change saved in the transaction so far; deltas
+    # applied after it would count those changes twice. Each transaction
+    # therefore applies one combined delta per user.
+    updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not updates:
+        return
+    with transaction.atomic():
+        if not PortfolioCounters.objects.filter(user_id=user_id, scope=scope).update(last_updated=timezone.now(), **updates):
+            # First change for this user: start from the raw tables, which
+            # already include the change being recorded
+            PortfolioCounters.objects.bulk_create(
+                [PortfolioCounters(user_id=user_id, scope=scope, **compute_counters(scope, [user_id])[user_id])],
+                ignore_conflicts=True,
+            )
+
+
+def record_transition(model, property, old_status, new_status, scopes=None):
+    """
+    Count a ``model`` row of ``property`` (instance or id) moving from
+    ``old_status`` to ``new_status``. ``None`` stands for a created or
+    deleted row. Only the counters of ``scopes`` move, if given. Call it
+    inside the transaction that saves the row.
+    """
+    if old_status == new_status:
+        return
+    deltas = {}
+    if old_status is not None and counter_field(model, old_status):
+        deltas[counter_field(model, old_status)] = -1
+    if new_status is not None and counter_field(model, new_status):
+        deltas[counter_field(model, new_status)] = 1
+    if not deltas:
+        return
+    for scope, user_id in _property_users(property):
+        if scopes is None or scope in scopes:
+            _apply(scope, user_id, deltas)
+
+
+def record_transitions(model, transitions):
+    """
+    Count many ``model`` rows moving between statuses at once, e.g. after a
+    set-based UPDATE: ``transitions`` holds ``(owner_id, manager_id,
+    old_status, new_status)`` per row, with the users of the row's property.
+    Each affected user's counters move with one UPDATE. Call it inside the
+    transaction that wrote the rows.
+    """
+    fields = {None: None}
+    deltas = {}
+    for owner_id, manager_id, old_status, new_status in transitions:
+        if old_status == new_status:
+            continue
+        for status in (old_status, new_status):
+            if status not in fields:
+                fields[status] = counter_field(model, status)
+        for scope, user_id in ((Scope.OWNER, owner_id), (Scope.MANAGER, manager_id)):
+            if user_id is None:
+                continue
+            user_deltas = deltas.setdefault((scope, user_id), {})
+            for status, delta in ((old_status, -1), (new_status, 1)):
+                field = fields[status]
+                if field:
+                    user_deltas[field] = user_deltas.get(field, 0) + delta
+    for (scope, user_id), user_deltas in deltas.items():
+        _apply(scope, user_id, user_deltas)
+
+
+def move_property(property, scope, old_user_id, new_user_id, old_status, new_status=None):
+    """
+    Move ``property`` and its invoices and maintenance requests between the
+    counters of two users after its owner or manager changed. The property
+    leaves the old user's counters with ``old_status`` and joins the new
+    user's with ``new_status``, by default the same, so a status change
+    saved along with the move is counted in the same single delta per user.
+    """
+    if old_user_id == new_user_id:
+        return
+    if new_status is None:
+        new_status = old_status
+    deltas = dict.fromkeys(COUNTER_FIELDS, 0)
+    for model in (Invoice, MaintenanceRequest):
+        for row_status, count in model.objects.filter(property=property).values_list('status').annotate(
+            count=Count('id')
+        ).order_by():
+            if counter_field(model, row_status):
+                deltas[counter_field(model, row_status)] += count
+    if old_user_id is not None:
+        old_deltas = {field: -delta for field, delta in deltas.items()}
+        if counter_field(Property, old_status):
+            old_deltas[counter_field(Property, old_status)] -= 1
+        _apply(scope, old_user_id, old_deltas)
+    if new_user_id is not None:
+        if counter_field(Property, new_status):
+            deltas[counter_field(Property, new_status)] += 1
+        _apply(scope, new_user_id, deltas)
+
+
+def counters_query(scope, user_id):
+    """Query for the stored counters of ``user_id`` in ``scope`` as one values() row."""
+    return PortfolioCounters.objects.filter(user_id=user_id, scope=scope).values(*COUNTER_FIELDS)
+
+
+def status_counts(counters, model):
+    """``{status: count}`` for ``model`` from a counters row."""
+    return {status: counters[counter_field(model, status)] for status in model.Status.values}
+
+
+def reconcile(scope, user_ids, fix=True):
+    """
+    Recompute the counters of ``user_ids`` in ``scope`` and return
+    ``{user_id: {field: (stored, actual)}}`` for every drifted field. With
+    ``fix`` the stored rows are corrected.
+    """
+    actual = compute_counters(scope, user_ids)
+    stored = {row.user_id: row for row in PortfolioCounters.objects.filter(scope=scope, user_id__in=list(actual))}
+
+    drift, to_create, to_update = {}, [], []
+    for user_id, values in actual.items():
+        row = stored.get(user_id)
+        if row is None:
+            to_create.append(PortfolioCounters(user_id=user_id, scope=scope, **values))
+            missing = {field: (None, value) for field, value in values.items() if value}
+            if missing:
+                drift[user_id] = missing
+            continue
+        changed = {
+            field: (getattr(row, field), value) for field, value in values.items() if getattr(row, field) != value
+        }
+        if changed:
+            drift[user_id] = changed
+            for field, value in values.items():
+                setattr(row, field, value)
+            row.last_updated = timezone.now()
+            to_update.append(row)
+
+    if fix:
+        with transaction.atomic():
+            PortfolioCounters.objects.bulk_create(to_create, ignore_conflicts=True)
+            PortfolioCounters.objects.bulk_update(to_update, [*COUNTER_FIELDS, 'last_updated'])
+            if drift:
+                # As the rollups: a caller's transaction may still roll back
+                tags = [f'{SCOPE_CACHE_TAGS[scope]}:{user_id}' for user_id in drift] + ['all']
+                transaction.on_commit(lambda: response_cache.invalidate_tags(tags))
+    return drift
@@ -0,0 +1,141 @@
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from api.models import Lease, Property
+from analytics.counters import SCOPE_USER_FIELDS, reconcile
+from analytics.models import PortfolioCounters
+from notifications.models import MaintenanceRequest
+from payments.models import Invoice
+from rentalhub.benchmarking import api_client, auth_headers, percentile
+from users.models import User
+
+DASHBOARDS = {
+    "landlord": "/dashboard/landlord-summary/",
+    "manager": "/dashboard/property-manager-summary/",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the landlord and property manager dashboards against a synthetic "
+        "portfolio, once reading the PortfolioCounters rows and once through "
+        "the grouped-count fallback. The portfolio is created in the configured "
+        "database and deleted again afterwards; run it against a scratch copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--properties", type=int, default=10000,
+            help="Properties owned by the landlord and managed by the manager.",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=50,
+            help="Timed requests per dashboard and path.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Rows inserted per batch while building the portfolio.",
+        )
+
+    def handle(self, *args, properties=10000, requests=50, batch_size=1000, **options):
+        suffix = uuid.uuid4().hex[:8]
+        landlord = User.objects.create_user(f"bench-landlord-{suffix}", role=User.Role.LANDLORD)
+        manager = User.objects.create_user(f"bench-manager-{suffix}", role=User.Role.PROPERTY_MANAGER)
+        tenant = User.objects.create_user(f"bench-tenant-{suffix}", role=User.Role.TENANT)
+        try:
+            self.stdout.write(f"Building a portfolio of {properties} properties...")
+            self.build_portfolio(landlord, manager, tenant, properties, batch_size)
+            users = {"landlord": landlord, "manager": manager}
+
+            for path_name, prepare in (
+                ("counters", lambda: self.build_counters(landlord, manager)),
+                ("fallback", lambda: self.drop_counters(landlord, manager)),
+            ):
+                prepare()
+                for dashboard, path in DASHBOARDS.items():
+                    timings = self.measure(path, users[dashboard], requests)
+                    self.stdout.write(
+                        f"{dashboard:<8} {path_name:<8} median {statistics.median(timings):7.2f} ms  "
+                        f"p95 {percentile(timings, 95):7.2f} ms"
+                    )
+        finally:
+            self.stdout.write("Deleting the portfolio...")
+            self.drop_counters(landlord, manager)
+            with transaction.atomic():
+                for model, field in (
+                    (Invoice, "property__owner"),
+                    (MaintenanceRequest, "property__owner"),
+                    (Lease, "property__owner"),
+                    (Property, "owner"),
+                ):
+                    # Raw deletes: the synthetic rows skip the per-row signal handlers
+                    model.objects.filter(**{field: landlord})._raw_delete(model.objects.db)
+                User.objects.filter(id__in=[landlord.id, manager.id, tenant.id]).delete()
+
+    def build_portfolio(self, landlord, manager, tenant, count, batch_size):
+        # Bulk inserts bypass the status counters; build_counters reconciles them
+        today = timezone.now().date()
+        statuses = [Property.Status.RENTED, Property.Status.RENTED, Property.Status.AVAILABLE, Property.Status.MAINTENANCE]
+        for offset in range(0, count, batch_size):
+            with transaction.atomic():
+                batch = Property.objects.bulk_create([
+                    Property(
+                        name=f"Unit {n}", address=f"{n} Main St", city="Cape Town", state="WC", zip_code="8001",
+                        monthly_rent=1000, deposit_amount=500, status=statuses[n % len(statuses)],
+                        owner=landlord, property_manager=manager,
+                    )
+                    for n in range(offset, min(offset + batch_size, count))
+                ])
+                rented = [prop for prop in batch if prop.status == Property.Status.RENTED]
+                leases = Lease.objects.bulk_create([
+                    Lease(
+                        property=prop, tenant=tenant, start_date=today - timedelta(days=30),
+                        end_date=today + timedelta(days=335), rent_amount=1000, deposit_amount=500,
+                    )
+                    for prop in rented
+                ])
+                Invoice.objects.bulk_create([
+                    Invoice(
+                        tenant=tenant, property_id=lease.property_id, lease=lease, amount=1000,
+                        description="Rent", due_date=today,
+                    )
+                    for lease in leases
+                ])
+                MaintenanceRequest.objects.bulk_create([
+                    MaintenanceRequest(property=prop, tenant=tenant, title="Leak", description="Kitchen tap")
+                    for prop in batch[::5]
+                ])
+
+    def build_counters(self, landlord, manager):
+        for scope in SCOPE_USER_FIELDS:
+            reconcile(scope, [landlord.id, manager.id])
+
+    def drop_counters(self, landlord, manager):
+        PortfolioCounters.objects.filter(user_id__in=[landlord.id, manager.id]).delete()
+
+    def measure(self, path, user, requests):
+        """Latency in ms of each of ``requests`` requests to ``path``."""
+        headers = auth_headers(user)
+
+        async def send():
+            async with api_client() as client:
+                # Warm the user and scope caches, as on a live worker
+                (await client.get(path, headers=headers)).raise_for_status()
+                timings = []
+                for _ in range(requests):
+                    started = time.perf_counter()
+                    await client.get(path, headers=headers)
+                    timings.append((time.perf_counter() - started) * 1000)
+                return timings
+
+        # Every request must reach the handler
+        with override_settings(RESPONSE_CACHE_ENABLED=False, RESPONSE_COALESCING_ENABLED=False):
+            return asyncio.run(send())
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Property
+from analytics.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute PropertyAnalytics rollups from the raw lease, payment and "
+        "maintenance tables and report rows that drifted from them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Only report drift; exit with an error if any row drifted.",
+        )
+        parser.add_argument(
+            "--property", type=int, action="append", dest="property_ids",
+            help="Limit the rebuild to this property id (repeatable).",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Properties recomputed per batch.",
+        )
+
+    def handle(self, *args, check=False, property_ids=None, batch_size=500, **options):
+        if property_ids is None:
+            property_ids = list(Property.objects.order_by("id").values_list("id", flat=True))
+
+        drifted = 0
+        for offset in range(0, len(property_ids), batch_size):
+            drift = rebuild(property_ids[offset:offset + batch_size], fix=not check)
+            for property_id, fields in sorted(drift.items()):
+                drifted += 1
+                changes = ", ".join(
+                    f"{field}: {stored} -> {actual}" for field, (stored, actual) in fields.items()
+                )
+                self.stdout.write(f"Property {property_id}: {changes}")
+
+        summary = f"{drifted} of {len(property_ids)} properties drifted"
+        if check and drifted:
+            raise CommandError(summary)
+        if not check and drifted:
+            summary += " and were rebuilt"
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Property
+from analytics.counters import SCOPE_USER_FIELDS, reconcile
+from analytics.models import PortfolioCounters
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-owner and per-manager PortfolioCounters from the "
+        "property, invoice and maintenance tables and repair drifted rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Only report drift; exit with an error if any row drifted.",
+        )
+        parser.add_argument(
+            "--user", type=int, action="append", dest="user_ids",
+            help="Limit reconciliation to this user id (repeatable).",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Users recomputed per batch.",
+        )
+
+    def handle(self, *args, check=False, user_ids=None, batch_size=500, **options):
+        drifted = total = 0
+        for scope, user_field in SCOPE_USER_FIELDS.items():
+            if user_ids is None:
+                # Users with properties in the scope, plus stale rows of users without any
+                scope_user_ids = sorted(
+                    set(Property.objects.filter(**{f"{user_field}__isnull": False})
+                        .values_list(user_field, flat=True).distinct())
+                    | set(PortfolioCounters.objects.filter(scope=scope).values_list("user_id", flat=True))
+                )
+            else:
+                scope_user_ids = user_ids
+            total += len(scope_user_ids)
+
+            for offset in range(0, len(scope_user_ids), batch_size):
+                drift = reconcile(scope, scope_user_ids[offset:offset + batch_size], fix=not check)
+                for user_id, fields in sorted(drift.items()):
+                    drifted += 1
+                    changes = ", ".join(
+                        f"{field}: {stored} -> {actual}" for field, (stored, actual) in fields.items()
+                    )
+                    self.stdout.write(f"{scope.label} {user_id}: {changes}")
+
+        summary = f"{drifted} of {total} counter rows drifted"
+        if check and drifted:
+            raise CommandError(summary)
+        if not check and drifted:
+            summary += " and were repaired"
+        self.stdout.write(self.style.SUCCESS(summary))
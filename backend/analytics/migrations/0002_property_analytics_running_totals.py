@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-17 00:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="propertyanalytics",
+            name="first_lease_start",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="propertyanalytics",
+            name="last_lease_end",
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="propertyanalytics",
+            name="lease_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="propertyanalytics",
+            name="leased_days",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.1.15 on 2026-10-17 00:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0002_property_analytics_running_totals"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PortfolioCounters",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "scope",
+                    models.CharField(
+                        choices=[("OWNER", "Owner"), ("MANAGER", "Property Manager")],
+                        max_length=10,
+                    ),
+                ),
+                ("property_available", models.IntegerField(default=0)),
+                ("property_rented", models.IntegerField(default=0)),
+                ("property_maintenance", models.IntegerField(default=0)),
+                ("invoice_pending", models.IntegerField(default=0)),
+                ("invoice_paid", models.IntegerField(default=0)),
+                ("invoice_overdue", models.IntegerField(default=0)),
+                ("invoice_cancelled", models.IntegerField(default=0)),
+                ("maintenance_pending", models.IntegerField(default=0)),
+                ("maintenance_in_progress", models.IntegerField(default=0)),
+                ("maintenance_resolved", models.IntegerField(default=0)),
+                ("maintenance_cancelled", models.IntegerField(default=0)),
+                ("last_updated", models.DateTimeField(auto_now=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="portfolio_counters",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "scope"), name="portfolio_counters_user_scope"
+                    )
+                ],
+            },
+        ),
+    ]
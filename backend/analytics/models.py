@@ -1,4 +1,6 @@
 from django.db import models
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
 
 from api.models import Property
 
@@ -13,8 +15,52 @@ class PropertyAnalytics(models.Model):
     vacancy_days = models.IntegerField(default=0)
     maintenance_costs = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     
+    # Running totals the derived figures above are computed from
+    lease_count = models.IntegerField(default=0)
+    leased_days = models.IntegerField(default=0)
+    first_lease_start = models.DateField(null=True, blank=True)
+    last_lease_end = models.DateField(null=True, blank=True)
+    
     # Timestamps
     last_updated = models.DateTimeField(auto_now=True)
     
     def __str__(self):
-        return f"Analytics for {self.property.name}"
\ No newline at end of file
+        return f"Analytics for {self.property.name}"
+
+
+class PortfolioCounters(models.Model):
+    """Status counts for the properties a user owns or manages"""
+    class Scope(models.TextChoices):
+        OWNER = 'OWNER', _('Owner')
+        MANAGER = 'MANAGER', _('Property Manager')
+    
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='portfolio_counters')
+    scope = models.CharField(max_length=10, choices=Scope.choices)
+    
+    # Properties by status
+    property_available = models.IntegerField(default=0)
+    property_rented = models.IntegerField(default=0)
+    property_maintenance = models.IntegerField(default=0)
+    
+    # Invoices by status
+    invoice_pending = models.IntegerField(default=0)
+    invoice_paid = models.IntegerField(default=0)
+    invoice_overdue = models.IntegerField(default=0)
+    invoice_cancelled = models.IntegerField(default=0)
+    
+    # Maintenance requests by status
+    maintenance_pending = models.IntegerField(default=0)
+    maintenance_in_progress = models.IntegerField(default=0)
+    maintenance_resolved = models.IntegerField(default=0)
+    maintenance_cancelled = models.IntegerField(default=0)
+    
+    # Timestamps
+    last_updated = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope'], name='portfolio_counters_user_scope'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_scope_display()} counters for {self.user}"
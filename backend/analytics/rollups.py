@@ -0,0 +1,218 @@
+"""
+Incrementally maintained PropertyAnalytics rows.
+
+Payment, Lease and MaintenanceRequest writes are turned into deltas by the
+receivers in ``analytics.signals`` and applied here with single UPDATE
+statements, so keeping the rollups current never rescans the raw tables.
+``compute_rollups`` derives the same figures from the raw tables; it backs the
+``rebuild_property_analytics`` command and readers of properties that have no
+row yet.
+
+Figures kept per property:
+
+* ``total_income``: sum of payments against the property's invoices
+* ``maintenance_costs``: sum of ``actual_cost`` of its maintenance requests
+* ``average_tenant_stay``: mean lease length in days
+* ``occupancy_rate`` / ``vacancy_days``: share of the span from the first
+  lease start to the last lease end covered by leases, and the uncovered days
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Max, Min, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+
+from api.models import Property, Lease
+from notifications.models import MaintenanceRequest
+from payments.models import Payment
+from rentalhub.response_cache import response_cache
+from .models import PropertyAnalytics
+
+ROLLUP_FIELDS = (
+    'total_income', 'maintenance_costs', 'lease_count', 'leased_days',
+    'first_lease_start', 'last_lease_end',
+    'average_tenant_stay', 'vacancy_days', 'occupancy_rate',
+)
+
+
+def derived_figures(lease_count, leased_days, first_lease_start, last_lease_end):
+    span = (last_lease_end - first_lease_start).days if first_lease_start and last_lease_end else 0
+    return {
+        'average_tenant_stay': leased_days // lease_count if lease_count else 0,
+        'vacancy_days': max(span - leased_days, 0),
+        'occupancy_rate': (
+            (Decimal(min(leased_days, span) * 100) / span).quantize(Decimal('0.01')) if span > 0 else Decimal('0.00')
+        ),
+    }
+
+
+def compute_rollups(property_ids):
+    """Rollup values for ``property_ids`` computed from the raw tables."""
+    property_ids = list(property_ids)
+    income = dict(Payment.objects.filter(invoice__property_id__in=property_ids).values('invoice__property_id').annotate(
+        total=Sum('amount')
+    ).values_list('invoice__property_id', 'total'))
+    costs = dict(MaintenanceRequest.objects.filter(property_id__in=property_ids).values('property_id').annotate(
+        total=Sum('actual_cost')
+    ).values_list('property_id', 'total'))
+    leases = {
+        row['property_id']: row
+        for row in Lease.objects.filter(property_id__in=property_ids).values('property_id').annotate(
+            count=Count('id'),
+            duration=Sum(ExpressionWrapper(F('end_date') - F('start_date'), output_field=DurationField())),
+            first_start=Min('start_date'),
+            last_end=Max('end_date'),
+        )
+    }
+
+    rollups = {}
+    for property_id in property_ids:
+        lease = leases.get(property_id, {})
+        values = {
+            'total_income': income.get(property_id) or Decimal('0.00'),
+            'maintenance_costs': costs.get(property_id) or Decimal('0.00'),
+            'lease_count': lease.get('count', 0),
+            'leased_days': lease['duration'].days if lease.get('duration') else 0,
+            'first_lease_start': lease.get('first_start'),
+            'last_lease_end': lease.get('last_end'),
+        }
+        values.update(derived_figures(
+            values['lease_count'], values['leased_days'], values['first_lease_start'], values['last_lease_end']
+        ))
+        rollups[property_id] = values
+    return rollups
+
+
+def load_rollups(property_ids):
+    """
+    Stored rollups for ``property_ids``. Properties without a row (created
+    before rollups existed and not yet rebuilt) are computed from the raw
+    tables instead.
+    """
+    property_ids = list(property_ids)
+    rollups = {
+        row['property_id']: row
+        for row in PropertyAnalytics.objects.filter(property_id__in=property_ids).values('property_id', *ROLLUP_FIELDS)
+    }
+    missing = [property_id for property_id in property_ids if property_id not in rollups]
+    if missing:
+        rollups.update(compute_rollups(missing))
+    return rollups
+
+
+def create_rollup(property_id):
+    PropertyAnalytics.objects.bulk_create(
+        [PropertyAnalytics(property_id=property_id, **compute_rollups([property_id])[property_id])],
+        ignore_conflicts=True,
+    )
+
+
+def apply_delta(property_id, total_income=0, maintenance_costs=0, added_lease=None, removed_lease=None):
+    """
+    Apply a change to one property's rollup.
+
+    ``added_lease`` and ``removed_lease`` are ``(start_date, end_date)``
+    pairs. A property without a row gets one computed from the raw tables,
+    which already include the change.
+    """
+    updates = {}
+    if total_income:
+        updates['total_income'] = F('total_income') + total_income
+    if maintenance_costs:
+        updates['maintenance_costs'] = F('maintenance_costs') + maintenance_costs
+    lease_count = leased_days = 0
+    for lease, sign in ((added_lease, 1), (removed_lease, -1)):
+        if lease is not None:
+            lease_count += sign
+            leased_days += sign * (lease[1] - lease[0]).days
+    if lease_count:
+        updates['lease_count'] = F('lease_count') + lease_count
+    if leased_days:
+        updates['leased_days'] = F('leased_days') + leased_days
+    if added_lease is not None:
+        start, end = added_lease
+        updates['first_lease_start'] = Least(Coalesce('first_lease_start', Value(start)), Value(start))
+        updates['last_lease_end'] = Greatest(Coalesce('last_lease_end', Value(end)), Value(end))
+    if not updates and removed_lease is None:
+        return
+
+    rows = PropertyAnalytics.objects.filter(property_id=property_id)
+    with transaction.atomic():
+        # The counter UPDATE comes first so its row lock serializes concurrent
+        # deltas for the property before the derived figures are re-read.
+        if not rows.update(last_updated=timezone.now(), **updates):
+            if added_lease is not None or total_income > 0 or maintenance_costs > 0:
+                create_rollup(property_id)
+            return
+        if added_lease is None and removed_lease is None:
+            return
+
+        row = rows.values('lease_count', 'leased_days', 'first_lease_start', 'last_lease_end').get()
+        if removed_lease is not None and row['first_lease_start'] is not None and (
+            removed_lease[0] <= row['first_lease_start'] or removed_lease[1] >= row['last_lease_end']
+        ):
+            # The removed lease may have defined a bound of the span
+            bounds = Lease.objects.filter(property_id=property_id).aggregate(
+                first_lease_start=Min('start_date'), last_lease_end=Max('end_date')
+            )
+            row.update(bounds)
+        else:
+            bounds = {}
+        rows.update(**bounds, **derived_figures(
+            row['lease_count'], row['leased_days'], row['first_lease_start'], row['last_lease_end']
+        ))
+
+
+def rebuild(property_ids, fix=True):
+    """
+    Recompute the rollups of ``property_ids`` from the raw tables and return
+    ``{property_id: {field: (stored, actual)}}`` for every figure that had
+    drifted. With ``fix`` the stored rows are corrected.
+    """
+    actual = compute_rollups(property_ids)
+    stored = {
+        row.property_id: row for row in PropertyAnalytics.objects.filter(property_id__in=list(actual))
+    }
+
+    drift, to_create, to_update = {}, [], []
+    for property_id, values in actual.items():
+        row = stored.get(property_id)
+        if row is None:
+            to_create.append(PropertyAnalytics(property_id=property_id, **values))
+            drift[property_id] = {field: (None, value) for field, value in values.items()}
+            continue
+        changed = {
+            field: (getattr(row, field), value)
+            for field, value in values.items() if getattr(row, field) != value
+        }
+        if changed:
+            drift[property_id] = changed
+            for field, value in values.items():
+                setattr(row, field, value)
+            row.last_updated = timezone.now()
+            to_update.append(row)
+
+    if fix:
+        with transaction.atomic():
+            PropertyAnalytics.objects.bulk_create(to_create, ignore_conflicts=True)
+            PropertyAnalytics.objects.bulk_update(to_update, [*ROLLUP_FIELDS, 'last_updated'])
+            if drift:
+                # Callers such as the lease import rebuild inside their own
+                # transaction; a reader must not cache the uncommitted figures
+                tags = rollup_cache_tags(drift)
+                transaction.on_commit(lambda: response_cache.invalidate_tags(tags))
+    return drift
+
+
+def rollup_cache_tags(property_ids):
+    """Response cache tags of the pages showing the rollups of ``property_ids``."""
+    tags = {'all'}
+    for property_id, owner_id, manager_id in Property.objects.filter(id__in=list(property_ids)).values_list(
+        'id', 'owner_id', 'property_manager_id'
+    ):
+        tags.update({f'property:{property_id}', f'owner:{owner_id}'})
+        if manager_id is not None:
+            tags.add(f'manager:{manager_id}')
+    return tags
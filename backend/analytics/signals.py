@@ -0,0 +1,128 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from api.models import Property, Lease
+from notifications.models import MaintenanceRequest
+from payments.models import Invoice, Payment
+from .models import PropertyAnalytics
+from .rollups import apply_delta
+
+
+# Each tracked row contributes to one property's rollup. pre_save remembers
+# the stored contribution of a row being updated so post_save can apply the
+# difference; post_delete removes the contribution.
+
+def _field_value(model, field, value):
+    # Handlers assign raw request values (e.g. date strings), so normalise them
+    return model._meta.get_field(field).to_python(value)
+
+
+def _stored_contribution(sender, instance, fields):
+    if instance._state.adding or instance.pk is None:
+        return None
+    return sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+def _payment_property_id(payment):
+    if Payment._meta.get_field('invoice').is_cached(payment):
+        return payment.invoice.property_id
+    return Invoice.objects.filter(pk=payment.invoice_id).values_list('property_id', flat=True).first()
+
+
+@receiver(post_save, sender=Property)
+def create_property_analytics(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        PropertyAnalytics.objects.bulk_create([PropertyAnalytics(property=instance)], ignore_conflicts=True)
+
+
+@receiver(pre_save, sender=Payment)
+def remember_payment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._rollup_previous = _stored_contribution(sender, instance, ('amount', 'invoice__property_id'))
+
+
+@receiver(post_save, sender=Payment)
+def apply_payment(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    property_id = _payment_property_id(instance)
+    amount = _field_value(Payment, 'amount', instance.amount)
+    if previous is None:
+        apply_delta(property_id, total_income=amount)
+    elif previous['invoice__property_id'] == property_id:
+        apply_delta(property_id, total_income=amount - previous['amount'])
+    else:
+        apply_delta(previous['invoice__property_id'], total_income=-previous['amount'])
+        apply_delta(property_id, total_income=amount)
+
+
+@receiver(post_delete, sender=Payment)
+def remove_payment(sender, instance, **kwargs):
+    property_id = _payment_property_id(instance)
+    if property_id is not None:
+        apply_delta(property_id, total_income=-_field_value(Payment, 'amount', instance.amount))
+
+
+@receiver(pre_save, sender=MaintenanceRequest)
+def remember_maintenance_request(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._rollup_previous = _stored_contribution(sender, instance, ('actual_cost', 'property_id'))
+
+
+@receiver(post_save, sender=MaintenanceRequest)
+def apply_maintenance_request(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    cost = _field_value(MaintenanceRequest, 'actual_cost', instance.actual_cost) or 0
+    if previous is None:
+        apply_delta(instance.property_id, maintenance_costs=cost)
+    elif previous['property_id'] == instance.property_id:
+        apply_delta(instance.property_id, maintenance_costs=cost - (previous['actual_cost'] or 0))
+    else:
+        apply_delta(previous['property_id'], maintenance_costs=-(previous['actual_cost'] or 0))
+        apply_delta(instance.property_id, maintenance_costs=cost)
+
+
+@receiver(post_delete, sender=MaintenanceRequest)
+def remove_maintenance_request(sender, instance, **kwargs):
+    cost = _field_value(MaintenanceRequest, 'actual_cost', instance.actual_cost)
+    if cost:
+        apply_delta(instance.property_id, maintenance_costs=-cost)
+
+
+def _lease_period(instance):
+    return (
+        _field_value(Lease, 'start_date', instance.start_date),
+        _field_value(Lease, 'end_date', instance.end_date),
+    )
+
+
+@receiver(pre_save, sender=Lease)
+def remember_lease(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._rollup_previous = _stored_contribution(sender, instance, ('property_id', 'start_date', 'end_date'))
+
+
+@receiver(post_save, sender=Lease)
+def apply_lease(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    period = _lease_period(instance)
+    if previous is None:
+        apply_delta(instance.property_id, added_lease=period)
+        return
+    previous_period = (previous['start_date'], previous['end_date'])
+    if previous['property_id'] == instance.property_id:
+        if previous_period != period:
+            apply_delta(instance.property_id, added_lease=period, removed_lease=previous_period)
+    else:
+        apply_delta(previous['property_id'], removed_lease=previous_period)
+        apply_delta(instance.property_id, added_lease=period)
+
+
+@receiver(post_delete, sender=Lease)
+def remove_lease(sender, instance, **kwargs):
+    apply_delta(instance.property_id, removed_lease=_lease_period(instance))
@@ -1,3 +1,93 @@
 from django.test import TestCase
 
-# Create your tests here.
+from api.models import Property
+from analytics import rollups
+from analytics.counters import reconcile
+from analytics.models import PortfolioCounters, PropertyAnalytics
+from rentalhub.response_cache import TAG_PREFIX, response_cache
+from rentalhub.testing import ApiTestCase
+from users.models import User
+
+
+class PortfolioCountersTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        self.manager = User.objects.create_user('manager', 'manager@example.com', 'pw', role=User.Role.PROPERTY_MANAGER)
+        self.other_manager = User.objects.create_user(
+            'other', 'other@example.com', 'pw', role=User.Role.PROPERTY_MANAGER
+        )
+        self.property = Property.objects.create(
+            name='Flat', address='1 Main St', city='Cape Town', state='WC', zip_code='8001',
+            monthly_rent=1000, deposit_amount=500, owner=self.landlord,
+        )
+
+    def assertNoDrift(self):
+        for scope, user_ids in (
+            (PortfolioCounters.Scope.OWNER, [self.landlord.id]),
+            (PortfolioCounters.Scope.MANAGER, [self.manager.id, self.other_manager.id]),
+        ):
+            self.assertEqual(reconcile(scope, user_ids, fix=False), {})
+
+    def test_manager_assigned_with_status_change_counts_once(self):
+        # Neither user has a counters row yet
+        response = self.put(f'/properties/{self.property.id}/', self.landlord, json={
+            'property_manager_id': self.manager.id, 'status': Property.Status.MAINTENANCE,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertNoDrift()
+
+    def test_manager_replaced_with_status_change_counts_once(self):
+        self.put(f'/properties/{self.property.id}/', self.landlord, json={'property_manager_id': self.manager.id})
+        response = self.put(f'/properties/{self.property.id}/', self.landlord, json={
+            'property_manager_id': self.other_manager.id, 'status': Property.Status.MAINTENANCE,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertNoDrift()
+
+    def test_status_change_without_move(self):
+        self.put(f'/properties/{self.property.id}/', self.landlord, json={'property_manager_id': self.manager.id})
+        response = self.put(f'/properties/{self.property.id}/', self.landlord, json={'status': Property.Status.MAINTENANCE})
+        self.assertEqual(response.status_code, 200)
+        self.assertNoDrift()
+
+
+class RollupRebuildTests(TestCase):
+    def test_cache_invalidated_on_commit(self):
+        landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        property = Property.objects.create(
+            name='Flat', address='1 Main St', city='Cape Town', state='WC', zip_code='8001',
+            monthly_rent=1000, deposit_amount=500, owner=landlord,
+        )
+        PropertyAnalytics.objects.filter(property=property).update(total_income=500)
+        tag_key = f'{TAG_PREFIX}property:{property.id}'
+        response_cache.invalidate_tags([f'property:{property.id}'])
+        version = response_cache.backend.get(tag_key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIn(property.id, rollups.rebuild([property.id]))
+            # Readers still see the old figures until the rebuild commits
+            self.assertEqual(response_cache.backend.get(tag_key), version)
+        self.assertNotEqual(response_cache.backend.get(tag_key), version)
+
+
+class ReconcileTests(TestCase):
+    def test_cache_invalidated_on_commit(self):
+        landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        Property.objects.create(
+            name='Flat', address='1 Main St', city='Cape Town', state='WC', zip_code='8001',
+            monthly_rent=1000, deposit_amount=500, owner=landlord,
+        )
+        PortfolioCounters.objects.update_or_create(
+            scope=PortfolioCounters.Scope.OWNER, user_id=landlord.id, defaults={'property_available': 5}
+        )
+        tag_key = f'{TAG_PREFIX}owner:{landlord.id}'
+        response_cache.invalidate_tags([f'owner:{landlord.id}'])
+        version = response_cache.backend.get(tag_key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            drift = reconcile(PortfolioCounters.Scope.OWNER, [landlord.id])
+            self.assertEqual(drift, {landlord.id: {'property_available': (5, 1)}})
+            # Readers still see the old counters until the fix commits
+            self.assertEqual(response_cache.backend.get(tag_key), version)
+        self.assertNotEqual(response_cache.backend.get(tag_key), version)
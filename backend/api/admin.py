@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Property, PropertyImage, PropertyDocument, Lease
+from .models import Amenity, Property, PropertyImage, PropertyDocument, Lease
 
 
 class PropertyImageInline(admin.TabularInline):
@@ -20,6 +20,12 @@ class PropertyAdmin(admin.ModelAdmin):
     inlines = [PropertyImageInline, PropertyDocumentInline]
 
 
+@admin.register(Amenity)
+class AmenityAdmin(admin.ModelAdmin):
+    list_display = ('name', 'code', 'bit', 'aliases')
+    search_fields = ('name', 'code', 'aliases')
+
+
 @admin.register(Lease)
 class LeaseAdmin(admin.ModelAdmin):
     list_display = ('property', 'tenant', 'start_date', 'end_date', 'rent_amount', 'is_active')
@@ -0,0 +1,101 @@
+"""
+Controlled vocabulary of property amenities.
+
+The vocabulary is the ``Amenity`` table: every amenity has a code, a label,
+a bit and the phrases that name it in free text. A property's free-text
+``amenities`` is parsed into ``Property.amenity_flags``, one bit per amenity
+mentioned, whenever a save changes it, so "has parking and a pool" is a
+bitwise AND instead of text scans.
+
+The vocabulary is read once per process; changes through the ORM reset it
+in the process that made them (see ``api.signals``). Properties parsed
+before an amenity's phrases changed keep their flags until their
+``amenities`` is saved again.
+"""
+
+import re
+import threading
+
+from django.apps import apps
+
+# amenity_flags is a signed 64-bit column
+MAX_AMENITIES = 63
+
+
+class UnknownAmenity(ValueError):
+    pass
+
+
+def _words(phrase):
+    return [word for word in re.split(r'[\s_-]+', phrase.casefold()) if word]
+
+
+class AmenityVocabulary:
+    def __init__(self, rows=None):
+        self._lock = threading.Lock()
+        self._terms = None
+        if rows is not None:
+            self._build(rows)
+
+    def _build(self, rows):
+        """Index ``(code, name, bit, aliases)`` rows, ``aliases`` comma-separated."""
+        bits = {}
+        codes = {}
+        phrases = {}
+        for code, name, bit, aliases in rows:
+            bits[code] = bit
+            codes[bit] = code
+            for phrase in [code, name, *aliases.split(',')]:
+                words = _words(phrase)
+                if words:
+                    phrases[' '.join(words)] = bit
+        # Words may be separated by any run of spaces or hyphens; longer
+        # phrases come first, so "swimming pool" wins over "pool"
+        alternatives = [
+            r'[\s-]+'.join(map(re.escape, phrase.split(' ')))
+            for phrase in sorted(phrases, key=len, reverse=True)
+        ]
+        pattern = re.compile(r'(?<!\w)(?:' + '|'.join(alternatives) + r')(?!\w)') if alternatives else None
+        self._terms = (bits, codes, pattern, phrases)
+
+    def _loaded(self):
+        if self._terms is None:
+            with self._lock:
+                if self._terms is None:
+                    Amenity = apps.get_model('api', 'Amenity')
+                    self._build(Amenity.objects.values_list('code', 'name', 'bit', 'aliases'))
+        return self._terms
+
+    def reset(self):
+        self._terms = None
+
+    def parse(self, text):
+        """The flags of the amenities mentioned in free text."""
+        if not text:
+            return 0
+        bits, codes, pattern, phrases = self._loaded()
+        if pattern is None:
+            return 0
+        flags = 0
+        for match in pattern.finditer(text.casefold()):
+            flags |= 1 << phrases[' '.join(_words(match.group()))]
+        return flags
+
+    def mask(self, codes):
+        """The flags of amenity ``codes``; raises UnknownAmenity for codes outside the vocabulary."""
+        bits = self._loaded()[0]
+        unknown = [code for code in codes if code not in bits]
+        if unknown:
+            raise UnknownAmenity(f"Unknown amenities: {', '.join(unknown)}")
+        flags = 0
+        for code in codes:
+            flags |= 1 << bits[code]
+        return flags
+
+    def codes(self, flags):
+        """The codes of the amenities set in ``flags``, by bit."""
+        codes = self._loaded()[1]
+        return [codes[bit] for bit in sorted(codes) if flags >> bit & 1]
+
+
+amenity_vocabulary = AmenityVocabulary()
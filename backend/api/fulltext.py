@@ -0,0 +1,133 @@
+"""
+Full-text search over property name, address, description and amenities.
+
+On SQLite the text is indexed in an FTS5 table, ``api_property_fts``, that
+uses ``api_property`` as its external content and is kept in sync by
+triggers, so every write path, bulk updates included, reaches the index.
+Matches are ranked with BM25, weighting the name above the address,
+amenities and description, and every query term matches as a prefix.
+
+SQLite rebuilds a table for some schema changes, which drops its triggers;
+migrations altering ``api_property`` must call ``install`` afterwards.
+Other databases have no index: ``available`` is False and callers fall back
+to substring filters.
+"""
+
+import base64
+import html
+import json
+import re
+
+from django.db import connection
+
+from rentalhub.pagination import InvalidCursor
+
+FTS_TABLE = 'api_property_fts'
+FTS_COLUMNS = ('name', 'address', 'description', 'amenities')
+
+# BM25 weight of each column, in FTS_COLUMNS order
+FTS_WEIGHTS = (10.0, 4.0, 1.0, 2.0)
+
+SNIPPET_TOKENS = 12
+
+# Placeholders around matched terms, swapped for <mark> tags after the
+# surrounding text has been HTML-escaped
+_OPEN, _CLOSE = '\x02', '\x03'
+
+_TERMS = re.compile(r'\w+', re.UNICODE)
+
+
+def available():
+    return connection.vendor == 'sqlite'
+
+
+def install(schema_editor):
+    """Create the FTS5 table and its triggers if missing and (re)index every property."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    columns = ', '.join(FTS_COLUMNS)
+    new = ', '.join(f'new.{column}' for column in FTS_COLUMNS)
+    old = ', '.join(f'old.{column}' for column in FTS_COLUMNS)
+    for statement in (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{columns}, content='api_property', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON api_property BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON api_property BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF {columns} ON api_property BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new}); END",
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    ):
+        schema_editor.execute(statement)
+
+
+def uninstall(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for trigger in ('insert', 'delete', 'update'):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{trigger}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def query_terms(q):
+    return _TERMS.findall(q)
+
+
+def match_expression(terms):
+    """An FTS5 query requiring every term, each as a prefix."""
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def encode_cursor(rank, property_id):
+    payload = json.dumps([rank, property_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        rank, property_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(rank), int(property_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid pagination cursor")
+
+
+def _marked(text):
+    if text is None:
+        return None
+    return html.escape(text).replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+
+
+def ranked_matches(queryset, terms, cursor=None, limit=20):
+    """
+    Up to ``limit + 1`` ``(property_id, rank, name, snippet)`` matches of
+    ``terms`` within ``queryset``, best first. ``name`` and ``snippet`` are
+    HTML-escaped with matched terms wrapped in ``<mark>``; ``cursor`` is the
+    ``encode_cursor`` value of the last match of the previous page.
+    """
+    scope_sql, scope_params = queryset.values('id').query.sql_with_params()
+    weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+    sql = (
+        f"SELECT id, rank, name, snippet FROM ("
+        f"SELECT {FTS_TABLE}.rowid AS id, bm25({FTS_TABLE}, {weights}) AS rank, "
+        f"highlight({FTS_TABLE}, 0, %s, %s) AS name, "
+        f"snippet({FTS_TABLE}, -1, %s, %s, '…', {SNIPPET_TOKENS}) AS snippet "
+        f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid IN ({scope_sql})"
+        f") "
+    )
+    params = [_OPEN, _CLOSE, _OPEN, _CLOSE, match_expression(terms), *scope_params]
+    if cursor:
+        rank, property_id = decode_cursor(cursor)
+        sql += "WHERE rank > %s OR (rank = %s AND id > %s) "
+        params += [rank, rank, property_id]
+    sql += "ORDER BY rank, id LIMIT %s"
+    params.append(limit + 1)
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        return [
+            (property_id, rank, _marked(name), _marked(snippet))
+            for property_id, rank, name, snippet in db_cursor.fetchall()
+        ]
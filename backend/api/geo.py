@@ -0,0 +1,226 @@
+"""
+Property coordinates: offline geocoding and geohash-bucketed area queries.
+
+Coordinates come from the ``PostcodeCentroid`` table, loaded from a local
+GeoNames postal code dump (see the ``load_postcode_centroids`` command), so
+geocoding never leaves the process. Every located property also stores the
+geohash of its coordinates, indexed, at GEOHASH_PRECISION characters.
+
+A radius or bounding box query is first narrowed to the geohash cells
+covering the area, each an index range, then checked exactly on the
+coordinates: a bounding box by comparison, a radius by haversine distance.
+The matches are applied to listings as an ``id IN (subquery)``, which keeps
+SQLite on the geohash index instead of walking the listing order index.
+"""
+
+import math
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models import F, Q
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Sorts after every geohash character, closing a prefix's index range
+GEOHASH_RANGE_END = '{'
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Property.country is free text; GeoNames files use ISO 3166 alpha-2 codes
+COUNTRY_CODES = {
+    'united states': 'US', 'united states of america': 'US', 'usa': 'US',
+    'canada': 'CA', 'mexico': 'MX',
+    'united kingdom': 'GB', 'great britain': 'GB', 'uk': 'GB', 'ireland': 'IE',
+    'france': 'FR', 'germany': 'DE', 'netherlands': 'NL', 'spain': 'ES', 'portugal': 'PT', 'italy': 'IT',
+    'australia': 'AU', 'new zealand': 'NZ', 'india': 'IN',
+    'south africa': 'ZA', 'zimbabwe': 'ZW', 'botswana': 'BW', 'namibia': 'NA', 'zambia': 'ZM', 'kenya': 'KE',
+}
+
+
+class InvalidArea(ValueError):
+    pass
+
+
+# Geocoding
+
+def country_code(country):
+    country = (country or '').strip()
+    if len(country) == 2:
+        return country.upper()
+    return COUNTRY_CODES.get(country.casefold())
+
+
+def normalize_postal_code(postal_code):
+    return ' '.join((postal_code or '').upper().split())
+
+
+def geocode(country, postal_code):
+    """
+    ``(latitude, longitude)`` of a postal code's centroid, or None if the
+    country or code is unknown. ZIP+4 style codes fall back to their first
+    part. Not cached: centroids loaded or corrected by
+    ``load_postcode_centroids`` apply to the next save in every process, and
+    ``Property.save`` only geocodes a changed address.
+    """
+    code = country_code(country)
+    postal_code = normalize_postal_code(postal_code)
+    if not code or not postal_code:
+        return None
+    candidates = [postal_code]
+    if '-' in postal_code:
+        candidates.append(postal_code.split('-')[0])
+    PostcodeCentroid = apps.get_model('api', 'PostcodeCentroid')
+    centroids = {
+        postal: (latitude, longitude)
+        for postal, latitude, longitude in PostcodeCentroid.objects.filter(
+            country_code=code, postal_code__in=candidates
+        ).values_list('postal_code', 'latitude', 'longitude')
+    }
+    for candidate in candidates:
+        if candidate in centroids:
+            return centroids[candidate]
+    return None
+
+
+# Geohashes
+
+def _cell_bits(precision):
+    bits = 5 * precision
+    # Longitude takes the first, third, ... bit
+    return (bits + 1) // 2, bits // 2
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lng_bits, lat_bits = _cell_bits(precision)
+    x = min(int((longitude + 180) / 360 * (1 << lng_bits)), (1 << lng_bits) - 1)
+    y = min(int((latitude + 90) / 180 * (1 << lat_bits)), (1 << lat_bits) - 1)
+    return _cell(x, y, precision)
+
+
+def _cell(x, y, precision):
+    lng_bits, lat_bits = _cell_bits(precision)
+    value = 0
+    for i in range(5 * precision):
+        if i % 2 == 0:
+            lng_bits -= 1
+            value = value << 1 | (x >> lng_bits & 1)
+        else:
+            lat_bits -= 1
+            value = value << 1 | (y >> lat_bits & 1)
+    return ''.join(
+        GEOHASH_ALPHABET[value >> shift & 31]
+        for shift in range(5 * (precision - 1), -1, -5)
+    )
+
+
+def covering_cells(min_lat, min_lng, max_lat, max_lng):
+    """
+    Geohash cells covering a bounding box that does not cross the
+    antimeridian: the finest precision needing at most
+    PROPERTY_GEO_MAX_CELLS cells.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lng_bits, lat_bits = _cell_bits(precision)
+        x_scale, y_scale = (1 << lng_bits) / 360, (1 << lat_bits) / 180
+        x0, x1 = int((min_lng + 180) * x_scale), min(int((max_lng + 180) * x_scale), (1 << lng_bits) - 1)
+        y0, y1 = int((min_lat + 90) * y_scale), min(int((max_lat + 90) * y_scale), (1 << lat_bits) - 1)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= settings.PROPERTY_GEO_MAX_CELLS or precision == 1:
+            return [_cell(x, y, precision) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+def _cells_filter(cells):
+    query = Q()
+    for cell in sorted(cells):
+        query |= Q(geohash__gte=cell, geohash__lt=cell + GEOHASH_RANGE_END)
+    return query
+
+
+# Area queries
+
+def _check_point(latitude, longitude):
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise InvalidArea("Coordinates out of range")
+
+
+def _boxes(min_lat, min_lng, max_lat, max_lng):
+    # A box crossing the antimeridian (min_lng > max_lng) is split in two
+    if min_lng > max_lng:
+        return [(min_lat, min_lng, max_lat, 180.0), (min_lat, -180.0, max_lat, max_lng)]
+    return [(min_lat, min_lng, max_lat, max_lng)]
+
+
+def _properties_in(query):
+    Property = apps.get_model('api', 'Property')
+    return Q(id__in=Property.objects.filter(query).values('id'))
+
+
+def _box_filter(boxes):
+    query = Q()
+    for min_lat, min_lng, max_lat, max_lng in boxes:
+        cells = covering_cells(min_lat, min_lng, max_lat, max_lng)
+        query |= _cells_filter(cells) & Q(
+            latitude__gte=min_lat, latitude__lte=max_lat,
+            longitude__gte=min_lng, longitude__lte=max_lng,
+        )
+    return query
+
+
+def bbox_filter(bbox):
+    """
+    A Q for properties within ``bbox``, "min_lng,min_lat,max_lng,max_lat"
+    in degrees; min_lng > max_lng crosses the antimeridian.
+    """
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(value) for value in bbox.split(','))
+    except ValueError:
+        raise InvalidArea("bbox must be min_lng,min_lat,max_lng,max_lat")
+    _check_point(min_lat, min_lng)
+    _check_point(max_lat, max_lng)
+    if min_lat > max_lat:
+        raise InvalidArea("bbox min_lat is above max_lat")
+    return _properties_in(_box_filter(_boxes(min_lat, min_lng, max_lat, max_lng)))
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def distance_km(latitude, longitude):
+    """An expression for the haversine distance in km from a point to each property."""
+    lat = math.radians(latitude)
+    a = (
+        Power(Sin((Radians(F('latitude')) - lat) / 2), 2)
+        + math.cos(lat) * Cos(Radians(F('latitude'))) * Power(Sin((Radians(F('longitude')) - math.radians(longitude)) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))
+
+
+def radius_filter(latitude, longitude, radius_km):
+    """A Q for properties within ``radius_km`` of a point."""
+    _check_point(latitude, longitude)
+    if not 0 < radius_km <= settings.PROPERTY_GEO_MAX_RADIUS_KM:
+        raise InvalidArea(f"radius_km must be above 0 and at most {settings.PROPERTY_GEO_MAX_RADIUS_KM}")
+    lat_delta = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(latitude - lat_delta, -90.0), min(latitude + lat_delta, 90.0)
+    # Longitude degrees shrink with the cosine of the latitude furthest
+    # from the equator; near a pole the box spans every longitude
+    widest = max(abs(min_lat), abs(max_lat))
+    if widest >= 89.9:
+        boxes = [(min_lat, -180.0, max_lat, 180.0)]
+    else:
+        lng_delta = radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest)))
+        if lng_delta >= 180:
+            boxes = [(min_lat, -180.0, max_lat, 180.0)]
+        else:
+            min_lng = (longitude - lng_delta + 180) % 360 - 180
+            max_lng = (longitude + lng_delta + 180) % 360 - 180
+            boxes = _boxes(min_lat, min_lng, max_lat, max_lng)
+    Property = apps.get_model('api', 'Property')
+    within = Property.objects.filter(_box_filter(boxes)).alias(
+        distance=distance_km(latitude, longitude)
+    ).filter(distance__lte=radius_km)
+    return Q(id__in=within.values('id'))
@@ -0,0 +1,292 @@
+"""
+Bulk lease onboarding from CSV or NDJSON uploads.
+
+An import is all or nothing. Rows are parsed and checked in memory first;
+the properties and tenants they name are then resolved with one ``IN``
+query each (the properties locked for the rest of the transaction), and the
+new active leases are checked for overlaps against the stored leases and
+each other with ``batch_conflicts``. Only an import without errors is
+written: the leases with ``bulk_create`` in batches of LEASE_IMPORT_BATCH_SIZE
+and the properties they rent with one set-based UPDATE.
+
+``bulk_create`` and ``update`` bypass the model signals, so ``import_leases``
+maintains what the receivers would have: portfolio counters, occupancy
+runs and analytics rollups in the transaction, scope and response caches
+once it commits.
+"""
+
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from analytics import rollups
+from analytics.counters import record_transitions
+from rentalhub.response_cache import response_cache
+from users.models import User
+from . import occupancy
+from .lease_overlaps import PROPERTY_IDS_PER_QUERY, InvalidLeasePeriod, batch_conflicts, lease_period
+from .models import Lease, Property
+from .scopes import scope_cache
+
+FORMATS = ('csv', 'ndjson')
+FORMAT_EXTENSIONS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+FORMAT_CONTENT_TYPES = {
+    'text/csv': 'csv', 'application/csv': 'csv',
+    'application/x-ndjson': 'ndjson', 'application/jsonl': 'ndjson', 'application/json-lines': 'ndjson',
+}
+
+REQUIRED_COLUMNS = ('property_id', 'tenant_id', 'start_date', 'end_date', 'rent_amount', 'deposit_amount')
+
+_FIELDS = {name: Lease._meta.get_field(name) for name in ('rent_amount', 'deposit_amount')}
+_FLAGS = {
+    'true': True, 't': True, 'yes': True, 'y': True, '1': True,
+    'false': False, 'f': False, 'no': False, 'n': False, '0': False,
+}
+
+
+class LeaseImportError(ValueError):
+    def __init__(self, message, errors=(), error_count=0):
+        super().__init__(message)
+        self.errors = list(errors)
+        self.error_count = error_count or len(self.errors)
+
+
+def upload_format(filename=None, content_type=None):
+    """The format of an upload from its file extension or content type."""
+    name = (filename or '').lower()
+    for extension, format in FORMAT_EXTENSIONS.items():
+        if name.endswith(extension):
+            return format
+    format = FORMAT_CONTENT_TYPES.get((content_type or '').split(';')[0].strip().lower())
+    if format is None:
+        raise LeaseImportError("Cannot tell the upload format; pass format=csv or format=ndjson")
+    return format
+
+
+def read_rows(content, format):
+    """``(line, row)`` pairs of an upload; blank lines are skipped."""
+    if format not in FORMATS:
+        raise LeaseImportError(f"Unknown format {format!r}; expected one of {', '.join(FORMATS)}")
+    try:
+        text = content.decode('utf-8-sig') if isinstance(content, bytes) else content
+    except UnicodeDecodeError:
+        raise LeaseImportError("Upload is not UTF-8 text")
+    if format == 'csv':
+        return _csv_rows(text)
+    return _ndjson_rows(text)
+
+
+def _csv_rows(text):
+    reader = csv.DictReader(io.StringIO(text, newline=''))
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise LeaseImportError(f"CSV header is missing column(s) {', '.join(missing)}")
+    for row in reader:
+        if any((value or '').strip() for value in row.values() if isinstance(value, str)):
+            yield reader.line_num, row
+
+
+def _ndjson_rows(text):
+    for line, record in enumerate(text.splitlines(), start=1):
+        if not record.strip():
+            continue
+        try:
+            row = json.loads(record)
+        except ValueError:
+            row = None
+        yield line, row if isinstance(row, dict) else {'__invalid__': True}
+
+
+def _text(value):
+    # NDJSON values may be numbers or other JSON types where text is expected
+    return value if value is None or isinstance(value, str) else str(value)
+
+
+def _clean_id(row, column, errors):
+    value = row.get(column)
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        return int(value.strip() if isinstance(value, str) else value)
+    except (TypeError, ValueError):
+        errors.append(f"{column} must be an integer")
+
+
+def _clean_flag(row, column, errors, default):
+    value = row.get(column)
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    flag = _FLAGS.get(_text(value).strip().lower())
+    if flag is None:
+        errors.append(f"{column} must be true or false")
+    return flag
+
+
+def _clean_field(row, column, errors):
+    value = row.get(column)
+    if value is None or value == '':
+        errors.append(f"{column} is required")
+        return None
+    try:
+        return _FIELDS[column].clean(value.strip() if isinstance(value, str) else value, None)
+    except ValidationError as e:
+        errors.append(f"{column}: {e.messages[0]}")
+
+
+def parse_row(row):
+    """``(values, errors)`` of one row, checked without the database."""
+    if row.get('__invalid__'):
+        return None, ["Line is not a JSON object"]
+    errors = []
+    values = {
+        'property_id': _clean_id(row, 'property_id', errors),
+        'tenant_id': _clean_id(row, 'tenant_id', errors),
+        'rent_amount': _clean_field(row, 'rent_amount', errors),
+        'deposit_amount': _clean_field(row, 'deposit_amount', errors),
+        'is_active': _clean_flag(row, 'is_active', errors, default=True),
+    }
+    try:
+        values['start_date'], values['end_date'] = lease_period(_text(row.get('start_date')), _text(row.get('end_date')))
+    except InvalidLeasePeriod as e:
+        errors.append(str(e))
+    return values, errors
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for offset in range(0, len(ids), PROPERTY_IDS_PER_QUERY):
+        yield ids[offset:offset + PROPERTY_IDS_PER_QUERY]
+
+
+def _resolve_properties(property_ids):
+    # Locking the properties serializes concurrent lease writes for them
+    # where the database supports row locks, as check_lease_overlaps does
+    properties = {}
+    for chunk in _chunks(property_ids):
+        rows = Property.objects.select_for_update().filter(id__in=chunk).values_list(
+            'id', 'owner_id', 'property_manager_id', 'status'
+        )
+        for property_id, owner_id, manager_id, status in rows:
+            properties[property_id] = (owner_id, manager_id, status)
+    return properties
+
+
+def _resolve_tenants(tenant_ids):
+    tenants = set()
+    for chunk in _chunks(tenant_ids):
+        tenants.update(User.objects.filter(id__in=chunk, role=User.Role.TENANT).values_list('id', flat=True))
+    return tenants
+
+
+def _may_lease(user, owner_id, manager_id):
+    if user.is_admin():
+        return True
+    if user.is_landlord():
+        return owner_id == user.id
+    if user.is_property_manager():
+        return manager_id == user.id
+    return False
+
+
+def import_leases(rows, user, dry_run=False):
+    """
+    Validate and create the leases of ``rows``, ``(line, row)`` pairs as
+    given by ``read_rows``, on behalf of ``user``. Returns ``{'created',
+    'properties_rented'}``; with ``dry_run`` nothing is written and the
+    counts are what the import would do. Raises ``LeaseImportError`` with
+    the errors of every failing line (up to LEASE_IMPORT_MAX_ERRORS) if any
+    line fails.
+    """
+    errors = {}
+    parsed = []
+    for line, row in rows:
+        if len(parsed) + len(errors) >= settings.LEASE_IMPORT_MAX_ROWS:
+            raise LeaseImportError(f"Imports are limited to {settings.LEASE_IMPORT_MAX_ROWS} rows")
+        values, row_errors = parse_row(row)
+        if row_errors:
+            errors[line] = row_errors
+        else:
+            parsed.append((line, values))
+    if not parsed and not errors:
+        raise LeaseImportError("Upload holds no leases")
+
+    with transaction.atomic():
+        properties = _resolve_properties({values['property_id'] for _, values in parsed})
+        tenants = _resolve_tenants({values['tenant_id'] for _, values in parsed})
+
+        candidates = []
+        for line, values in parsed:
+            row_errors = []
+            property = properties.get(values['property_id'])
+            if property is None:
+                row_errors.append("Property not found")
+            elif not _may_lease(user, property[0], property[1]):
+                row_errors.append("Not authorized to create lease for this property")
+            if values['tenant_id'] not in tenants:
+                row_errors.append("Tenant not found")
+            if row_errors:
+                errors[line] = row_errors
+            elif values['is_active']:
+                candidates.append((line, values['property_id'], values['start_date'], values['end_date']))
+
+        for line, conflict in batch_conflicts(candidates).items():
+            if conflict['leases']:
+                errors.setdefault(line, []).append(
+                    f"Lease overlaps active lease(s) {', '.join(map(str, conflict['leases']))} of this property"
+                )
+            if conflict['rows']:
+                errors.setdefault(line, []).append(
+                    f"Lease overlaps line(s) {', '.join(map(str, sorted(conflict['rows'])))} of this import"
+                )
+
+        if errors:
+            raise LeaseImportError(
+                "Import rejected; no leases were created",
+                [{'line': line, 'errors': errors[line]} for line in sorted(errors)[:settings.LEASE_IMPORT_MAX_ERRORS]],
+                len(errors),
+            )
+
+        leases = [Lease(**values) for _, values in parsed]
+        leased = {lease.property_id for lease in leases}
+        rented = {
+            lease.property_id for lease in leases
+            if lease.is_active and properties[lease.property_id][2] != Property.Status.RENTED
+        }
+        result = {'created': len(leases), 'properties_rented': len(rented)}
+        if dry_run:
+            return result
+
+        Lease.objects.bulk_create(leases, batch_size=settings.LEASE_IMPORT_BATCH_SIZE)
+        now = timezone.now()
+        for chunk in _chunks(rented):
+            Property.objects.filter(id__in=chunk).update(status=Property.Status.RENTED, updated_at=now)
+        record_transitions(Property, [(*properties[property_id], Property.Status.RENTED) for property_id in rented])
+        for chunk in _chunks(leased):
+            occupancy.refresh(chunk)
+            rollups.rebuild(chunk)
+
+        tags = {'catalog', 'occupancy', 'all'}
+        for property_id in leased:
+            owner_id, manager_id, _ = properties[property_id]
+            tags.update({f'property:{property_id}', f'owner:{owner_id}'})
+            if manager_id is not None:
+                tags.add(f'manager:{manager_id}')
+        tags.update(f'tenant:{lease.tenant_id}' for lease in leases)
+        tenants_by_property = {}
+        for lease in leases:
+            tenants_by_property.setdefault(lease.property_id, set()).add(lease.tenant_id)
+
+        def invalidate():
+            for property_id, tenant_ids in tenants_by_property.items():
+                scope_cache.invalidate_property(property_id, *tenant_ids)
+            response_cache.invalidate_tags(tags)
+
+        transaction.on_commit(invalidate)
+    return result
@@ -0,0 +1,135 @@
+"""
+Overlap checks between active leases of the same property.
+
+A single lease (see ``lease_conflicts``) is checked with one query on the
+``lease_active_period_idx`` partial index, which holds only active leases in
+property and start date order.
+
+Batches (see ``batch_conflicts``) load the active leases of every property
+involved with one query per PROPERTY_IDS_PER_QUERY properties. Each
+property's leases are held sorted by start date together with the running
+maximum of their end dates, so the leases overlapping a candidate are found
+by binary search for the last lease starting on or before its end, walking
+back only while the running maximum still reaches its start: O(log n) plus
+the leases reported. The candidates of a property are checked against each
+other with one sweep in start order.
+
+Lease periods are inclusive; a lease may start the day after another ends.
+"""
+
+import bisect
+import heapq
+
+from django.core.exceptions import ValidationError
+
+from .models import Lease
+
+# Property ids per query when loading the active leases of a batch, within
+# the bound parameter limits of the databases
+PROPERTY_IDS_PER_QUERY = 10000
+
+_START = Lease._meta.get_field('start_date')
+_END = Lease._meta.get_field('end_date')
+
+
+class InvalidLeasePeriod(ValueError):
+    pass
+
+
+def lease_period(start_date, end_date):
+    """Validated ``(start, end)`` dates of a lease; values may be ISO strings."""
+    try:
+        start, end = _START.to_python(start_date), _END.to_python(end_date)
+    except ValidationError as e:
+        raise InvalidLeasePeriod(e.messages[0])
+    if start is None or end is None:
+        raise InvalidLeasePeriod("start_date and end_date are required")
+    if end < start:
+        raise InvalidLeasePeriod("end_date is before start_date")
+    return start, end
+
+
+class LeaseIntervals:
+    def __init__(self, leases=()):
+        """``leases``: ``(lease_id, start_date, end_date)`` triples."""
+        self._leases = sorted(leases, key=lambda lease: (lease[1], lease[2], lease[0]))
+        self._starts = [start for _, start, _ in self._leases]
+        self._reach = []
+        for _, _, end in self._leases:
+            self._reach.append(max(end, self._reach[-1]) if self._reach else end)
+
+    def __len__(self):
+        return len(self._leases)
+
+    def overlapping(self, start, end, exclude=None):
+        """Ids of the leases sharing a day with ``start``..``end``, by start date."""
+        i = bisect.bisect_right(self._starts, end)
+        found = []
+        while i > 0 and self._reach[i - 1] >= start:
+            i -= 1
+            lease_id, _, lease_end = self._leases[i]
+            if lease_end >= start and lease_id != exclude:
+                found.append(lease_id)
+        found.reverse()
+        return found
+
+
+def active_intervals(property_ids):
+    """``{property_id: LeaseIntervals}`` of the active leases of ``property_ids``."""
+    leases = {property_id: [] for property_id in property_ids}
+    ids = list(leases)
+    for offset in range(0, len(ids), PROPERTY_IDS_PER_QUERY):
+        rows = Lease.objects.filter(
+            property_id__in=ids[offset:offset + PROPERTY_IDS_PER_QUERY], is_active=True
+        ).values_list('property_id', 'id', 'start_date', 'end_date')
+        for property_id, lease_id, start, end in rows:
+            leases[property_id].append((lease_id, start, end))
+    return {property_id: LeaseIntervals(property_leases) for property_id, property_leases in leases.items()}
+
+
+def lease_conflicts(property_id, start, end, exclude=None):
+    """Ids of the active leases of a property overlapping ``start``..``end``, besides ``exclude``."""
+    leases = Lease.objects.filter(property_id=property_id, is_active=True, start_date__lte=end, end_date__gte=start)
+    if exclude is not None:
+        leases = leases.exclude(id=exclude)
+    return list(leases.order_by('start_date', 'end_date', 'id').values_list('id', flat=True))
+
+
+def batch_conflicts(candidates):
+    """
+    Conflicts of a batch of new active leases, ``(key, property_id, start,
+    end)`` tuples with orderable keys such as row numbers, with the stored
+    active leases and with each other.
+
+    Returns ``{key: {'leases': [lease ids], 'rows': [keys]}}`` for every
+    candidate with a conflict; a conflict between two candidates is
+    reported on both.
+    """
+    by_property = {}
+    for candidate in candidates:
+        by_property.setdefault(candidate[1], []).append(candidate)
+    existing = active_intervals(by_property)
+
+    conflicts = {}
+
+    def conflict(key):
+        return conflicts.setdefault(key, {'leases': [], 'rows': []})
+
+    for property_id, property_candidates in by_property.items():
+        intervals = existing[property_id]
+        if len(intervals):
+            for key, _, start, end in property_candidates:
+                lease_ids = intervals.overlapping(start, end)
+                if lease_ids:
+                    conflict(key)['leases'].extend(lease_ids)
+
+        # Sweep in start order, keeping the candidates still open by end date
+        open_candidates = []
+        for key, _, start, end in sorted(property_candidates, key=lambda candidate: (candidate[2], candidate[3])):
+            while open_candidates and open_candidates[0][0] < start:
+                heapq.heappop(open_candidates)
+            for _, other in open_candidates:
+                conflict(key)['rows'].append(other)
+                conflict(other)['rows'].append(key)
+            heapq.heappush(open_candidates, (end, key))
+    return conflicts
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from api.models import Lease, Property
+from payments.models import Invoice
+from rentalhub import db
+from rentalhub.benchmarking import InlineExecutor, api_client, auth_headers, summarize, timed
+from users.models import User
+
+PATHS = ("/properties/", "/leases/", "/invoices/", "/dashboard/landlord-summary/")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure request latency under concurrent clients with the ORM work "
+        "running on the event loop, as main.py did before the DB executor, "
+        "and on the bounded DB executor. The portfolio is created in the "
+        "configured database and deleted again afterwards; run it against a "
+        "scratch copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--clients", type=int, default=200,
+            help="Concurrent clients.",
+        )
+        parser.add_argument(
+            "--requests", type=int, default=10,
+            help="Requests sent in turn by each client, cycling through the list endpoints and the dashboard.",
+        )
+        parser.add_argument(
+            "--properties", type=int, default=2000,
+            help="Properties owned by the landlord whose portfolio is requested.",
+        )
+
+    def handle(self, *args, clients=200, requests=10, properties=2000, **options):
+        suffix = uuid.uuid4().hex[:8]
+        landlord = User.objects.create_user(f"bench-landlord-{suffix}", role=User.Role.LANDLORD)
+        tenant = User.objects.create_user(f"bench-tenant-{suffix}", role=User.Role.TENANT)
+        try:
+            self.stdout.write(f"Building a portfolio of {properties} properties...")
+            self.build_portfolio(landlord, tenant, properties)
+            for mode in ("event loop", "executor"):
+                timings, elapsed = self.measure(landlord, clients, requests, inline=mode == "event loop")
+                self.stdout.write(
+                    f"{mode:<10} {summarize(timings)}  {len(timings) / elapsed:8.1f} req/s"
+                )
+        finally:
+            self.stdout.write("Deleting the portfolio...")
+            with transaction.atomic():
+                for model, field in ((Invoice, "property__owner"), (Lease, "property__owner"), (Property, "owner")):
+                    # Raw deletes: the synthetic rows skip the per-row signal handlers
+                    model.objects.filter(**{field: landlord})._raw_delete(model.objects.db)
+                User.objects.filter(id__in=[landlord.id, tenant.id]).delete()
+
+    def build_portfolio(self, landlord, tenant, count):
+        today = timezone.now().date()
+        with transaction.atomic():
+            batch = Property.objects.bulk_create([
+                Property(
+                    name=f"Unit {n}", address=f"{n} Main St", city="Cape Town", state="WC", zip_code="8001",
+                    monthly_rent=1000, deposit_amount=500, status=Property.Status.RENTED, owner=landlord,
+                )
+                for n in range(count)
+            ], batch_size=1000)
+            leases = Lease.objects.bulk_create([
+                Lease(
+                    property=prop, tenant=tenant, start_date=today - timedelta(days=30),
+                    end_date=today + timedelta(days=335), rent_amount=1000, deposit_amount=500,
+                )
+                for prop in batch
+            ], batch_size=1000)
+            Invoice.objects.bulk_create([
+                Invoice(
+                    tenant=tenant, property_id=lease.property_id, lease=lease, amount=1000,
+                    description="Rent", due_date=today,
+                )
+                for lease in leases
+            ], batch_size=1000)
+
+    def measure(self, user, clients, requests, inline):
+        """Latency in ms of every request, and the wall time of the run in seconds."""
+        headers = auth_headers(user)
+
+        async def client_loop(client, offset):
+            timings = []
+            for n in range(requests):
+                path = PATHS[(offset + n) % len(PATHS)]
+                response, elapsed = await timed(lambda: client.get(path, headers=headers))
+                response.raise_for_status()
+                timings.append(elapsed)
+            return timings
+
+        async def send():
+            async with api_client() as client:
+                # Warm the user and scope caches, as on a live worker
+                for path in PATHS:
+                    (await client.get(path, headers=headers)).raise_for_status()
+                results, elapsed = await timed(
+                    lambda: asyncio.gather(*(client_loop(client, offset) for offset in range(clients)))
+                )
+                return [timing for timings in results for timing in timings], elapsed / 1000
+
+        # Every request must reach the handler
+        with override_settings(RESPONSE_CACHE_ENABLED=False, RESPONSE_COALESCING_ENABLED=False):
+            if not inline:
+                return asyncio.run(send())
+            # Django refuses ORM calls from a thread running an event loop
+            with mock.patch.object(db, "db_executor", InlineExecutor()), \
+                    mock.patch.dict(os.environ, {"DJANGO_ALLOW_ASYNC_UNSAFE": "true"}):
+                return asyncio.run(send())
@@ -0,0 +1,120 @@
+import random
+import statistics
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from api import geo
+from api.models import Property
+from users.models import User
+
+METROS = 40
+
+
+class Command(BaseCommand):
+    help = (
+        "Time radius and bounding box property queries, pruned by geohash "
+        "cells, against the same areas checked on every row. The properties "
+        "are clustered around synthetic metro areas plus uniform noise; they "
+        "are created in the configured database and deleted again afterwards. "
+        "Run it against a scratch copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--properties", type=int, default=1_000_000,
+            help="Synthetic properties with coordinates.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20,
+            help="Timed runs per query; the median is reported.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=10000,
+            help="Rows inserted per batch.",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=1,
+            help="Seed for the synthetic coordinates.",
+        )
+
+    def handle(self, *args, properties=1_000_000, repeat=20, batch_size=10000, seed=1, **options):
+        rng = random.Random(seed)
+        metros = [(rng.uniform(-40, 55), rng.uniform(-120, 150)) for _ in range(METROS)]
+        owner = User.objects.create_user(f"bench-landlord-{uuid.uuid4().hex[:8]}", role=User.Role.LANDLORD)
+        try:
+            self.stdout.write(f"Creating {properties} properties...")
+            started = time.perf_counter()
+            self.build_properties(owner, rng, metros, properties, batch_size)
+            self.stdout.write(f"Created them in {time.perf_counter() - started:.0f} s")
+
+            lat, lng = metros[0]
+            box_lat, box_lng = metros[1]
+            cases = [
+                (
+                    f"radius {radius} km", geo.radius_filter(lat, lng, radius),
+                    Q(id__in=Property.objects.alias(distance=geo.distance_km(lat, lng))
+                      .filter(distance__lte=radius).values("id")),
+                )
+                for radius in (1, 5, 20)
+            ]
+            cases.append((
+                "radius 50 km, sparse area", geo.radius_filter(10.0, 20.0, 50),
+                Q(id__in=Property.objects.alias(distance=geo.distance_km(10.0, 20.0))
+                  .filter(distance__lte=50).values("id")),
+            ))
+            cases.append((
+                "bbox 0.2 degrees", geo.bbox_filter(f"{box_lng - 0.1},{box_lat - 0.1},{box_lng + 0.1},{box_lat + 0.1}"),
+                Q(latitude__range=(box_lat - 0.1, box_lat + 0.1), longitude__range=(box_lng - 0.1, box_lng + 0.1)),
+            ))
+            for label, pruned, unpruned in cases:
+                page_ms = self.measure(lambda: self.first_page(pruned), repeat)
+                count_ms = self.measure(lambda: Property.objects.filter(pruned).count(), repeat)
+                scan_ms = self.measure(lambda: Property.objects.filter(unpruned).count(), max(repeat // 10, 1))
+                matches = Property.objects.filter(pruned).count()
+                checked = "" if matches == Property.objects.filter(unpruned).count() else "  MISMATCH"
+                self.stdout.write(
+                    f"{label:<26} page {page_ms:8.2f} ms  count {count_ms:8.2f} ms  "
+                    f"unpruned count {scan_ms:9.2f} ms  {matches:7d} matches{checked}"
+                )
+        finally:
+            self.stdout.write("Deleting the properties...")
+            with transaction.atomic():
+                # Raw delete: the synthetic rows skip the per-row signal handlers
+                Property.objects.filter(owner=owner)._raw_delete(Property.objects.db)
+                owner.delete()
+
+    def build_properties(self, owner, rng, metros, count, batch_size):
+        # bulk_create skips Property.save(), so the geohash is set here
+        for offset in range(0, count, batch_size):
+            batch = []
+            for n in range(offset, min(offset + batch_size, count)):
+                if n % 10:
+                    latitude, longitude = rng.choice(metros)
+                    latitude += rng.gauss(0, 0.3)
+                    longitude += rng.gauss(0, 0.3)
+                else:
+                    latitude, longitude = rng.uniform(-60, 70), rng.uniform(-180, 180)
+                batch.append(Property(
+                    name=f"Unit {n}", address=f"{n} Main St", city="Cape Town", state="WC", zip_code="8001",
+                    monthly_rent=1000, deposit_amount=500, owner=owner,
+                    latitude=latitude, longitude=longitude, geohash=geo.encode(latitude, longitude),
+                ))
+            with transaction.atomic():
+                Property.objects.bulk_create(batch)
+
+    def first_page(self, area):
+        # The shape of a /properties/ page: newest first, one row past the page
+        return list(Property.objects.filter(area).order_by("-created_at", "-id").values_list("id", flat=True)[:21])
+
+    def measure(self, query, repeat):
+        """Median ms of ``repeat`` runs of ``query``."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,98 @@
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from api.models import Property
+from api.search import PropertySearchIndex
+
+CITIES = 500
+OWNERS = 5000
+MANAGERS = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Time property searches, with and without facet counts, and "
+        "incremental updates on a PropertySearchIndex built from synthetic "
+        "rows. Nothing is read from or written to the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--properties", type=int, default=1_000_000,
+            help="Synthetic properties in the index.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20,
+            help="Timed runs per search; the median is reported.",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=1,
+            help="Seed for the synthetic rows.",
+        )
+
+    def handle(self, *args, properties=1_000_000, repeat=20, seed=1, **options):
+        rng = random.Random(seed)
+        index = PropertySearchIndex()
+        started = time.perf_counter()
+        index.build(self.rows(rng, properties))
+        self.stdout.write(f"Built the index of {properties} properties in {time.perf_counter() - started:.1f} s")
+
+        everything = index.all_properties()
+        cases = (
+            ("status", everything, {"status": Property.Status.AVAILABLE}, False),
+            (
+                "status, category, min_bedrooms", everything,
+                {"status": Property.Status.AVAILABLE, "category": Property.Category.RESIDENTIAL, "min_bedrooms": 3},
+                False,
+            ),
+            ("city", everything, {"city": "City 42"}, False),
+            ("max_rent inside a band", everything, {"max_rent": Decimal("1234.50")}, False),
+            (
+                "status, state, rent range", everything,
+                {"status": Property.Status.AVAILABLE, "state": "gp", "min_rent": 5000, "max_rent": 8000},
+                False,
+            ),
+            ("owner, status", index.restriction(owner_id=42), {"status": Property.Status.RENTED}, False),
+            ("status + facets", everything, {"status": Property.Status.AVAILABLE}, True),
+            ("owner + facets", index.restriction(owner_id=42), {}, True),
+        )
+        for label, restriction, filters, facets in cases:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                result = index.search(restriction, filters, limit=20, facets=facets, facet_limit=20)
+                timings.append((time.perf_counter() - started) * 1_000_000)
+            self.stdout.write(f"{label:<32} median {statistics.median(timings):10.0f} us  {result.total:8d} matches")
+
+        rows = list(self.rows(rng, 1000))
+        started = time.perf_counter()
+        for row in rows:
+            index.update(row)
+        elapsed = (time.perf_counter() - started) * 1_000_000 / len(rows)
+        self.stdout.write(self.style.SUCCESS(f"{'incremental update':<32} mean   {elapsed:10.0f} us"))
+
+    def rows(self, rng, count):
+        """Synthetic values() rows in listing order, with ids 1 to ``count``."""
+        base = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+        statuses = [Property.Status.AVAILABLE, Property.Status.RENTED, Property.Status.RENTED, Property.Status.MAINTENANCE]
+        for n in range(1, count + 1):
+            created_at = base + timedelta(seconds=n)
+            yield {
+                "id": n,
+                "created_at": created_at,
+                "updated_at": created_at,
+                "status": rng.choice(statuses),
+                "category": rng.choice(Property.Category.values),
+                "city": f"City {rng.randrange(CITIES)}",
+                "state": rng.choice(["WC", "GP", "KZN", "EC"]),
+                "bedrooms": rng.randint(0, 6),
+                "bathrooms": rng.randint(1, 4),
+                "monthly_rent": Decimal(rng.randint(300, 30000)),
+                "owner_id": rng.randint(1, OWNERS),
+                "property_manager_id": rng.randint(1, MANAGERS) if rng.random() < 0.5 else None,
+            }
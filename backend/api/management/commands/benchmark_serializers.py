@@ -0,0 +1,176 @@
+import statistics
+import time
+import uuid
+from datetime import timedelta
+from typing import List
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from api.models import Lease, Property
+from notifications.models import MaintenanceRequest
+from payments.models import Invoice, Payment
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows per second of the list serializers: loading model "
+        "instances and building one Pydantic response per row, encoded as "
+        "FastAPI does for a response_model, against the .values() row "
+        "converters encoded with orjson. The rows are created in the "
+        "configured database and deleted again afterwards; run it against a "
+        "scratch copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows", type=int, default=1000,
+            help="Rows of each resource, serialized as one page.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20,
+            help="Timed runs per converter; the median is reported.",
+        )
+
+    def handle(self, *args, rows=1000, repeat=20, **options):
+        suffix = uuid.uuid4().hex[:8]
+        landlord = User.objects.create_user(f"bench-landlord-{suffix}", role=User.Role.LANDLORD)
+        tenant = User.objects.create_user(
+            f"bench-tenant-{suffix}", role=User.Role.TENANT, first_name="Thandi", last_name="Moyo"
+        )
+        try:
+            self.stdout.write(f"Creating {rows} rows per resource...")
+            self.build_rows(landlord, tenant, rows)
+            for name, (model_path, values_path) in self.converters(landlord).items():
+                model_rate, model_body = self.measure(model_path, rows, repeat)
+                values_rate, values_body = self.measure(values_path, rows, repeat)
+                same = "same bytes" if model_body == values_body else "BODIES DIFFER"
+                self.stdout.write(
+                    f"{name:<12} models {model_rate:10.0f} rows/s  values {values_rate:10.0f} rows/s  "
+                    f"x{values_rate / model_rate:5.1f}  {same}"
+                )
+        finally:
+            self.stdout.write("Deleting the rows...")
+            with transaction.atomic():
+                for model, field in (
+                    (Payment, "invoice__property__owner"),
+                    (Invoice, "property__owner"),
+                    (MaintenanceRequest, "property__owner"),
+                    (Lease, "property__owner"),
+                    (Property, "owner"),
+                ):
+                    # Raw deletes: the synthetic rows skip the per-row signal handlers
+                    model.objects.filter(**{field: landlord})._raw_delete(model.objects.db)
+                User.objects.filter(id__in=[landlord.id, tenant.id]).delete()
+
+    def build_rows(self, landlord, tenant, count):
+        now = timezone.now()
+        today = now.date()
+        with transaction.atomic():
+            properties = Property.objects.bulk_create([
+                Property(
+                    name=f"Unit {n}", address=f"{n} Main St", city="Cape Town", state="WC", zip_code="8001",
+                    monthly_rent=1000, deposit_amount=500, description="Two bedroom flat",
+                    amenities="parking, pool", owner=landlord,
+                )
+                for n in range(count)
+            ], batch_size=1000)
+            leases = Lease.objects.bulk_create([
+                Lease(
+                    property=prop, tenant=tenant, start_date=today - timedelta(days=30),
+                    end_date=today + timedelta(days=335), rent_amount=1000, deposit_amount=500,
+                )
+                for prop in properties
+            ], batch_size=1000)
+            MaintenanceRequest.objects.bulk_create([
+                MaintenanceRequest(
+                    property=prop, tenant=tenant, title="Leak", description="Kitchen tap",
+                    assigned_to=landlord if n % 2 else None, estimated_cost=120,
+                )
+                for n, prop in enumerate(properties)
+            ], batch_size=1000)
+            invoices = Invoice.objects.bulk_create([
+                Invoice(
+                    tenant=tenant, property_id=lease.property_id, lease=lease, amount=1000,
+                    description="Rent", due_date=today,
+                )
+                for lease in leases
+            ], batch_size=1000)
+            Payment.objects.bulk_create([
+                Payment(
+                    invoice=invoice, amount=1000, payment_date=now,
+                    payment_method=Payment.Method.BANK_TRANSFER, transaction_id=f"tx-{invoice.id}",
+                )
+                for invoice in invoices
+            ], batch_size=1000)
+
+    def converters(self, landlord):
+        """Per resource, the model path and the .values() path, each returning the response body."""
+        import main
+
+        def model_path(queryset, plan, to_response, response_model):
+            adapter = TypeAdapter(List[response_model])
+
+            def serialize():
+                items = [to_response(obj) for obj in plan.apply(queryset)]
+                # FastAPI validates the return value against the response_model,
+                # dumps it in JSON mode and renders it with json.dumps
+                content = adapter.dump_python(adapter.validate_python(items), mode="json")
+                return JSONResponse(content).body
+            return serialize
+
+        def values_path(queryset, fields, row_to_dict):
+            def serialize():
+                return main.dumps([row_to_dict(row) for row in queryset.values(*fields)])
+            return serialize
+
+        properties = Property.objects.filter(owner=landlord).order_by("id")
+        leases = Lease.objects.filter(property__owner=landlord).order_by("id")
+        requests = MaintenanceRequest.objects.filter(property__owner=landlord).order_by("id")
+        invoices = Invoice.objects.filter(property__owner=landlord).order_by("id")
+        payments = Payment.objects.filter(invoice__property__owner=landlord).order_by("id")
+
+        def property_rows():
+            rows = list(properties.values(*main.PROPERTY_ROW_FIELDS))
+            images = main.property_images_by_property([row["id"] for row in rows])
+            return main.dumps([main.property_row_to_dict(row, images.get(row["id"], [])) for row in rows])
+
+        return {
+            "properties": (
+                model_path(properties, main.PROPERTY_RESPONSE_PLAN, main.property_to_response, main.PropertyResponse),
+                property_rows,
+            ),
+            "leases": (
+                model_path(leases, main.LEASE_RESPONSE_PLAN, main.lease_to_response, main.LeaseResponse),
+                values_path(leases, main.LEASE_ROW_FIELDS, main.lease_row_to_dict),
+            ),
+            "maintenance": (
+                model_path(
+                    requests, main.MAINTENANCE_RESPONSE_PLAN, main.maintenance_to_response,
+                    main.MaintenanceRequestResponse,
+                ),
+                values_path(requests, main.MAINTENANCE_ROW_FIELDS, main.maintenance_row_to_dict),
+            ),
+            "invoices": (
+                model_path(invoices, main.INVOICE_RESPONSE_PLAN, main.invoice_to_response, main.InvoiceResponse),
+                values_path(invoices, main.INVOICE_ROW_FIELDS, main.invoice_row_to_dict),
+            ),
+            "payments": (
+                model_path(payments, main.PAYMENT_RESPONSE_PLAN, main.payment_to_response, main.PaymentResponse),
+                values_path(payments, main.PAYMENT_ROW_FIELDS, main.payment_row_to_dict),
+            ),
+        }
+
+    def measure(self, serialize, rows, repeat):
+        """Median rows per second of ``serialize``, and the body it returned."""
+        body = serialize()
+        rates = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            serialize()
+            rates.append(rows / (time.perf_counter() - started))
+        return statistics.median(rates), body
@@ -0,0 +1,124 @@
+import csv
+import io
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.geo import encode, geocode, normalize_postal_code
+from api.models import PostcodeCentroid, Property
+from rentalhub.response_cache import response_cache
+
+# Columns of a GeoNames postal code dump (https://download.geonames.org/export/zip/)
+COUNTRY_COLUMN, POSTAL_CODE_COLUMN, LATITUDE_COLUMN, LONGITUDE_COLUMN = 0, 1, 9, 10
+
+
+class Command(BaseCommand):
+    help = (
+        "Load postal code centroids from a local GeoNames postal code dump "
+        "(tab-separated text, or the zip it is distributed in) and geocode "
+        "the properties that have no coordinates yet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="GeoNames postal code file, e.g. US.zip or allCountries.txt.")
+        parser.add_argument(
+            "--country", action="append", dest="countries",
+            help="Only load this ISO country code (repeatable).",
+        )
+        parser.add_argument(
+            "--skip-geocoding", action="store_true",
+            help="Only load the centroids.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=5000,
+            help="Rows written per query.",
+        )
+
+    def handle(self, path, countries=None, skip_geocoding=False, batch_size=5000, **options):
+        countries = {country.upper() for country in countries} if countries else None
+        loaded = 0
+        batch = []
+        for row in self.read_rows(path):
+            if len(row) <= LONGITUDE_COLUMN or (countries and row[COUNTRY_COLUMN] not in countries):
+                continue
+            try:
+                latitude, longitude = float(row[LATITUDE_COLUMN]), float(row[LONGITUDE_COLUMN])
+            except ValueError:
+                continue
+            batch.append(PostcodeCentroid(
+                country_code=row[COUNTRY_COLUMN].upper(),
+                postal_code=normalize_postal_code(row[POSTAL_CODE_COLUMN]),
+                latitude=latitude,
+                longitude=longitude,
+            ))
+            if len(batch) >= batch_size:
+                loaded += self.save_centroids(batch)
+                batch = []
+        loaded += self.save_centroids(batch)
+        self.stdout.write(f"Loaded {loaded} postal code centroids")
+
+        if not skip_geocoding:
+            located = self.geocode_properties(batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Geocoded {located} properties"))
+
+    def read_rows(self, path):
+        try:
+            if zipfile.is_zipfile(path):
+                with zipfile.ZipFile(path) as archive:
+                    names = [name for name in archive.namelist() if name.endswith(".txt") and "readme" not in name.lower()]
+                    for name in names:
+                        with archive.open(name) as member:
+                            yield from csv.reader(io.TextIOWrapper(member, encoding="utf-8"), delimiter="\t", quoting=csv.QUOTE_NONE)
+            else:
+                with open(path, encoding="utf-8", newline="") as f:
+                    yield from csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+    def save_centroids(self, centroids):
+        # Later rows of a dump repeat a code for other places; the first wins
+        unique = {}
+        for centroid in centroids:
+            unique.setdefault((centroid.country_code, centroid.postal_code), centroid)
+        PostcodeCentroid.objects.bulk_create(
+            unique.values(), update_conflicts=True,
+            unique_fields=["country_code", "postal_code"], update_fields=["latitude", "longitude"],
+        )
+        return len(unique)
+
+    def geocode_properties(self, batch_size):
+        located = 0
+        last_id = 0
+        # Many properties share a postal code; look each one up once
+        points = {}
+        while True:
+            properties = list(
+                Property.objects.filter(latitude__isnull=True, id__gt=last_id)
+                .order_by("id").only("id", "country", "zip_code", "owner_id", "property_manager_id")[:batch_size]
+            )
+            if not properties:
+                return located
+            last_id = properties[-1].id
+            changed = []
+            for prop in properties:
+                key = (prop.country, prop.zip_code)
+                if key not in points:
+                    points[key] = geocode(*key)
+                point = points[key]
+                if point:
+                    prop.latitude, prop.longitude = point
+                    prop.geohash = encode(*point)
+                    changed.append(prop)
+            with transaction.atomic():
+                Property.objects.bulk_update(changed, ["latitude", "longitude", "geohash"])
+            # bulk_update sends no signals; coordinates are part of property responses
+            tags = {"catalog", "all"}
+            for prop in changed:
+                tags.add(f"property:{prop.id}")
+                tags.add(f"owner:{prop.owner_id}")
+                if prop.property_manager_id:
+                    tags.add(f"manager:{prop.property_manager_id}")
+            if changed:
+                response_cache.invalidate_tags(tags)
+            located += len(changed)
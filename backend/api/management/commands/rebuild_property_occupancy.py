@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Property
+from api.occupancy import rebuild
+
+
+def _runs(runs):
+    return ", ".join(f"{start}..{end}" for start, end in runs) or "none"
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the PropertyOccupancy runs from the active leases and "
+        "report properties whose stored runs drifted from them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Only report drift; exit with an error if any property drifted.",
+        )
+        parser.add_argument(
+            "--property", type=int, action="append", dest="property_ids",
+            help="Limit the rebuild to this property id (repeatable).",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=500,
+            help="Properties recomputed per batch.",
+        )
+
+    def handle(self, *args, check=False, property_ids=None, batch_size=500, **options):
+        if property_ids is None:
+            property_ids = list(Property.objects.order_by("id").values_list("id", flat=True))
+
+        drifted = 0
+        for offset in range(0, len(property_ids), batch_size):
+            drift = rebuild(property_ids[offset:offset + batch_size], fix=not check)
+            for property_id, (stored, actual) in sorted(drift.items()):
+                drifted += 1
+                self.stdout.write(f"Property {property_id}: {_runs(stored)} -> {_runs(actual)}")
+
+        summary = f"{drifted} of {len(property_ids)} properties drifted"
+        if check and drifted:
+            raise CommandError(summary)
+        if not check and drifted:
+            summary += " and were rebuilt"
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from api import fulltext
+
+
+def install(apps, schema_editor):
+    fulltext.install(schema_editor)
+
+
+def uninstall(apps, schema_editor):
+    fulltext.uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_property_search_sync_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
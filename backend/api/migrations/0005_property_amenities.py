@@ -0,0 +1,98 @@
+# Generated by Django 5.1.15 on 2026-10-17 01:16
+
+import django.core.validators
+from django.db import migrations, models
+
+from api import fulltext
+from api.amenities import AmenityVocabulary
+
+# (bit, code, name, aliases) of the initial vocabulary
+AMENITIES = [
+    (0, "parking", "Parking", "garage, carport, off-street parking, covered parking"),
+    (1, "pool", "Swimming pool", "swimming pool"),
+    (2, "wifi", "Wi-Fi", "wi-fi, wireless internet, internet, fibre, fiber, broadband"),
+    (3, "gym", "Gym", "fitness centre, fitness center"),
+    (4, "garden", "Garden", "yard, backyard"),
+    (5, "air_conditioning", "Air conditioning", "aircon, a/c"),
+    (6, "heating", "Heating", "central heating, underfloor heating"),
+    (7, "laundry", "Laundry", "washing machine, washer, dryer"),
+    (8, "dishwasher", "Dishwasher", ""),
+    (9, "furnished", "Furnished", "fully furnished"),
+    (10, "pets_allowed", "Pets allowed", "pet friendly, pets welcome"),
+    (11, "balcony", "Balcony", "patio, terrace"),
+    (12, "elevator", "Elevator", "lift"),
+    (13, "security", "Security", "24-hour security, alarm, cctv, gated"),
+    (14, "storage", "Storage", "storeroom"),
+    (15, "fireplace", "Fireplace", ""),
+    (16, "backup_power", "Backup power", "generator, inverter, solar"),
+]
+
+
+def seed_amenities(apps, schema_editor):
+    Amenity = apps.get_model("api", "Amenity")
+    Property = apps.get_model("api", "Property")
+    Amenity.objects.bulk_create(
+        Amenity(bit=bit, code=code, name=name, aliases=aliases)
+        for bit, code, name, aliases in AMENITIES
+    )
+    vocabulary = AmenityVocabulary((code, name, bit, aliases) for bit, code, name, aliases in AMENITIES)
+    properties = Property.objects.exclude(amenities="").only("id", "amenities")
+    changed = []
+    for prop in properties.iterator(chunk_size=2000):
+        prop.amenity_flags = vocabulary.parse(prop.amenities)
+        if prop.amenity_flags:
+            changed.append(prop)
+    Property.objects.bulk_update(changed, ["amenity_flags"], batch_size=2000)
+
+
+def install_fulltext(apps, schema_editor):
+    # Adding or removing amenity_flags remakes api_property, dropping its
+    # FTS triggers
+    fulltext.install(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_property_fulltext"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Amenity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("code", models.SlugField(unique=True)),
+                ("name", models.CharField(max_length=100)),
+                (
+                    "bit",
+                    models.PositiveSmallIntegerField(
+                        unique=True,
+                        validators=[django.core.validators.MaxValueValidator(62)],
+                    ),
+                ),
+                ("aliases", models.TextField(blank=True)),
+            ],
+            options={
+                "verbose_name_plural": "amenities",
+                "ordering": ["bit"],
+            },
+        ),
+        # Removing the column remakes api_property as well
+        migrations.RunPython(migrations.RunPython.noop, install_fulltext),
+        migrations.AddField(
+            model_name="property",
+            name="amenity_flags",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(install_fulltext, migrations.RunPython.noop),
+        migrations.RunPython(seed_amenities, migrations.RunPython.noop),
+    ]
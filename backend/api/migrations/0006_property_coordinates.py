@@ -0,0 +1,60 @@
+# Generated by Django 5.1.15 on 2026-10-17 01:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_property_amenities"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PostcodeCentroid",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("country_code", models.CharField(max_length=2)),
+                ("postal_code", models.CharField(max_length=20)),
+                ("latitude", models.FloatField()),
+                ("longitude", models.FloatField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="geohash",
+            field=models.CharField(
+                blank=True, editable=False, max_length=12, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="latitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="longitude",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="property",
+            index=models.Index(fields=["geohash"], name="property_geohash_idx"),
+        ),
+        migrations.AddConstraint(
+            model_name="postcodecentroid",
+            constraint=models.UniqueConstraint(
+                fields=("country_code", "postal_code"), name="postcode_centroid_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.1.15 on 2026-10-17 01:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from api.occupancy import merge
+
+
+def build_occupancy(apps, schema_editor):
+    Lease = apps.get_model("api", "Lease")
+    PropertyOccupancy = apps.get_model("api", "PropertyOccupancy")
+    periods = {}
+    leases = Lease.objects.filter(is_active=True).values_list("property_id", "start_date", "end_date")
+    for property_id, start, end in leases.iterator(chunk_size=2000):
+        periods.setdefault(property_id, []).append((start, end))
+    PropertyOccupancy.objects.bulk_create(
+        (
+            PropertyOccupancy(property_id=property_id, start_date=start, end_date=end)
+            for property_id, property_periods in periods.items()
+            for start, end in merge(property_periods)
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_property_coordinates"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PropertyOccupancy",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField()),
+                (
+                    "property",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="occupancy",
+                        to="api.property",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["property", "start_date"],
+                        name="occupancy_property_start_idx",
+                    ),
+                    models.Index(
+                        fields=["end_date", "start_date"],
+                        name="occupancy_end_start_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(build_occupancy, migrations.RunPython.noop),
+    ]
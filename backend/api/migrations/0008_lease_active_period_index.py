@@ -0,0 +1,21 @@
+# Generated by Django 5.1.15 on 2026-10-17 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_property_occupancy"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="lease",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["property", "start_date", "end_date"],
+                name="lease_active_period_idx",
+            ),
+        ),
+    ]
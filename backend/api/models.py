@@ -1,8 +1,11 @@
 from django.db import models
 from django.conf import settings
-from django.core.validators import MinValueValidator
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.utils.translation import gettext_lazy as _
 
+from .amenities import MAX_AMENITIES, amenity_vocabulary
+from .geo import encode, geocode
+
 
 class Property(models.Model):
     """Model for property listings"""
@@ -31,6 +34,12 @@ class Property(models.Model):
     deposit_amount = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
     description = models.TextField(blank=True)
     amenities = models.TextField(blank=True)
+    # Bit per Amenity mentioned in amenities, kept in step by save()
+    amenity_flags = models.BigIntegerField(default=0, editable=False)
+    # Geocoded from the postal code by save() unless given (see api.geo)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True, editable=False)
     
     # Foreign keys
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='owned_properties')
@@ -46,8 +55,115 @@ class Property(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            # Keyset pagination order for the property list
+            models.Index(fields=['-created_at', '-id'], name='property_created_id_idx'),
+            # Incremental sync of the property search index
+            models.Index(fields=['updated_at'], name='property_updated_idx'),
+            # Cell ranges of radius and bounding box queries
+            models.Index(fields=['geohash'], name='property_geohash_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.name} ({self.address})"
+    
+    # Fields whose changes save() derives amenity_flags and the location from
+    AMENITY_FIELDS = ('amenities',)
+    LOCATION_FIELDS = ('country', 'zip_code', 'latitude', 'longitude')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_derived_sources()
+        return instance
+    
+    def _remember_derived_sources(self):
+        self._derived_sources = {
+            field: self.__dict__.get(field) for field in (*self.AMENITY_FIELDS, *self.LOCATION_FIELDS)
+        }
+    
+    def _changed(self, fields, update_fields):
+        # Status-only saves from the lease, import and billing flows skip the
+        # amenity parse and the geocode query; the geohash is cheap to encode
+        # and always follows the coordinates
+        if update_fields is not None:
+            return bool(set(fields) & update_fields)
+        loaded = getattr(self, '_derived_sources', None)
+        if self._state.adding or loaded is None:
+            return True
+        return any(self.__dict__.get(field) != loaded[field] for field in fields)
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+        if self._changed(self.AMENITY_FIELDS, update_fields):
+            self.amenity_flags = amenity_vocabulary.parse(self.amenities)
+        if (self.latitude is None or self.longitude is None) and self._changed(self.LOCATION_FIELDS, update_fields):
+            self.latitude, self.longitude = geocode(self.country, self.zip_code) or (None, None)
+        located = self.latitude is not None and self.longitude is not None
+        self.geohash = encode(self.latitude, self.longitude) if located else None
+        if update_fields is not None:
+            if 'amenities' in update_fields:
+                update_fields.add('amenity_flags')
+            if update_fields & set(self.LOCATION_FIELDS):
+                update_fields |= {'latitude', 'longitude', 'geohash'}
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+        self._remember_derived_sources()
+
+
+class Amenity(models.Model):
+    """Controlled vocabulary of property amenities (see api.amenities)"""
+    code = models.SlugField(max_length=50, unique=True)
+    name = models.CharField(max_length=100)
+    # Position in Property.amenity_flags; never reuse the bit of a removed amenity
+    bit = models.PositiveSmallIntegerField(unique=True, validators=[MaxValueValidator(MAX_AMENITIES - 1)])
+    # Comma-separated phrases naming the amenity in free text
+    aliases = models.TextField(blank=True)
+    
+    class Meta:
+        ordering = ['bit']
+        verbose_name_plural = 'amenities'
+    
+    def __str__(self):
+        return self.name
+
+
+class PostcodeCentroid(models.Model):
+    """Centroid of a postal code, for offline geocoding (see api.geo)"""
+    country_code = models.CharField(max_length=2)
+    # Upper case with single spaces, see api.geo.normalize_postal_code
+    postal_code = models.CharField(max_length=20)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['country_code', 'postal_code'], name='postcode_centroid_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.country_code} {self.postal_code}"
+
+
+class PropertyOccupancy(models.Model):
+    """A run of days a property is let under active leases (see api.occupancy)"""
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='occupancy')
+    # Inclusive bounds
+    start_date = models.DateField()
+    end_date = models.DateField()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'start_date'], name='occupancy_property_start_idx'),
+            # Runs overlapping a period: end_date >= its start, start_date <= its end
+            models.Index(fields=['end_date', 'start_date'], name='occupancy_end_start_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.property_id} let {self.start_date} to {self.end_date}"
 
 
 class PropertyImage(models.Model):
@@ -90,5 +206,15 @@ class Lease(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='lease_created_id_idx'),
+            # Overlap checks of a new or changed active lease (see api.lease_overlaps)
+            models.Index(
+                fields=['property', 'start_date', 'end_date'], condition=models.Q(is_active=True),
+                name='lease_active_period_idx',
+            ),
+        ]
+    
     def __str__(self):
         return f"Lease for {self.property.name} - {self.tenant.username}"
\ No newline at end of file
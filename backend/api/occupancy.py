@@ -0,0 +1,111 @@
+"""
+Per-property occupancy index for date-range availability.
+
+Each property's active leases are merged into sorted, disjoint runs of
+occupied days, stored as ``PropertyOccupancy`` rows with inclusive bounds;
+leases that overlap or follow each other without a free day form one run.
+A property is available for a period when none of its runs overlaps it, so
+availability queries read this table alone, never the leases.
+
+Lease saves and deletes refresh the runs of the properties involved (see
+``api.signals``) in the same transaction. Writes that bypass signals, such
+as bulk updates, must call ``refresh``; the ``rebuild_property_occupancy``
+command repairs any drift.
+"""
+
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Lease, PropertyOccupancy
+
+ONE_DAY = timedelta(days=1)
+
+
+class InvalidPeriod(ValueError):
+    pass
+
+
+def merge(periods):
+    """Sorted disjoint ``(start, end)`` runs covering inclusive ``periods``."""
+    runs = []
+    for start, end in sorted(periods):
+        if end < start:
+            continue
+        if runs and start <= runs[-1][1] + ONE_DAY:
+            if end > runs[-1][1]:
+                runs[-1] = (runs[-1][0], end)
+        else:
+            runs.append((start, end))
+    return runs
+
+
+def compute_occupancy(property_ids):
+    """``{property_id: runs}`` of ``property_ids`` from their active leases."""
+    periods = {property_id: [] for property_id in property_ids}
+    leases = Lease.objects.filter(property_id__in=list(periods), is_active=True).values_list(
+        'property_id', 'start_date', 'end_date'
+    )
+    for property_id, start, end in leases:
+        periods[property_id].append((start, end))
+    return {property_id: merge(property_periods) for property_id, property_periods in periods.items()}
+
+
+def load_occupancy(property_ids):
+    """Stored ``{property_id: runs}`` of ``property_ids``."""
+    runs = {property_id: [] for property_id in property_ids}
+    rows = PropertyOccupancy.objects.filter(property_id__in=list(runs)).order_by('property_id', 'start_date')
+    for property_id, start, end in rows.values_list('property_id', 'start_date', 'end_date'):
+        runs[property_id].append((start, end))
+    return runs
+
+
+def refresh(property_ids):
+    """Replace the stored runs of ``property_ids`` with ones computed from their leases."""
+    property_ids = {property_id for property_id in property_ids if property_id is not None}
+    if not property_ids:
+        return
+    occupancy = compute_occupancy(property_ids)
+    with transaction.atomic():
+        PropertyOccupancy.objects.filter(property_id__in=property_ids).delete()
+        PropertyOccupancy.objects.bulk_create(
+            PropertyOccupancy(property_id=property_id, start_date=start, end_date=end)
+            for property_id, runs in occupancy.items() for start, end in runs
+        )
+
+
+def rebuild(property_ids, fix=True):
+    """
+    Recompute the runs of ``property_ids`` from their leases and return
+    ``{property_id: (stored, actual)}`` for every property whose stored runs
+    had drifted. With ``fix`` the stored runs are replaced.
+    """
+    actual = compute_occupancy(property_ids)
+    stored = load_occupancy(property_ids)
+    drift = {
+        property_id: (stored[property_id], runs)
+        for property_id, runs in actual.items() if stored[property_id] != runs
+    }
+    if fix and drift:
+        refresh(drift)
+    return drift
+
+
+def period(available_from=None, available_to=None):
+    """
+    The inclusive period of an availability query: from ``available_from``,
+    or today, up to ``available_to``, or indefinitely.
+    """
+    start = available_from or timezone.now().date()
+    end = available_to or date.max
+    if end < start:
+        raise InvalidPeriod("available_to is before available_from")
+    return start, end
+
+
+def available_filter(start, end):
+    """A Q for properties with no occupied day between ``start`` and ``end`` inclusive."""
+    occupied = PropertyOccupancy.objects.filter(start_date__lte=end, end_date__gte=start)
+    return ~Q(id__in=occupied.values('property_id'))
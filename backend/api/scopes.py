@@ -0,0 +1,201 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Property, Lease
+
+
+class PropertyScope:
+    """
+    The set of property ids a user can act on through their role:
+    owned properties for landlords, managed properties for property managers
+    and actively leased properties for tenants. Admins are unrestricted.
+    """
+    def __init__(self, property_ids=None):
+        # None means unrestricted (admins)
+        self.property_ids = property_ids
+
+    @property
+    def unrestricted(self):
+        return self.property_ids is None
+
+    def includes(self, property_id):
+        return self.unrestricted or property_id in self.property_ids
+
+    def filter(self, field='property_id'):
+        """
+        A ``Q`` restricting ``field`` to the scope. Large scopes fall back to
+        a subquery so the statement size stays bounded.
+        """
+        if self.unrestricted:
+            return Q()
+        if len(self.property_ids) <= settings.PROPERTY_SCOPE_MAX_INLINE_IDS:
+            return Q(**{f'{field}__in': self.property_ids})
+        return Q(**{f'{field}__in': Property.objects.filter(id__in=list(self.property_ids)).values('id')})
+
+
+UNRESTRICTED_SCOPE = PropertyScope()
+
+
+def compute_property_ids(user):
+    if user.is_landlord():
+        ids = Property.objects.filter(owner_id=user.id).values_list('id', flat=True)
+    elif user.is_property_manager():
+        ids = Property.objects.filter(property_manager_id=user.id).values_list('id', flat=True)
+    elif user.is_tenant():
+        ids = Lease.objects.filter(tenant_id=user.id, is_active=True).values_list('property_id', flat=True)
+    else:
+        return None
+    return frozenset(ids)
+
+
+GENERATION_PREFIX = 'scope-generation:'
+
+
+class PropertyScopeCache:
+    """
+    In-process TTL cache of each user's accessible property ids.
+
+    Besides the per-user entries it keeps a reverse index from property id to
+    the users whose cached scope contains it. A Property or Lease change then
+    evicts exactly the affected users, including a previous owner, manager or
+    tenant, without looking up the old row. See ``api.signals``.
+
+    Eviction only reaches the process that made the change, so each user also
+    has a generation in the shared ``shared_alias`` cache, bumped once the
+    change commits. An entry is only served while the user's generation is
+    the one it was computed under, so other workers drop it on their next
+    lookup instead of at the end of the TTL.
+    """
+    def __init__(self, ttl, shared_alias):
+        self.ttl = ttl
+        self.shared = caches.create_connection(shared_alias)
+        # Local memory is read in place; other backends do network or disk
+        # I/O, which callers keep off the event loop.
+        self.inline = isinstance(self.shared, LocMemCache)
+        self._scopes = {}
+        self._members = {}
+        self._lock = threading.Lock()
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user):
+        with self._lock:
+            entry = self._scopes.get(user.id)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+        if self.shared.get(GENERATION_PREFIX + str(user.id)) != entry[2]:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return PropertyScope(entry[1])
+
+    def version(self, user):
+        """Token to pass to ``set`` with a scope computed after this call."""
+        key = GENERATION_PREFIX + str(user.id)
+        generation = self.shared.get(key)
+        if generation is None:
+            # A user without a generation gets one before it is relied on, so
+            # losing it to eviction later turns into a miss
+            self.shared.add(key, uuid.uuid4().hex, timeout=None)
+            generation = self.shared.get(key)
+        return self._version, generation
+
+    def set(self, user, property_ids, version):
+        local_version, generation = version
+        with self._lock:
+            if local_version != self._version:
+                return
+            self._evict(user.id)
+            self._scopes[user.id] = (time.monotonic() + self.ttl, property_ids, generation)
+            for property_id in property_ids:
+                self._members.setdefault(property_id, set()).add(user.id)
+
+    def _bump(self, user_ids):
+        user_ids = {user_id for user_id in user_ids if user_id is not None}
+        if user_ids:
+            generation = uuid.uuid4().hex
+            self.shared.set_many({GENERATION_PREFIX + str(user_id): generation for user_id in user_ids}, timeout=None)
+
+    def _evict(self, user_id):
+        entry = self._scopes.pop(user_id, None)
+        if entry is None:
+            return
+        for property_id in entry[1]:
+            members = self._members.get(property_id)
+            if members is not None:
+                members.discard(user_id)
+                if not members:
+                    del self._members[property_id]
+
+    def invalidate_property(self, property_id, *user_ids):
+        """
+        Evict the users holding ``property_id`` here, plus ``user_ids``, and
+        bump the generation of all of them on commit. ``user_ids`` must name
+        every user whose scope the change affects, previous ones included:
+        other processes know nothing of this process's reverse index.
+        """
+        with self._lock:
+            self._version += 1
+            affected = set(self._members.get(property_id, ())) | set(user_ids)
+            for user_id in affected:
+                if user_id is not None:
+                    self._evict(user_id)
+        transaction.on_commit(lambda: self._bump(affected))
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            self._version += 1
+            self._evict(user_id)
+        transaction.on_commit(lambda: self._bump([user_id]))
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._scopes.clear()
+            self._members.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._scopes),
+            "indexed_properties": len(self._members),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+        }
+
+
+scope_cache = PropertyScopeCache(
+    ttl=settings.PROPERTY_SCOPE_CACHE_TTL, shared_alias=settings.PROPERTY_SCOPE_GENERATION_CACHE
+)
+
+
+def peek_property_scope(user):
+    """Return the user's PropertyScope if it is known without a query."""
+    if user.is_admin():
+        return UNRESTRICTED_SCOPE
+    return scope_cache.get(user)
+
+
+def get_property_scope(user):
+    """Return the user's PropertyScope, computing and caching it on a miss."""
+    scope = peek_property_scope(user)
+    if scope is None:
+        version = scope_cache.version(user)
+        property_ids = compute_property_ids(user)
+        if property_ids is None:
+            return UNRESTRICTED_SCOPE
+        scope_cache.set(user, property_ids, version)
+        scope = PropertyScope(property_ids)
+    return scope
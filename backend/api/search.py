@@ -0,0 +1,455 @@
+"""
+In-memory bitmap indexes for faceted property search.
+
+Every property occupies a slot, assigned in listing order (``created_at``,
+``id``), and each indexed value owns a bitmap, a Python int with one bit
+per slot. A filter combination is answered with a few ANDs/ORs over those
+bitmaps, facet counts with ``int.bit_count``, and a page by walking the set
+bits of the result from the newest slot down.
+
+Indexed fields: status, category, city, state, bedrooms, bathrooms, rent
+band (``PROPERTY_SEARCH_RENT_BAND`` wide), owner and property manager; the
+last two express the role restrictions of the property listing. Exact rent
+bounds are answered from a sorted array of (rent, slot) keys per band, so
+only the boundary bands are searched row by row.
+
+The index is updated from Property saves and deletes in this process (see
+``api.signals``). Changes made by other processes are picked up when the
+response cache's ``catalog`` tag version changes: rows whose ``updated_at``
+passed the last sync are re-read, and a row count mismatch (a delete) or a
+row older than the newest slot triggers a full reload.
+"""
+
+import bisect
+import threading
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Property
+
+INDEXED_FIELDS = (
+    'id', 'created_at', 'updated_at', 'status', 'category', 'city', 'state',
+    'bedrooms', 'bathrooms', 'monthly_rent', 'owner_id', 'property_manager_id',
+)
+
+# Bitmap-indexed values of a values() row; text is matched case-insensitively
+INDEXES = {
+    'status': lambda row: row['status'],
+    'category': lambda row: row['category'],
+    'city': lambda row: row['city'].strip().casefold(),
+    'state': lambda row: row['state'].strip().casefold(),
+    'bedrooms': lambda row: row['bedrooms'],
+    'bathrooms': lambda row: row['bathrooms'],
+    'rent_band': lambda row: _cents(row['monthly_rent']) // (settings.PROPERTY_SEARCH_RENT_BAND * 100),
+    'owner': lambda row: row['owner_id'],
+    'manager': lambda row: row['property_manager_id'],
+}
+
+FACETS = ('status', 'category', 'city', 'state', 'bedrooms', 'bathrooms', 'rent_band')
+
+# Filter name -> index it narrows, so a facet is counted without its own filter
+FILTER_INDEXES = {
+    'status': 'status',
+    'category': 'category',
+    'city': 'city',
+    'state': 'state',
+    'min_bedrooms': 'bedrooms',
+    'min_bathrooms': 'bathrooms',
+    'min_rent': 'rent_band',
+    'max_rent': 'rent_band',
+}
+
+LOAD_BATCH_SIZE = 10000
+
+# Facet counts over a result of fewer than (values x slots / this) rows are
+# tallied row by row instead of intersecting one bitmap per value
+SPARSE_FACET_RATIO = 20000
+
+# Rows saved up to this long before a sync started are re-read by it, to
+# cover transactions that committed a Property save after its timestamp
+SYNC_MARGIN = timedelta(seconds=60)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MISSING = object()
+
+
+def _cents(amount):
+    return int(round(amount * 100))
+
+
+def _microseconds(moment):
+    # Keys are kept in arrays of integers
+    return (moment - EPOCH) // timedelta(microseconds=1)
+
+
+def _sort_key(row):
+    return _microseconds(row['created_at']), row['id']
+
+
+def _rent_key(rent, slot):
+    # (rent, slot) packed into one integer, ordered by rent
+    return rent << 32 | slot
+
+
+def _bitmap(slots, size):
+    """A bitmap with the bits of ``slots`` set, built without per-bit int copies."""
+    buffer = bytearray((size + 7) // 8)
+    for slot in slots:
+        buffer[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def iter_bits_descending(bitmap, below):
+    """Yield the set bits of ``bitmap`` lower than ``below``, highest first."""
+    window = 4096
+    high = below
+    while high > 0:
+        low = max(high - window, 0)
+        chunk = (bitmap >> low) & ((1 << (high - low)) - 1)
+        while chunk:
+            bit = chunk.bit_length() - 1
+            yield low + bit
+            chunk ^= 1 << bit
+        high = low
+        # Sparse results: widen the window instead of shifting the whole
+        # bitmap once per small window
+        window *= 2
+
+
+class SearchResult:
+    def __init__(self, total, ids, next_key, facets):
+        self.total = total
+        # Property ids of the page in listing order
+        self.ids = ids
+        # (created_at, id) of the last row if another page follows
+        self.next_key = next_key
+        self.facets = facets
+
+
+class PropertySearchIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset()
+        self.loads = 0
+        self.syncs = 0
+        self.searches = 0
+
+    def _reset(self):
+        self._ids = array('q')
+        self._created = array('q')
+        self._rents = array('q')
+        self._band_rents = {}
+        self._slots = {}
+        self._rows = {}
+        self._bitmaps = {name: {} for name in INDEXES}
+        self._labels = {'city': {}, 'state': {}}
+        self._live = 0
+        self._version = None
+        self._watermark = None
+
+    # Loading and maintenance
+
+    def load(self):
+        """Rebuild the index from the Property table."""
+        with self._lock:
+            started = timezone.now()
+            rows = Property.objects.order_by('created_at', 'id').values(*INDEXED_FIELDS)
+            self.build(rows.iterator(chunk_size=LOAD_BATCH_SIZE))
+            self._watermark = started
+            self.loads += 1
+
+    def build(self, rows):
+        """Index ``rows`` (values() rows in listing order) from scratch."""
+        with self._lock:
+            self._reset()
+            slots_by_value = {name: {} for name in INDEXES}
+            for row in rows:
+                slot = self._append(row)
+                for name, value_of in INDEXES.items():
+                    slots_by_value[name].setdefault(value_of(row), []).append(slot)
+            size = len(self._ids)
+            for name, values in slots_by_value.items():
+                self._bitmaps[name] = {value: _bitmap(slots, size) for value, slots in values.items()}
+            for band, slots in slots_by_value['rent_band'].items():
+                self._band_rents[band] = array('q', sorted(_rent_key(self._rents[slot], slot) for slot in slots))
+            self._live = (1 << size) - 1
+            self._loaded = True
+
+    def _append(self, row):
+        slot = len(self._ids)
+        created, pk = _sort_key(row)
+        self._ids.append(pk)
+        self._created.append(created)
+        self._rents.append(_cents(row['monthly_rent']))
+        self._slots[pk] = slot
+        self._rows[pk] = {name: value_of(row) for name, value_of in INDEXES.items()}
+        for name in ('city', 'state'):
+            self._labels[name].setdefault(self._rows[pk][name], row[name].strip())
+        return slot
+
+    def _set(self, name, value, bit):
+        bitmaps = self._bitmaps[name]
+        bitmaps[value] = bitmaps.get(value, 0) | bit
+
+    def _clear(self, name, value, bit):
+        bitmaps = self._bitmaps[name]
+        remaining = bitmaps.get(value, 0) & ~bit
+        if remaining:
+            bitmaps[value] = remaining
+        else:
+            bitmaps.pop(value, None)
+
+    def update(self, row):
+        """Index or re-index one Property values() row (see INDEXED_FIELDS)."""
+        with self._lock:
+            if not self._loaded:
+                return
+            slot = self._slots.get(row['id'])
+            if slot is None:
+                if self._ids and _sort_key(row) < (self._created[-1], self._ids[-1]):
+                    # Slots must stay in listing order; reload on the next sync
+                    self._loaded = False
+                    return
+                previous = {}
+                slot = self._append(row)
+                self._live |= 1 << slot
+            else:
+                previous = self._rows[row['id']]
+                self._rows[row['id']] = {name: value_of(row) for name, value_of in INDEXES.items()}
+                self._unindex_rent(previous['rent_band'], slot)
+                self._rents[slot] = _cents(row['monthly_rent'])
+                for name in ('city', 'state'):
+                    self._labels[name].setdefault(self._rows[row['id']][name], row[name].strip())
+            bisect.insort(
+                self._band_rents.setdefault(self._rows[row['id']]['rent_band'], array('q')),
+                _rent_key(self._rents[slot], slot),
+            )
+            bit = 1 << slot
+            for name, value in self._rows[row['id']].items():
+                old = previous.get(name, _MISSING)
+                if old == value:
+                    continue
+                if old is not _MISSING:
+                    self._clear(name, old, bit)
+                self._set(name, value, bit)
+
+    def refresh(self, property_id):
+        """Re-read one property after a committed save or delete."""
+        if not self._loaded:
+            return
+        row = Property.objects.filter(pk=property_id).values(*INDEXED_FIELDS).first()
+        if row is None:
+            self.remove(property_id)
+        else:
+            self.update(row)
+
+    def remove(self, property_id):
+        with self._lock:
+            slot = self._slots.pop(property_id, None)
+            if slot is None:
+                return
+            bit = 1 << slot
+            row = self._rows.pop(property_id)
+            for name, value in row.items():
+                self._clear(name, value, bit)
+            self._unindex_rent(row['rent_band'], slot)
+            self._live &= ~bit
+
+    def _unindex_rent(self, band, slot):
+        rents = self._band_rents[band]
+        del rents[bisect.bisect_left(rents, _rent_key(self._rents[slot], slot))]
+        if not rents:
+            del self._band_rents[band]
+
+    def sync(self, version):
+        """
+        Bring the index up to date with the Property table after the
+        ``catalog`` tag reached ``version``.
+        """
+        with self._lock:
+            if self._loaded and version is not None and version == self._version:
+                return
+            if self._loaded:
+                started = timezone.now()
+                changed = Property.objects.filter(updated_at__gte=self._watermark - SYNC_MARGIN)
+                for row in changed.order_by('created_at', 'id').values(*INDEXED_FIELDS):
+                    self.update(row)
+                # Deleted rows are only noticed by the count
+                if self._loaded and Property.objects.count() == len(self._slots):
+                    self._watermark = started
+                    self.syncs += 1
+                else:
+                    self._loaded = False
+            if not self._loaded:
+                self.load()
+            self._version = version
+
+    # Queries
+
+    def _at_least(self, name, minimum):
+        result = 0
+        for value, bitmap in self._bitmaps[name].items():
+            if value is not None and value >= minimum:
+                result |= bitmap
+        return result
+
+    def _rent_between(self, min_rent, max_rent):
+        band_width = settings.PROPERTY_SEARCH_RENT_BAND * 100
+        low = _cents(min_rent) if min_rent is not None else None
+        high = _cents(max_rent) if max_rent is not None else None
+        result = 0
+        boundary_slots = []
+        for band, bitmap in self._bitmaps['rent_band'].items():
+            band_low, band_high = band * band_width, (band + 1) * band_width - 1
+            if (high is not None and band_low > high) or (low is not None and band_high < low):
+                continue
+            if (high is None or band_high <= high) and (low is None or band_low >= low):
+                result |= bitmap
+                continue
+            # Boundary band: the slots within the bounds from its sorted rents
+            rents = self._band_rents[band]
+            start = bisect.bisect_left(rents, _rent_key(low, 0)) if low is not None else 0
+            end = bisect.bisect_right(rents, _rent_key(high, 0xFFFFFFFF)) if high is not None else len(rents)
+            boundary_slots.extend(key & 0xFFFFFFFF for key in rents[start:end])
+        if boundary_slots:
+            result |= _bitmap(boundary_slots, len(self._ids))
+        return result
+
+    def _filter(self, base, name, value, filters):
+        if name == 'status':
+            return base & self._bitmaps['status'].get(value, 0)
+        if name == 'category':
+            return base & self._bitmaps['category'].get(value, 0)
+        if name == 'city':
+            # Substring match over the distinct cities, like city__icontains
+            needle = value.casefold()
+            matching = 0
+            for city, bitmap in self._bitmaps['city'].items():
+                if needle in city:
+                    matching |= bitmap
+            return base & matching
+        if name == 'state':
+            return base & self._bitmaps['state'].get(value.strip().casefold(), 0)
+        if name == 'min_bedrooms':
+            return base & self._at_least('bedrooms', value)
+        if name == 'min_bathrooms':
+            return base & self._at_least('bathrooms', value)
+        if name in ('min_rent', 'max_rent'):
+            return base & self._rent_between(filters.get('min_rent'), filters.get('max_rent'))
+        raise ValueError(f"Unknown filter {name}")
+
+    def _match(self, restriction, filters, skip=None):
+        result = self._live & restriction
+        applied_rent = False
+        for name, value in filters.items():
+            if FILTER_INDEXES[name] == skip:
+                continue
+            if name in ('min_rent', 'max_rent'):
+                if applied_rent:
+                    continue
+                applied_rent = True
+            result = self._filter(result, name, value, filters)
+        return result
+
+    def restriction(self, owner_id=None, manager_id=None, status=None, property_ids=()):
+        """
+        A bitmap of the properties a listing is restricted to: those of an
+        owner or manager, or those with ``status`` plus ``property_ids``.
+        """
+        with self._lock:
+            if owner_id is not None:
+                return self._bitmaps['owner'].get(owner_id, 0)
+            if manager_id is not None:
+                return self._bitmaps['manager'].get(manager_id, 0)
+            result = self._bitmaps['status'].get(status, 0) if status is not None else 0
+            for property_id in property_ids:
+                slot = self._slots.get(property_id)
+                if slot is not None:
+                    result |= 1 << slot
+            return result
+
+    def all_properties(self):
+        return self._live
+
+    def search(self, restriction, filters, after=None, limit=20, facets=False, facet_limit=None):
+        """
+        Properties within the ``restriction`` bitmap matching ``filters``
+        (FILTER_INDEXES names with None values left out), newest first,
+        starting after the ``(created_at, id)`` key ``after``.
+        """
+        filters = {name: value for name, value in filters.items() if value is not None and value != ''}
+        with self._lock:
+            self.searches += 1
+            result = self._match(restriction, filters)
+            below = len(self._ids)
+            if after is not None:
+                created_at, pk = after
+                below = bisect.bisect_left(_Keys(self._created, self._ids), (_microseconds(created_at), pk))
+            slots = []
+            for slot in iter_bits_descending(result, below):
+                # One row past the page tells whether another page follows
+                slots.append(slot)
+                if len(slots) > limit:
+                    break
+            next_key = None
+            if len(slots) > limit:
+                slots = slots[:limit]
+                next_key = (EPOCH + timedelta(microseconds=self._created[slots[-1]]), self._ids[slots[-1]])
+            counts = self._facets(restriction, filters, facet_limit) if facets else None
+            return SearchResult(result.bit_count(), [self._ids[slot] for slot in slots], next_key, counts)
+
+    def _facets(self, restriction, filters, facet_limit):
+        counts = {}
+        for name in FACETS:
+            base = self._match(restriction, filters, skip=name)
+            matched = base.bit_count()
+            if matched * SPARSE_FACET_RATIO < len(self._bitmaps[name]) * len(self._ids):
+                tally = {}
+                for slot in iter_bits_descending(base, len(self._ids)):
+                    value = self._rows[self._ids[slot]][name]
+                    tally[value] = tally.get(value, 0) + 1
+            else:
+                tally = {value: (base & bitmap).bit_count() for value, bitmap in self._bitmaps[name].items()}
+            values = [(self._facet_label(name, value), count) for value, count in tally.items() if count]
+            values.sort(key=lambda item: (-item[1], item[0]))
+            counts[name] = dict(values[:facet_limit] if facet_limit else values)
+        return counts
+
+    def _facet_label(self, name, value):
+        # Labels are JSON object keys
+        if name in self._labels:
+            return self._labels[name].get(value, value)
+        if name == 'rent_band':
+            band_width = settings.PROPERTY_SEARCH_RENT_BAND
+            return f"{value * band_width}-{(value + 1) * band_width}"
+        return str(value)
+
+    def stats(self):
+        return {
+            "loaded": self._loaded,
+            "properties": len(self._slots),
+            "slots": len(self._ids),
+            "loads": self.loads,
+            "syncs": self.syncs,
+            "searches": self.searches,
+        }
+
+
+class _Keys:
+    """Sequence view of the slots' (created_at, id) keys for bisect."""
+    def __init__(self, created, ids):
+        self._created = created
+        self._ids = ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, slot):
+        return self._created[slot], self._ids[slot]
+
+
+search_index = PropertySearchIndex()
@@ -0,0 +1,202 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from notifications.models import MaintenanceRequest, Notification
+from payments.models import Invoice, Payment
+from rentalhub.response_cache import response_cache
+from users.models import User
+from .amenities import amenity_vocabulary
+from .models import Amenity, Property, PropertyImage, Lease
+from . import occupancy
+from .scopes import scope_cache
+from .search import search_index
+
+
+# Scope invalidation names the previous owner, manager or tenant as well as
+# the current one, so their scopes are dropped in every worker and not only
+# where this process's reverse index knows them. The previous users come from
+# the response cache snapshot of the stored row taken in pre_save/pre_delete.
+
+def _previous_user_ids(instance, *tags):
+    prefixes = tuple(f'{tag}:' for tag in tags)
+    return [
+        int(tag.split(':', 1)[1])
+        for tag in getattr(instance, '_response_cache_tags', ())
+        if tag.startswith(prefixes)
+    ]
+
+
+# Fields whose change moves a row between users' scopes, by name and by
+# attname: save(update_fields=...) accepts and passes on either.
+PROPERTY_SCOPE_FIELDS = {'owner', 'owner_id', 'property_manager', 'property_manager_id'}
+LEASE_SCOPE_FIELDS = {'property', 'property_id', 'tenant', 'tenant_id', 'is_active'}
+
+
+@receiver([post_save, post_delete], sender=Property)
+def invalidate_property_scopes(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not PROPERTY_SCOPE_FIELDS & set(update_fields):
+        return
+    scope_cache.invalidate_property(
+        instance.id, instance.owner_id, instance.property_manager_id,
+        *_previous_user_ids(instance, 'owner', 'manager'),
+    )
+
+
+@receiver([post_save, post_delete], sender=Property)
+def update_search_index(sender, instance, **kwargs):
+    property_id = instance.pk
+    transaction.on_commit(lambda: search_index.refresh(property_id))
+
+
+@receiver([post_save, post_delete], sender=Amenity)
+def reset_amenity_vocabulary(sender, **kwargs):
+    amenity_vocabulary.reset()
+
+
+@receiver([post_save, post_delete], sender=Lease)
+def refresh_occupancy(sender, instance, raw=False, **kwargs):
+    # A lease moved to another property frees the days of the previous one.
+    # The stored row is already read in pre_save by analytics.signals.remember_lease.
+    if not raw:
+        previous = getattr(instance, '_rollup_previous', None)
+        occupancy.refresh({instance.property_id, previous['property_id'] if previous else None})
+
+
+@receiver([post_save, post_delete], sender=Lease)
+def invalidate_lease_scopes(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not LEASE_SCOPE_FIELDS & set(update_fields):
+        return
+    scope_cache.invalidate_property(instance.property_id, instance.tenant_id, *_previous_user_ids(instance, 'tenant'))
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_scope(sender, instance, **kwargs):
+    # A role change switches which properties the user is scoped to
+    scope_cache.invalidate_user(instance.id)
+
+
+# Response cache tags of a row, as lookups read with one values() query. The
+# tags of the stored row are read before a save or delete as well as after a
+# save, so a row moving to another property or user invalidates both sides.
+RESPONSE_CACHE_TAGS = {
+    Property: {
+        'property': 'id', 'owner': 'owner_id', 'manager': 'property_manager_id',
+    },
+    PropertyImage: {
+        'property': 'property_id', 'owner': 'property__owner_id', 'manager': 'property__property_manager_id',
+    },
+    Lease: {
+        'property': 'property_id', 'owner': 'property__owner_id', 'manager': 'property__property_manager_id',
+        'tenant': 'tenant_id',
+    },
+    Invoice: {
+        'property': 'property_id', 'owner': 'property__owner_id', 'manager': 'property__property_manager_id',
+        'tenant': 'tenant_id',
+    },
+    Payment: {
+        'property': 'invoice__property_id', 'owner': 'invoice__property__owner_id',
+        'manager': 'invoice__property__property_manager_id', 'tenant': 'invoice__tenant_id',
+    },
+    MaintenanceRequest: {
+        'property': 'property_id', 'owner': 'property__owner_id', 'manager': 'property__property_manager_id',
+        'tenant': 'tenant_id', 'user': 'assigned_to_id',
+    },
+    Notification: {
+        'notifications': 'user_id',
+    },
+}
+
+# Tags invalidated by any change of the model
+RESPONSE_CACHE_MODEL_TAGS = {
+    Property: ('catalog', 'all'),
+    PropertyImage: ('catalog', 'all'),
+    Lease: ('occupancy', 'all'),
+    Invoice: ('all',),
+    Payment: ('all',),
+    MaintenanceRequest: ('all',),
+    Notification: (),
+}
+
+
+def _row_tags(sender, pk):
+    lookups = RESPONSE_CACHE_TAGS[sender]
+    row = sender.objects.filter(pk=pk).values(*lookups.values()).first()
+    if row is None:
+        return set()
+    return {f'{tag}:{row[lookup]}' for tag, lookup in lookups.items() if row[lookup] is not None}
+
+
+def _invalidate_on_commit(tags):
+    transaction.on_commit(lambda: response_cache.invalidate_tags(tags))
+
+
+def remember_response_cache_tags(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if sender is Notification:
+        # The recipient never changes, so post_save reads it from the instance
+        instance._response_cache_tags = set()
+    elif instance.pk is not None and not instance._state.adding:
+        instance._response_cache_tags = _row_tags(sender, instance.pk)
+
+
+def invalidate_saved_responses(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    tags = set(getattr(instance, '_response_cache_tags', ()))
+    if sender is Notification:
+        tags.add(f'notifications:{instance.user_id}')
+    else:
+        tags |= _row_tags(sender, instance.pk)
+    _invalidate_on_commit(tags | set(RESPONSE_CACHE_MODEL_TAGS[sender]))
+
+
+def invalidate_deleted_responses(sender, instance, **kwargs):
+    tags = set(getattr(instance, '_response_cache_tags', ()))
+    if sender is Notification:
+        tags.add(f'notifications:{instance.user_id}')
+    _invalidate_on_commit(tags | set(RESPONSE_CACHE_MODEL_TAGS[sender]))
+
+
+for model in RESPONSE_CACHE_TAGS:
+    pre_save.connect(remember_response_cache_tags, sender=model)
+    pre_delete.connect(remember_response_cache_tags, sender=model)
+    post_save.connect(invalidate_saved_responses, sender=model)
+    post_delete.connect(invalidate_deleted_responses, sender=model)
+
+
+# User fields shown in the user's own responses, and the subset embedded in
+# other rows' responses (tenant and assignee names), which every role-scoped
+# entry depends on through the ``users`` tag. Saves of other fields, such as
+# the last_login update of every login, invalidate nothing.
+USER_RESPONSE_FIELDS = {'username', 'email', 'first_name', 'last_name', 'role', 'phone_number', 'profile_image'}
+USER_EMBEDDED_FIELDS = ('first_name', 'last_name')
+
+
+@receiver(pre_save, sender=User)
+def remember_embedded_user_fields(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._embedded_fields = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(USER_EMBEDDED_FIELDS) & set(update_fields):
+        return
+    instance._embedded_fields = sender.objects.filter(pk=instance.pk).values_list(*USER_EMBEDDED_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_saved_user_responses(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # A new user appears in no other response yet
+    if raw or created or (update_fields is not None and not USER_RESPONSE_FIELDS & set(update_fields)):
+        return
+    tags = {f'user:{instance.id}'}
+    previous = getattr(instance, '_embedded_fields', None)
+    if previous is not None and previous != tuple(getattr(instance, field) for field in USER_EMBEDDED_FIELDS):
+        tags.add('users')
+    _invalidate_on_commit(tags)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user_responses(sender, instance, **kwargs):
+    # Assigned maintenance requests are detached by SET_NULL, which sends no signals
+    _invalidate_on_commit({f'user:{instance.id}', 'users'})
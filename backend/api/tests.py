@@ -1,3 +1,896 @@
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.db.models import Sum
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from fastapi.encoders import jsonable_encoder
+
+from analytics.counters import SCOPE_USER_FIELDS, reconcile
+from analytics.models import PortfolioCounters
+from api import fulltext
+from api.amenities import UnknownAmenity, amenity_vocabulary
+from api.lease_import import import_leases, read_rows
+from api.lease_overlaps import batch_conflicts
+from api.geo import geocode
+from api.models import Amenity, Lease, PostcodeCentroid, Property, PropertyImage, PropertyOccupancy
+from api.scopes import PropertyScopeCache, compute_property_ids
+from notifications.models import MaintenanceComment, MaintenanceRequest, Notification
+from payments.models import Invoice, Payment
+from rentalhub.response_cache import response_cache
+from rentalhub.testing import ApiTestCase
+from users.models import User
+
+
+class PortfolioTestCase(ApiTestCase):
+    """A landlord's portfolio, managed by one manager and rented by one tenant."""
+
+    def setUp(self):
+        super().setUp()
+        self.landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        self.manager = User.objects.create_user('manager', 'manager@example.com', 'pw', role=User.Role.PROPERTY_MANAGER)
+        self.tenant = User.objects.create_user('tenant', 'tenant@example.com', 'pw', role=User.Role.TENANT)
+        self.units = 0
+
+    def add_units(self, count):
+        """Add ``count`` rented properties, each with a lease, invoice, payment and request."""
+        today = date.today()
+        for _ in range(count):
+            self.units += 1
+            property = Property.objects.create(
+                name=f'Unit {self.units}', address=f'{self.units} Main St', city='Cape Town', state='WC',
+                zip_code='8001', monthly_rent=1000, deposit_amount=500, status=Property.Status.RENTED,
+                owner=self.landlord, property_manager=self.manager,
+            )
+            PropertyImage.objects.create(property=property, image=f'property_images/{self.units}.jpg')
+            lease = Lease.objects.create(
+                property=property, tenant=self.tenant, start_date=today, end_date=today + timedelta(days=365),
+                rent_amount=1000, deposit_amount=500,
+            )
+            invoice = Invoice.objects.create(
+                tenant=self.tenant, property=property, lease=lease, amount=Decimal('1000'),
+                description='Rent', due_date=today,
+            )
+            Payment.objects.create(
+                invoice=invoice, amount=Decimal('1000'), payment_date=timezone.now(),
+                payment_method=Payment.Method.CASH,
+            )
+            request = MaintenanceRequest.objects.create(
+                property=property, tenant=self.tenant, title='Leak', description='Kitchen tap',
+                assigned_to=self.manager,
+            )
+            MaintenanceComment.objects.create(maintenance_request=request, user=self.tenant, comment='Still leaking')
+            Notification.objects.create(
+                user=self.tenant, type=Notification.Type.PAYMENT_DUE, title='Rent due', message='Rent is due',
+            )
+
+    def assertConstantQueries(self, path, users, grow=lambda: None, prepare=lambda: None):
+        """
+        The query count of ``path`` is the same at two and at six units.
+        ``prepare`` runs before each measurement, ``grow`` before the second.
+        """
+        self.add_units(2)
+        prepare()
+        small = {user.username: self.count_queries('GET', path(), user) for user in users}
+        self.add_units(4)
+        grow()
+        prepare()
+        for user in users:
+            with self.subTest(user=user.username):
+                response, queries = self.count_queries('GET', path(), user)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response.content, small[user.username][0].content)
+                self.assertEqual(queries, small[user.username][1])
+
+    def first(self, model):
+        return model.objects.order_by('id').first()
+
+
+class QueryCountTests(PortfolioTestCase):
+    """
+    Every list and detail endpoint issues the same number of queries however
+    many rows it returns: related objects come from joins or one prefetch,
+    never from a query per row.
+    """
+
+    def test_property_list(self):
+        self.assertConstantQueries(lambda: '/properties/', [self.landlord, self.manager])
+
+    def test_property_detail(self):
+        def grow():
+            for n in range(4):
+                PropertyImage.objects.create(property=self.first(Property), image=f'property_images/extra-{n}.jpg')
+
+        self.assertConstantQueries(
+            lambda: f'/properties/{self.first(Property).id}/', [self.landlord, self.manager], grow
+        )
+
+    def test_lease_list(self):
+        self.assertConstantQueries(lambda: '/leases/', [self.landlord, self.manager, self.tenant])
+
+    def test_lease_detail(self):
+        # The tenant's name comes from the join, so change it to tell the responses apart
+        def grow():
+            User.objects.filter(id=self.tenant.id).update(first_name='Renamed')
+
+        self.assertConstantQueries(
+            lambda: f'/leases/{self.first(Lease).id}/', [self.landlord, self.manager, self.tenant], grow
+        )
+
+    def test_invoice_list(self):
+        self.assertConstantQueries(lambda: '/invoices/', [self.landlord, self.manager, self.tenant])
+
+    def test_invoice_detail(self):
+        def grow():
+            Invoice.objects.filter(id=self.first(Invoice).id).update(description='Rent and water')
+
+        self.assertConstantQueries(
+            lambda: f'/invoices/{self.first(Invoice).id}/', [self.landlord, self.manager, self.tenant], grow
+        )
+
+    def test_payment_list(self):
+        self.assertConstantQueries(lambda: '/payments/', [self.landlord, self.manager, self.tenant])
+
+    def test_payment_detail(self):
+        def grow():
+            Payment.objects.filter(id=self.first(Payment).id).update(notes='Paid at the office')
+
+        self.assertConstantQueries(
+            lambda: f'/payments/{self.first(Payment).id}/', [self.landlord, self.manager, self.tenant], grow
+        )
+
+    def test_maintenance_request_list(self):
+        self.assertConstantQueries(lambda: '/maintenance-requests/', [self.landlord, self.manager, self.tenant])
+
+    def test_maintenance_request_detail(self):
+        def grow():
+            User.objects.filter(id=self.manager.id).update(first_name='Renamed')
+
+        self.assertConstantQueries(
+            lambda: f'/maintenance-requests/{self.first(MaintenanceRequest).id}/',
+            [self.landlord, self.manager, self.tenant], grow
+        )
+
+    def test_maintenance_comments(self):
+        def grow():
+            for _ in range(4):
+                MaintenanceComment.objects.create(
+                    maintenance_request=self.first(MaintenanceRequest), user=self.manager, comment='On my way'
+                )
+
+        self.assertConstantQueries(
+            lambda: f'/maintenance-requests/{self.first(MaintenanceRequest).id}/comments/',
+            [self.landlord, self.manager, self.tenant], grow
+        )
+
+    def test_notification_list(self):
+        self.assertConstantQueries(lambda: '/notifications/', [self.tenant])
+
+
+class DashboardQueryCountTests(PortfolioTestCase):
+    """
+    The dashboards issue a fixed number of queries however large the
+    portfolio, both when they read the PortfolioCounters row and when they
+    fall back to grouped counts for a user without one.
+    """
+
+    def build_counters(self):
+        for scope in SCOPE_USER_FIELDS:
+            reconcile(scope, [self.landlord.id, self.manager.id])
+
+    def drop_counters(self):
+        PortfolioCounters.objects.all().delete()
+
+    def test_landlord_summary_from_counters(self):
+        self.assertConstantQueries(lambda: '/dashboard/landlord-summary/', [self.landlord], prepare=self.build_counters)
+
+    def test_landlord_summary_without_counters(self):
+        self.assertConstantQueries(lambda: '/dashboard/landlord-summary/', [self.landlord], prepare=self.drop_counters)
+
+    def test_manager_summary_from_counters(self):
+        self.assertConstantQueries(
+            lambda: '/dashboard/property-manager-summary/', [self.manager], prepare=self.build_counters
+        )
+
+    def test_manager_summary_without_counters(self):
+        self.assertConstantQueries(
+            lambda: '/dashboard/property-manager-summary/', [self.manager], prepare=self.drop_counters
+        )
+
+    def test_both_paths_agree(self):
+        self.add_units(3)
+        for path, user in (
+            ('/dashboard/landlord-summary/', self.landlord),
+            ('/dashboard/property-manager-summary/', self.manager),
+        ):
+            with self.subTest(path=path):
+                self.drop_counters()
+                fallback, fallback_queries = self.count_queries('GET', path, user)
+                self.build_counters()
+                response, queries = self.count_queries('GET', path, user)
+                self.assertEqual(response.json(), fallback.json())
+                self.assertLess(queries, fallback_queries)
+
+
+class PropertyScopeCacheTests(TestCase):
+    """A scope change made in one worker expires the scope cached by another."""
+
+    def setUp(self):
+        self.landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        self.manager = User.objects.create_user('manager', 'manager@example.com', 'pw', role=User.Role.PROPERTY_MANAGER)
+        self.tenant = User.objects.create_user('tenant', 'tenant@example.com', 'pw', role=User.Role.TENANT)
+        self.property = Property.objects.create(
+            name='Flat', address='1 Main St', city='Cape Town', state='WC', zip_code='8001',
+            monthly_rent=1000, deposit_amount=500, owner=self.landlord, property_manager=self.manager,
+        )
+        self.lease = Lease.objects.create(
+            property=self.property, tenant=self.tenant, start_date=date.today(),
+            end_date=date.today() + timedelta(days=365), rent_amount=1000, deposit_amount=500,
+        )
+        # Another worker's cache, sharing only the generation store
+        self.worker = PropertyScopeCache(ttl=300, shared_alias='responses')
+
+    def cache_in_worker(self, user):
+        version = self.worker.version(user)
+        self.worker.set(user, compute_property_ids(user), version)
+        self.assertIsNotNone(self.worker.get(user))
+
+    def test_removed_manager(self):
+        self.cache_in_worker(self.manager)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property.property_manager = None
+            self.property.save()
+        self.assertIsNone(self.worker.get(self.manager))
+
+    def test_deleted_lease(self):
+        self.cache_in_worker(self.tenant)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lease.delete()
+        self.assertIsNone(self.worker.get(self.tenant))
+
+    def test_manager_removed_by_attname(self):
+        self.cache_in_worker(self.manager)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property.property_manager_id = None
+            self.property.save(update_fields=['property_manager_id'])
+        self.assertIsNone(self.worker.get(self.manager))
+
+    def test_tenant_replaced_by_attname(self):
+        other = User.objects.create_user('other', 'other@example.com', 'pw', role=User.Role.TENANT)
+        self.cache_in_worker(self.tenant)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lease.tenant_id = other.id
+            self.lease.save(update_fields=['tenant_id'])
+        self.assertIsNone(self.worker.get(self.tenant))
+
+    def test_unrelated_change_keeps_the_scope(self):
+        self.cache_in_worker(self.manager)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.property.monthly_rent = 1200
+            self.property.save(update_fields=['monthly_rent'])
+        self.assertIsNotNone(self.worker.get(self.manager))
+
+
+class LeaseSignalTests(TestCase):
+    def setUp(self):
+        landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        tenant = User.objects.create_user('tenant', 'tenant@example.com', 'pw', role=User.Role.TENANT)
+        self.first, self.second = (
+            Property.objects.create(
+                name=name, address='1 Main St', city='Cape Town', state='WC', zip_code='8001',
+                monthly_rent=1000, deposit_amount=500, owner=landlord,
+            )
+            for name in ('First', 'Second')
+        )
+        self.lease = Lease.objects.create(
+            property=self.first, tenant=tenant, start_date=date.today(),
+            end_date=date.today() + timedelta(days=365), rent_amount=1000, deposit_amount=500,
+        )
+
+    def test_moved_lease_frees_the_previous_property(self):
+        self.lease.property = self.second
+        self.lease.save()
+        self.assertFalse(PropertyOccupancy.objects.filter(property=self.first).exists())
+        self.assertTrue(PropertyOccupancy.objects.filter(property=self.second).exists())
+
+    def test_pre_save_reads_the_stored_row_once_per_snapshot(self):
+        # The rollup snapshot, which occupancy reuses, and the response cache tags
+        with CaptureQueriesContext(connection) as queries:
+            self.lease.save()
+        sql = [query['sql'] for query in queries]
+        update = next(n for n, statement in enumerate(sql) if statement.startswith('UPDATE "api_lease"'))
+        self.assertEqual(len([statement for statement in sql[:update] if 'FROM "api_lease"' in statement]), 2)
+
+
+class PropertySaveTests(TestCase):
+    """save() only re-derives amenity_flags and the location from changed fields."""
+
+    def setUp(self):
+        landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        # No centroid for the postcode, so the coordinates stay missing
+        Property.objects.create(
+            name='Flat', address='1 Main St', city='Cape Town', state='WC', zip_code='8001',
+            monthly_rent=1000, deposit_amount=500, amenities='parking', owner=landlord,
+        )
+        self.property = Property.objects.get()
+        for name, patcher in (
+            ('geocode', mock.patch('api.models.geocode', return_value=None)),
+            ('parse', mock.patch.object(amenity_vocabulary, 'parse', return_value=0)),
+        ):
+            setattr(self, name, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def test_status_only_saves_skip_both(self):
+        self.property.status = Property.Status.RENTED
+        self.property.save()
+        self.property.status = Property.Status.AVAILABLE
+        self.property.save(update_fields=['status'])
+        self.geocode.assert_not_called()
+        self.parse.assert_not_called()
+
+    def test_changed_amenities_are_parsed(self):
+        self.property.amenities = 'parking, pool'
+        self.property.save()
+        self.parse.assert_called_once_with('parking, pool')
+        self.geocode.assert_not_called()
+
+    def test_changed_postcode_is_geocoded(self):
+        self.property.zip_code = '8005'
+        self.property.save()
+        self.geocode.assert_called_once_with('United States', '8005')
+        self.parse.assert_not_called()
+
+    def test_update_fields_select_what_is_derived(self):
+        self.property.save(update_fields=['amenities', 'zip_code'])
+        self.parse.assert_called_once()
+        self.geocode.assert_called_once()
+
+
+class LeaseOverlapTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        self.tenant = User.objects.create_user('tenant', 'tenant@example.com', 'pw', role=User.Role.TENANT)
+        self.property = Property.objects.create(
+            name='Flat', address='1 Main St', city='Cape Town', state='WC', zip_code='8001',
+            monthly_rent=1000, deposit_amount=500, owner=self.landlord,
+        )
+        self.lease = Lease.objects.create(
+            property=self.property, tenant=self.tenant, start_date=date(2026, 1, 1), end_date=date(2026, 6, 30),
+            rent_amount=1000, deposit_amount=500,
+        )
+
+    def create(self, start_date, end_date, is_active=True):
+        return self.post('/leases/', self.landlord, json={
+            'property_id': self.property.id, 'tenant_id': self.tenant.id, 'start_date': start_date,
+            'end_date': end_date, 'rent_amount': 1000, 'deposit_amount': 500, 'is_active': is_active,
+        })
+
+    def test_overlapping_lease_is_rejected(self):
+        response = self.create('2026-06-30', '2026-12-31')
+        self.assertEqual(response.status_code, 409)
+        self.assertIn(str(self.lease.id), response.json()['detail'])
+
+    def test_lease_starting_the_day_after_is_accepted(self):
+        self.assertEqual(self.create('2026-07-01', '2026-12-31').status_code, 201)
+
+    def test_inactive_lease_may_overlap(self):
+        self.assertEqual(self.create('2026-03-01', '2026-04-30', is_active=False).status_code, 201)
+
+    def test_invalid_period_is_rejected(self):
+        self.assertEqual(self.create('2026-12-31', '2026-07-01').status_code, 400)
+        response = self.put(f'/leases/{self.lease.id}/', self.landlord, json={'start_date': 'not a date'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_update_is_checked_against_the_other_leases(self):
+        later = self.create('2026-07-01', '2026-12-31').json()
+        # Moving a lease within its own period does not conflict with itself
+        response = self.put(f'/leases/{self.lease.id}/', self.landlord, json={'end_date': '2026-06-15'})
+        self.assertEqual(response.status_code, 200)
+        response = self.put(f'/leases/{later["id"]}/', self.landlord, json={'start_date': '2026-06-01'})
+        self.assertEqual(response.status_code, 409)
+
+    def test_batch_conflicts(self):
+        other = Property.objects.create(
+            name='House', address='2 Main St', city='Cape Town', state='WC', zip_code='8001',
+            monthly_rent=1000, deposit_amount=500, owner=self.landlord,
+        )
+        conflicts = batch_conflicts([
+            (1, self.property.id, date(2026, 6, 1), date(2026, 7, 31)),   # stored lease and row 2
+            (2, self.property.id, date(2026, 7, 15), date(2026, 8, 31)),  # row 1
+            (3, self.property.id, date(2026, 9, 1), date(2026, 9, 30)),   # free
+            (4, other.id, date(2026, 1, 1), date(2026, 12, 31)),          # another property
+        ])
+        self.assertEqual(conflicts, {
+            1: {'leases': [self.lease.id], 'rows': [2]},
+            2: {'leases': [], 'rows': [1]},
+        })
+
+
+class GeocodeTests(TestCase):
+    def test_centroids_apply_without_a_restart(self):
+        self.assertIsNone(geocode('South Africa', '8001'))
+        centroid = PostcodeCentroid.objects.create(country_code='ZA', postal_code='8001', latitude=-33.9, longitude=18.4)
+        self.assertEqual(geocode('South Africa', '8001'), (-33.9, 18.4))
+        centroid.latitude = -33.92
+        centroid.save()
+        self.assertEqual(geocode('ZA', '8001'), (-33.92, 18.4))
+
+
+class PropertyCoordinateTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        self.property = Property.objects.create(
+            name='Flat', address='1 Main St', city='Cape Town', state='WC', zip_code='8001',
+            monthly_rent=1000, deposit_amount=500, owner=self.landlord,
+        )
+
+    def test_invalid_coordinates_are_rejected(self):
+        for coordinates in ({'latitude': 'north'}, {'latitude': 91}, {'longitude': -180.5}):
+            with self.subTest(coordinates=coordinates):
+                response = self.put(f'/properties/{self.property.id}/', self.landlord, json=coordinates)
+                self.assertEqual(response.status_code, 400)
+        self.property.refresh_from_db()
+        self.assertIsNone(self.property.geohash)
+
+    def test_create_validates_the_range(self):
+        response = self.post('/properties/', self.landlord, json={
+            'name': 'House', 'address': '2 Main St', 'city': 'Cape Town', 'state': 'WC', 'zip_code': '8001',
+            'category': 'RESIDENTIAL', 'bedrooms': 2, 'bathrooms': 1, 'square_feet': 900,
+            'monthly_rent': 1000, 'deposit_amount': 500, 'latitude': -91, 'longitude': 18.4,
+        })
+        self.assertEqual(response.status_code, 422)
+
+    def test_geohash_needs_both_coordinates(self):
+        Property.objects.filter(id=self.property.id).update(latitude=-33.9)
+        response = self.put(f'/properties/{self.property.id}/', self.landlord, json={'status': 'MAINTENANCE'})
+        self.assertEqual(response.status_code, 200)
+        self.property.refresh_from_db()
+        self.assertIsNone(self.property.geohash)
+
+
+class KeysetPaginationTests(PortfolioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_units(5)
+
+    def pages(self, path, user, limit):
+        """Follow X-Next-Cursor from the first page; the ids of each page."""
+        pages = []
+        cursor = None
+        while True:
+            params = {'limit': limit, **({'cursor': cursor} if cursor else {})}
+            response = self.get(path, user, params=params)
+            self.assertEqual(response.status_code, 200)
+            pages.append([row['id'] for row in response.json()])
+            cursor = response.headers.get('X-Next-Cursor')
+            if cursor is None:
+                return pages
+
+    def test_cursors_walk_the_whole_list(self):
+        # Ties on the sort column (one created_at for every property, one due
+        # date for every invoice) are broken by id
+        Property.objects.update(created_at=timezone.now())
+        for path in ('/properties/', '/leases/', '/invoices/', '/payments/'):
+            with self.subTest(path=path):
+                everything = [row['id'] for row in self.get(path, self.landlord, params={'limit': 100}).json()]
+                pages = self.pages(path, self.landlord, limit=2)
+                self.assertEqual([len(page) for page in pages], [2, 2, 1])
+                self.assertEqual([row_id for page in pages for row_id in page], everything)
+                self.assertEqual(everything, sorted(everything, reverse=True))
+
+    def test_last_full_page_has_no_cursor(self):
+        self.assertEqual([len(page) for page in self.pages('/properties/', self.landlord, limit=5)], [5])
+
+    def test_invalid_cursor_is_rejected(self):
+        for cursor in ('not-a-cursor', 'WyJ5ZXN0ZXJkYXkiLDFd'):
+            with self.subTest(cursor=cursor):
+                response = self.get('/properties/', self.landlord, params={'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+
+
+class NdjsonExportTests(PortfolioTestCase):
+    def test_chunks_join_into_the_whole_list(self):
+        self.add_units(5)
+        for path in ('/invoices/', '/payments/'):
+            listed = self.get(path, self.landlord, params={'limit': 100}).json()
+            queries = {}
+            # Chunks smaller than, dividing and larger than the row count
+            for chunk_size in (1, 2, 5, 100):
+                with self.subTest(path=path, chunk_size=chunk_size), self.settings(API_EXPORT_CHUNK_SIZE=chunk_size):
+                    response, queries[chunk_size] = self.count_queries('GET', f'{path}export/', self.landlord)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.headers['content-type'], 'application/x-ndjson')
+                    lines = response.content.decode().splitlines()
+                    self.assertEqual([json.loads(line) for line in lines], listed)
+            # One query per chunk; a chunk that ends the rows needs no follow-up
+            self.assertEqual(
+                {chunk_size: count - queries[100] for chunk_size, count in queries.items()},
+                {1: 4, 2: 2, 5: 0, 100: 0},
+            )
+
+
+def legacy_property_statistics(property):
+    """The per-property queries and Python loops property_statistics replaced."""
+    total_leases = Lease.objects.filter(property=property).count()
+    total_invoiced = Invoice.objects.filter(property=property).aggregate(Sum('amount'))['amount__sum'] or 0
+    total_collected = Payment.objects.filter(invoice__property=property).aggregate(Sum('amount'))['amount__sum'] or 0
+    total_days = sum((lease.end_date - lease.start_date).days for lease in Lease.objects.filter(property=property))
+    requests = MaintenanceRequest.objects.filter(property=property)
+    resolved = requests.filter(status=MaintenanceRequest.Status.RESOLVED, resolved_at__isnull=False)
+    resolution_days = sum((req.resolved_at.date() - req.created_at.date()).days for req in resolved)
+    return {
+        "lease_statistics": {
+            "total_leases": total_leases,
+            "current_leases": Lease.objects.filter(property=property, is_active=True).count(),
+            "average_lease_duration_days": total_days // total_leases if total_leases > 0 else 0
+        },
+        "financial_statistics": {
+            "total_invoiced": total_invoiced,
+            "total_collected": total_collected,
+            "collection_rate": round(total_collected / total_invoiced * 100, 2) if total_invoiced > 0 else 0
+        },
+        "maintenance_statistics": {
+            "total_requests": requests.count(),
+            "requests_by_priority": {
+                priority: requests.filter(priority=priority).count() for priority in MaintenanceRequest.Priority
+            },
+            "requests_by_status": {
+                status: requests.filter(status=status).count() for status in MaintenanceRequest.Status
+            },
+            "average_resolution_days": resolution_days // resolved.count() if resolved.count() > 0 else 0,
+            "total_maintenance_cost": requests.aggregate(Sum('actual_cost'))['actual_cost__sum'] or 0
+        }
+    }
+
+
+class PropertyStatisticsTests(PortfolioTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_units(3)
+        self.properties = list(Property.objects.order_by('id'))
+        busy, quiet = self.properties[0], self.properties[1]
+        today = date.today()
+        # An older, inactive lease of another length and a part-paid invoice
+        lease = Lease.objects.create(
+            property=busy, tenant=self.tenant, start_date=today - timedelta(days=400),
+            end_date=today - timedelta(days=35), rent_amount=900, deposit_amount=500, is_active=False,
+        )
+        invoice = Invoice.objects.create(
+            tenant=self.tenant, property=busy, lease=lease, amount=Decimal('900'), description='Rent', due_date=today,
+        )
+        Payment.objects.create(
+            invoice=invoice, amount=Decimal('333.33'), payment_date=timezone.now(), payment_method=Payment.Method.CASH,
+        )
+        # Requests of every priority and status; resolution days are counted
+        # in calendar days, so one resolved request crosses a midnight
+        opened = timezone.now().replace(hour=23, minute=30) - timedelta(days=10)
+        for n, (priority, status, hours) in enumerate((
+            (MaintenanceRequest.Priority.LOW, MaintenanceRequest.Status.RESOLVED, 1),
+            (MaintenanceRequest.Priority.HIGH, MaintenanceRequest.Status.RESOLVED, 75),
+            (MaintenanceRequest.Priority.EMERGENCY, MaintenanceRequest.Status.IN_PROGRESS, None),
+            (MaintenanceRequest.Priority.MEDIUM, MaintenanceRequest.Status.CANCELLED, None),
+        )):
+            request = MaintenanceRequest.objects.create(
+                property=busy, tenant=self.tenant, title='Leak', description='Bathroom tap', priority=priority,
+                status=status, actual_cost=Decimal('120.50') * n or None,
+            )
+            MaintenanceRequest.objects.filter(id=request.id).update(
+                created_at=opened, resolved_at=opened + timedelta(hours=hours) if hours else None,
+            )
+        # Nothing at all on the quiet property
+        quiet.leases.all().delete()
+        quiet.maintenance_requests.all().delete()
+
+    def test_matches_the_per_property_loop(self):
+        for property in self.properties:
+            with self.subTest(property=property.name):
+                expected = legacy_property_statistics(property)
+                self.assertEqual(self.main.property_statistics([property.id])[property.id], expected)
+                response = self.get(f'/properties/{property.id}/statistics/', self.landlord)
+                self.assertEqual(response.json(), jsonable_encoder(expected))
+
+    def test_batch_matches_single_requests(self):
+        ids = [property.id for property in self.properties]
+        response, queries = self.count_queries('POST', '/properties/statistics/', self.manager, json={'property_ids': ids})
+        self.assertEqual(response.status_code, 200)
+        for property_id in ids:
+            single = self.get(f'/properties/{property_id}/statistics/', self.manager).json()
+            self.assertEqual(response.json()[str(property_id)], single)
+        self.add_units(3)
+        ids = list(Property.objects.values_list('id', flat=True))
+        response, more_queries = self.count_queries(
+            'POST', '/properties/statistics/', self.manager, json={'property_ids': ids}
+        )
+        self.assertEqual(len(response.json()), 6)
+        self.assertEqual(more_queries, queries)
+
+    def test_batch_is_checked_against_the_scope(self):
+        other = User.objects.create_user('other', 'other@example.com', 'pw', role=User.Role.LANDLORD)
+        ids = [property.id for property in self.properties]
+        response = self.post('/properties/statistics/', other, json={'property_ids': ids})
+        self.assertEqual(response.status_code, 403)
+        response = self.post('/properties/statistics/', self.landlord, json={'property_ids': ids + [0]})
+        self.assertEqual(response.status_code, 404)
+
+
+class AvailableCatalogTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+        self.landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'pw', role=User.Role.ADMIN)
+        for n, (status, bedrooms) in enumerate(((Property.Status.AVAILABLE, 2), (Property.Status.AVAILABLE, 3),
+                                                (Property.Status.RENTED, 2))):
+            Property.objects.create(
+                name=f'Unit {n}', address=f'{n} Main St', city='Cape Town', state='WC', zip_code='8001',
+                bedrooms=bedrooms, monthly_rent=1000, deposit_amount=500, status=status, owner=self.landlord,
+            )
+
+    def test_lists_what_the_property_list_does(self):
+        for params in ({}, {'min_bedrooms': 3}, {'limit': 1}):
+            with self.subTest(params=params):
+                response = self.get('/properties/available/', params=params)
+                listed = self.get('/properties/', self.admin, params={'status': 'AVAILABLE', **params})
+                self.assertEqual(response.json(), listed.json())
+                self.assertEqual(response.headers.get('X-Next-Cursor'), listed.headers.get('X-Next-Cursor'))
+
+    def test_matching_etag_gets_304(self):
+        response = self.get('/properties/available/')
+        etag = response.headers['ETag']
+        self.assertIn('max-age=', response.headers['Cache-Control'])
+        for if_none_match in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+            with self.subTest(if_none_match=if_none_match):
+                revalidated = self.get('/properties/available/', headers={'If-None-Match': if_none_match})
+                self.assertEqual(revalidated.status_code, 304)
+                self.assertEqual(revalidated.content, b'')
+                self.assertEqual(revalidated.headers['ETag'], etag)
+        self.assertEqual(self.get('/properties/available/', headers={'If-None-Match': '"other"'}).status_code, 200)
+
+    def test_filters_have_their_own_etags(self):
+        everything = self.get('/properties/available/').headers['ETag']
+        larger = self.get('/properties/available/', params={'min_bedrooms': 3}).headers['ETag']
+        self.assertNotEqual(everything, larger)
+
+    def test_snapshot_is_reused_until_a_property_changes(self):
+        etag = self.get('/properties/available/').headers['ETag']
+        catalog = self.main.available_catalog
+        builds = catalog.builds
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.get('/properties/available/').headers['ETag'], etag)
+        self.assertEqual((catalog.builds, len(queries)), (builds, 0))
+
+        # The ETag hashes the page, so a save changing nothing listed keeps it
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.filter(status=Property.Status.RENTED).get().save(update_fields=['status'])
+        self.assertEqual(self.get('/properties/available/').headers['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rented = Property.objects.get(status=Property.Status.RENTED)
+            rented.status = Property.Status.AVAILABLE
+            rented.save()
+        response = self.get('/properties/available/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(len(response.json()), 3)
+
+
+@skipUnless(fulltext.available(), "the full-text index is SQLite only")
+class FulltextTriggerTests(TestCase):
+    def setUp(self):
+        self.landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        self.property = Property.objects.create(
+            name='Harbour Loft', address='1 Dock Rd', city='Cape Town', state='WC', zip_code='8001',
+            monthly_rent=1000, deposit_amount=500, description='Sea views', amenities='pool', owner=self.landlord,
+        )
+
+    def indexed(self, term):
+        """Ids of the properties the FTS index itself holds ``term`` for."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {fulltext.FTS_TABLE} WHERE {fulltext.FTS_TABLE} MATCH %s",
+                [fulltext.match_expression([term])],
+            )
+            return {row[0] for row in cursor.fetchall()}
+
+    def assertIndexConsistent(self):
+        # With rank 1, FTS5 also checks the index against api_property
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {fulltext.FTS_TABLE}({fulltext.FTS_TABLE}, rank) VALUES ('integrity-check', 1)"
+            )
+
+    def test_insert_is_indexed(self):
+        self.assertEqual(self.indexed('harbour'), {self.property.id})
+        self.assertEqual(self.indexed('sea'), {self.property.id})
+        self.assertIndexConsistent()
+
+    def test_saved_text_replaces_the_old_terms(self):
+        self.property.name = 'Garden Cottage'
+        self.property.amenities = 'parking'
+        self.property.save()
+        self.assertEqual(self.indexed('harbour'), set())
+        self.assertEqual(self.indexed('pool'), set())
+        self.assertEqual(self.indexed('cottage'), {self.property.id})
+        self.assertEqual(self.indexed('parking'), {self.property.id})
+        self.assertIndexConsistent()
+
+    def test_bulk_update_is_indexed(self):
+        Property.objects.filter(id=self.property.id).update(description='Mountain views')
+        self.assertEqual(self.indexed('sea'), set())
+        self.assertEqual(self.indexed('mountain'), {self.property.id})
+        self.assertIndexConsistent()
+
+    def test_other_columns_leave_the_index_alone(self):
+        Property.objects.filter(id=self.property.id).update(status=Property.Status.RENTED, monthly_rent=1200)
+        self.assertEqual(self.indexed('harbour'), {self.property.id})
+        self.assertIndexConsistent()
+
+    def test_delete_removes_the_terms(self):
+        other = Property.objects.create(
+            name='Harbour View', address='2 Dock Rd', city='Cape Town', state='WC', zip_code='8001',
+            monthly_rent=1000, deposit_amount=500, owner=self.landlord,
+        )
+        self.property.delete()
+        self.assertEqual(self.indexed('harbour'), {other.id})
+        Property.objects.filter(id=other.id).delete()
+        self.assertEqual(self.indexed('harbour'), set())
+        self.assertIndexConsistent()
+
+
+class AmenityVocabularyTests(TestCase):
+    def setUp(self):
+        # The seeded vocabulary, as the migration created it
+        self.addCleanup(amenity_vocabulary.reset)
+        amenity_vocabulary.reset()
+
+    def flags(self, *codes):
+        return amenity_vocabulary.mask(codes)
+
+    def test_parse_matches_codes_names_and_aliases(self):
+        for text, codes in (
+            ('', ()),
+            ('Off-street PARKING, swimming pool and fibre', ('parking', 'pool', 'wifi')),
+            ('Wi-Fi, wi fi and WiFi', ('wifi',)),
+            ('air conditioning and aircon', ('air_conditioning',)),
+            ('lift to a patio with CCTV', ('elevator', 'balcony', 'security')),
+            ('24-hour   security', ('security',)),
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(amenity_vocabulary.parse(text), self.flags(*codes))
+
+    def test_parse_needs_whole_words(self):
+        for text in ('carpool', 'gymnasium', 'liftoff', 'poolside'):
+            with self.subTest(text=text):
+                self.assertEqual(amenity_vocabulary.parse(text), 0)
+
+    def test_mask_and_codes_round_trip(self):
+        mask = amenity_vocabulary.mask(['pool', 'parking', 'backup_power'])
+        self.assertEqual(mask, 1 << 0 | 1 << 1 | 1 << 16)
+        self.assertEqual(amenity_vocabulary.codes(mask), ['parking', 'pool', 'backup_power'])
+        self.assertEqual(amenity_vocabulary.mask([]), 0)
+
+    def test_mask_rejects_unknown_codes(self):
+        with self.assertRaisesMessage(UnknownAmenity, 'Unknown amenities: sauna, moat'):
+            amenity_vocabulary.mask(['pool', 'sauna', 'moat'])
+
+    def test_vocabulary_changes_apply_to_later_saves(self):
+        self.assertEqual(amenity_vocabulary.parse('sauna'), 0)
+        Amenity.objects.create(code='sauna', name='Sauna', bit=17, aliases='steam room')
+        self.assertEqual(amenity_vocabulary.parse('a steam room'), self.flags('sauna'))
+
+
+class AmenityFilterTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(amenity_vocabulary.reset)
+        amenity_vocabulary.reset()
+        self.landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        self.properties = {
+            amenities: Property.objects.create(
+                name=amenities or 'Bare', address='1 Main St', city='Cape Town', state='WC', zip_code='8001',
+                monthly_rent=1000, deposit_amount=500, amenities=amenities, owner=self.landlord,
+            )
+            for amenities in ('garage and a swimming pool', 'carport', 'pool, gym', '')
+        }
+
+    def listed(self, amenities):
+        response = self.get('/properties/', self.landlord, params={'amenities': amenities})
+        self.assertEqual(response.status_code, 200)
+        return {row['amenities'] for row in response.json()}
+
+    def test_every_listed_amenity_is_required(self):
+        self.assertEqual(self.listed('parking'), {'garage and a swimming pool', 'carport'})
+        self.assertEqual(self.listed('pool'), {'garage and a swimming pool', 'pool, gym'})
+        self.assertEqual(self.listed('parking, pool'), {'garage and a swimming pool'})
+        self.assertEqual(self.listed('parking,gym'), set())
+
+    def test_edited_amenities_are_reparsed(self):
+        carport = self.properties['carport']
+        carport.amenities = 'carport, gym'
+        carport.save()
+        self.assertEqual(self.listed('parking,gym'), {'carport, gym'})
+
+    def test_unknown_amenity_is_rejected(self):
+        response = self.get('/properties/', self.landlord, params={'amenities': 'pool,sauna'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['detail'], 'Unknown amenities: sauna')
+
+
+class LeaseImportTests(ApiTestCase):
+    HEADER = 'property_id,tenant_id,start_date,end_date,rent_amount,deposit_amount\n'
+
+    def setUp(self):
+        super().setUp()
+        self.landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        self.tenant = User.objects.create_user('tenant', 'tenant@example.com', 'pw', role=User.Role.TENANT)
+        self.properties = [
+            Property.objects.create(
+                name=f'Unit {n}', address=f'{n} Main St', city='Cape Town', state='WC', zip_code='8001',
+                monthly_rent=1000, deposit_amount=500, owner=self.landlord,
+            )
+            for n in range(3)
+        ]
+
+    def row(self, property, start_date='2026-01-01', end_date='2026-12-31', tenant_id=None):
+        return f'{property.id},{tenant_id or self.tenant.id},{start_date},{end_date},1000,500\n'
+
+    def upload(self, *rows):
+        content = self.HEADER + ''.join(rows)
+        return self.post('/leases/import/', self.landlord, files={'file': ('leases.csv', content, 'text/csv')})
+
+    def assertNothingImported(self):
+        self.assertFalse(Lease.objects.exists())
+        self.assertFalse(Property.objects.filter(status=Property.Status.RENTED).exists())
+
+    def test_valid_upload_creates_every_lease(self):
+        response = self.upload(*(self.row(property) for property in self.properties))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {'created': 3, 'properties_rented': 3, 'dry_run': False})
+        self.assertEqual(Lease.objects.count(), 3)
+        self.assertEqual(Property.objects.filter(status=Property.Status.RENTED).count(), 3)
+
+    def test_one_bad_row_rejects_the_whole_upload(self):
+        response = self.upload(
+            self.row(self.properties[0]),
+            self.row(self.properties[1]),
+            self.row(self.properties[2], tenant_id=self.landlord.id),
+        )
+        self.assertEqual(response.status_code, 400)
+        # Line 1 is the header
+        self.assertEqual(response.json()['detail']['errors'], [{'line': 4, 'errors': ['Tenant not found']}])
+        self.assertNothingImported()
+
+    def test_failure_while_writing_rolls_back_the_inserted_leases(self):
+        rows = read_rows(self.HEADER + ''.join(self.row(property) for property in self.properties), 'csv')
+        with mock.patch('api.lease_import.rollups.rebuild', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                import_leases(rows, self.landlord)
+        self.assertNothingImported()
+
+    def test_rows_overlapping_each_other_are_rejected(self):
+        response = self.upload(
+            self.row(self.properties[0], '2026-01-01', '2026-06-30'),
+            self.row(self.properties[0], '2026-06-30', '2026-12-31'),
+            self.row(self.properties[1]),
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['detail']['errors'], [
+            {'line': 2, 'errors': ['Lease overlaps line(s) 3 of this import']},
+            {'line': 3, 'errors': ['Lease overlaps line(s) 2 of this import']},
+        ])
+        self.assertNothingImported()
 
-# Create your tests here.
+    def test_rows_back_to_back_are_accepted(self):
+        response = self.upload(
+            self.row(self.properties[0], '2026-01-01', '2026-06-30'),
+            self.row(self.properties[0], '2026-07-01', '2026-12-31'),
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 2)
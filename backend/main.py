@@ -1,16 +1,20 @@
 # main.py
 import os
 import sys
+import bisect
+import hashlib
+import itertools
 import django
+from contextlib import asynccontextmanager
 from typing import List, Optional, Dict, Any
-from datetime import datetime, date
+from datetime import datetime, date, timedelta, timezone as dt_timezone
 from decimal import Decimal
-from fastapi import FastAPI, HTTPException, Depends, Query, Path, Body, UploadFile, File, Form, status
+from fastapi import FastAPI, HTTPException, Depends, Query, Path, Body, UploadFile, File, Form, Request, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, EmailStr
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field, EmailStr, ValidationError
 import jwt
-from passlib.context import CryptContext
 import uvicorn
 
 # Set up Django integration
@@ -18,24 +22,57 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "rentalhub.settings")
 django.setup()
 
 # Import Django models
-from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import check_password, make_password
 from users.models import User
+from users.cache import user_cache
 from api.models import (
     Property, PropertyImage, PropertyDocument, Lease
 )
+from analytics.models import PropertyAnalytics, PortfolioCounters
+from analytics.counters import record_transition, move_property, counters_query, status_counts
+from analytics.rollups import load_rollups
+from api.scopes import PropertyScope, scope_cache, peek_property_scope, get_property_scope
+from api.search import search_index
+from api import fulltext, geo, occupancy
+from api.lease_overlaps import InvalidLeasePeriod, lease_conflicts, lease_period
+from api.lease_import import LeaseImportError, import_leases, read_rows, upload_format
+from api.amenities import amenity_vocabulary, UnknownAmenity
 
 from notifications.models import (MaintenanceRequest,MaintenanceImage,MaintenanceComment)
 from payments.models import Invoice, Payment
 from notifications.models import Notification
-from django.db.models import Q, Sum, Count
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, Sum, Count, DurationField, ExpressionWrapper
+from django.db.models.functions import TruncDate
+from django.db.models.lookups import Exact
 from django.utils import timezone
 from django.core.files.base import ContentFile
+from rentalhub.db import (
+    db_endpoint, run_db, shutdown_db_executor,
+    fetch_all, fetch_first, fetch_count, fetch_aggregate
+)
+from rentalhub.pagination import KeysetPagination, InvalidCursor
+from rentalhub.responses import FastJSONResponse, dumps
+from rentalhub.response_cache import cached_response, response_cache, response_flights
+from rentalhub.hashing import hashing_pool, HashingPoolBusy
+from rentalhub.singleflight import SingleFlight
+from security.throttling import login_throttle, login_attempts
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    login_attempts.start()
+    yield
+    await login_attempts.stop()
+    hashing_pool.shutdown()
+    shutdown_db_executor()
 
 # Create FastAPI app
 app = FastAPI(
     title="RentalHub API",
     description="API for the RentalHub property management system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -45,10 +82,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Authentication setup
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 SECRET_KEY = "your-secret-key"  # Replace with your actual secret key from settings
@@ -99,6 +136,14 @@ class PropertyBase(BaseModel):
     deposit_amount: Decimal
     description: Optional[str] = None
     amenities: Optional[str] = None
+    # Geocoded from zip_code and country when not given
+    latitude: Optional[float] = Field(None, ge=-90, le=90, allow_inf_nan=False)
+    longitude: Optional[float] = Field(None, ge=-180, le=180, allow_inf_nan=False)
+
+class PropertyCoordinates(BaseModel):
+    """The coordinate fields of PropertyBase, to validate partial updates."""
+    latitude: Optional[float] = PropertyBase.model_fields["latitude"]
+    longitude: Optional[float] = PropertyBase.model_fields["longitude"]
 
 class PropertyCreate(PropertyBase):
     pass
@@ -193,15 +238,20 @@ class PaymentResponse(PaymentBase):
     property_name: str
 
 # Authentication functions
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def run_hasher(func, *args):
+    """Run a password hashing function on the bounded hashing pool."""
+    try:
+        return await hashing_pool.run(func, *args)
+    except HashingPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
 
 def create_access_token(data: dict):
     to_encode = data.copy()
-    expire = datetime.utcnow() + ACCESS_TOKEN_EXPIRE_MINUTES
+    expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
@@ -221,11 +271,44 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     except jwt.PyJWTError:
         raise credentials_exception
     
-    user = User.objects.filter(username=token_data.username).first()
+    user = user_cache.get(token_data.username)
     if user is None:
-        raise credentials_exception
+        version = user_cache.version()
+        user = await run_db(User.objects.filter(username=token_data.username).first)
+        if user is None:
+            raise credentials_exception
+        user_cache.set(user, version)
     return user
 
+async def get_current_scope(current_user: User = Depends(get_current_user)) -> PropertyScope:
+    # Checking a cached scope against a remote generation store is network
+    # I/O, so then the whole lookup runs on the executor
+    scope = peek_property_scope(current_user) if scope_cache.inline else None
+    if scope is None:
+        scope = await run_db(get_property_scope, current_user)
+    return scope
+
+# Query plans declare the relations each *_to_response converter reads. Every
+# queryset whose rows are passed to a converter applies the matching plan, so
+# converting a row never triggers additional queries.
+class QueryPlan:
+    def __init__(self, select_related=(), prefetch_related=()):
+        self.select_related = tuple(select_related)
+        self.prefetch_related = tuple(prefetch_related)
+
+    def apply(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset
+
+PROPERTY_RESPONSE_PLAN = QueryPlan(prefetch_related=['images'])
+LEASE_RESPONSE_PLAN = QueryPlan(select_related=['property', 'tenant'])
+MAINTENANCE_RESPONSE_PLAN = QueryPlan(select_related=['tenant', 'assigned_to'])
+INVOICE_RESPONSE_PLAN = QueryPlan(select_related=['property', 'tenant'])
+PAYMENT_RESPONSE_PLAN = QueryPlan(select_related=['invoice__property', 'invoice__tenant'])
+
 # Helper functions to convert Django model instances to Pydantic models
 def user_to_response(user: User) -> UserResponse:
     return UserResponse(
@@ -266,6 +349,8 @@ def property_to_response(prop: Property) -> PropertyResponse:
         deposit_amount=prop.deposit_amount,
         description=prop.description,
         amenities=prop.amenities,
+        latitude=prop.latitude,
+        longitude=prop.longitude,
         owner_id=prop.owner_id,
         property_manager_id=prop.property_manager_id,
         created_at=prop.created_at,
@@ -345,15 +430,248 @@ def payment_to_response(payment: Payment) -> PaymentResponse:
         property_name=payment.invoice.property.name
     )
 
+# Fast list serialization: list and export endpoints read only the columns
+# they need with .values() and build plain dicts in the same shape and key
+# order as the response models, skipping per-row Pydantic construction.
+PROPERTY_ROW_FIELDS = (
+    'id', 'name', 'address', 'city', 'state', 'zip_code', 'country', 'category',
+    'bedrooms', 'bathrooms', 'square_feet', 'monthly_rent', 'deposit_amount',
+    'description', 'amenities', 'latitude', 'longitude', 'status', 'owner_id',
+    'property_manager_id', 'created_at', 'updated_at'
+)
+
+def property_images_by_property(property_ids) -> Dict[int, List[Dict[str, Any]]]:
+    storage = PropertyImage._meta.get_field('image').storage
+    images = {}
+    rows = PropertyImage.objects.filter(property_id__in=property_ids).order_by('id').values_list(
+        'property_id', 'id', 'image', 'caption', 'is_primary'
+    )
+    for property_id, image_id, name, caption, is_primary in rows:
+        images.setdefault(property_id, []).append({
+            "id": image_id,
+            "url": storage.url(name),
+            "caption": caption,
+            "is_primary": is_primary
+        })
+    return images
+
+def property_row_to_dict(row: dict, images: List[Dict[str, Any]]) -> dict:
+    return {
+        "name": row["name"],
+        "address": row["address"],
+        "city": row["city"],
+        "state": row["state"],
+        "zip_code": row["zip_code"],
+        "country": row["country"],
+        "category": row["category"],
+        "bedrooms": row["bedrooms"],
+        "bathrooms": row["bathrooms"],
+        "square_feet": row["square_feet"],
+        "monthly_rent": row["monthly_rent"],
+        "deposit_amount": row["deposit_amount"],
+        "description": row["description"],
+        "amenities": row["amenities"],
+        "latitude": row["latitude"],
+        "longitude": row["longitude"],
+        "id": row["id"],
+        "status": row["status"],
+        "owner_id": row["owner_id"],
+        "property_manager_id": row["property_manager_id"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "images": images
+    }
+
+LEASE_ROW_FIELDS = (
+    'id', 'property_id', 'tenant_id', 'start_date', 'end_date', 'rent_amount',
+    'deposit_amount', 'is_active', 'created_at', 'updated_at',
+    'property__name', 'tenant__first_name', 'tenant__last_name'
+)
+
+def lease_row_to_dict(row: dict) -> dict:
+    return {
+        "property_id": row["property_id"],
+        "tenant_id": row["tenant_id"],
+        "start_date": row["start_date"],
+        "end_date": row["end_date"],
+        "rent_amount": row["rent_amount"],
+        "deposit_amount": row["deposit_amount"],
+        "is_active": row["is_active"],
+        "id": row["id"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "property_name": row["property__name"],
+        "tenant_name": f"{row['tenant__first_name']} {row['tenant__last_name']}"
+    }
+
+MAINTENANCE_ROW_FIELDS = (
+    'id', 'property_id', 'title', 'description', 'priority', 'tenant_id',
+    'tenant__first_name', 'tenant__last_name', 'status', 'assigned_to_id',
+    'assigned_to__first_name', 'assigned_to__last_name', 'created_at',
+    'updated_at', 'resolved_at', 'estimated_cost', 'actual_cost'
+)
+
+def maintenance_row_to_dict(row: dict) -> dict:
+    assigned_to_name = None
+    if row["assigned_to_id"]:
+        assigned_to_name = f"{row['assigned_to__first_name']} {row['assigned_to__last_name']}"
+    
+    return {
+        "property_id": row["property_id"],
+        "title": row["title"],
+        "description": row["description"],
+        "priority": row["priority"],
+        "id": row["id"],
+        "tenant_id": row["tenant_id"],
+        "tenant_name": f"{row['tenant__first_name']} {row['tenant__last_name']}",
+        "status": row["status"],
+        "assigned_to_id": row["assigned_to_id"],
+        "assigned_to_name": assigned_to_name,
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "resolved_at": row["resolved_at"],
+        "estimated_cost": row["estimated_cost"],
+        "actual_cost": row["actual_cost"]
+    }
+
+INVOICE_ROW_FIELDS = (
+    'id', 'tenant_id', 'property_id', 'lease_id', 'amount', 'description',
+    'due_date', 'status', 'created_at', 'updated_at',
+    'tenant__first_name', 'tenant__last_name', 'property__name'
+)
+
+def invoice_row_to_dict(row: dict) -> dict:
+    return {
+        "tenant_id": row["tenant_id"],
+        "property_id": row["property_id"],
+        "lease_id": row["lease_id"],
+        "amount": row["amount"],
+        "description": row["description"],
+        "due_date": row["due_date"],
+        "id": row["id"],
+        "status": row["status"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "tenant_name": f"{row['tenant__first_name']} {row['tenant__last_name']}",
+        "property_name": row["property__name"]
+    }
+
+PAYMENT_ROW_FIELDS = (
+    'id', 'invoice_id', 'amount', 'payment_method', 'transaction_id', 'notes',
+    'payment_date', 'created_at', 'invoice__amount', 'invoice__tenant_id',
+    'invoice__tenant__first_name', 'invoice__tenant__last_name',
+    'invoice__property_id', 'invoice__property__name'
+)
+
+def payment_row_to_dict(row: dict) -> dict:
+    return {
+        "invoice_id": row["invoice_id"],
+        "amount": row["amount"],
+        "payment_method": row["payment_method"],
+        "transaction_id": row["transaction_id"],
+        "notes": row["notes"],
+        "id": row["id"],
+        "payment_date": row["payment_date"],
+        "created_at": row["created_at"],
+        "invoice_amount": row["invoice__amount"],
+        "tenant_id": row["invoice__tenant_id"],
+        "tenant_name": f"{row['invoice__tenant__first_name']} {row['invoice__tenant__last_name']}",
+        "property_id": row["invoice__property_id"],
+        "property_name": row["invoice__property__name"]
+    }
+
+NOTIFICATION_ROW_FIELDS = (
+    'id', 'type', 'title', 'message', 'is_read', 'content_type', 'object_id', 'created_at'
+)
+
+# Keyset pagination for the list endpoints. The page is returned as the usual
+# JSON array; the cursor for the following page is sent in the X-Next-Cursor
+# header and is absent on the last page.
+PROPERTY_PAGINATION = KeysetPagination(Property, 'created_at')
+LEASE_PAGINATION = KeysetPagination(Lease, 'created_at')
+MAINTENANCE_PAGINATION = KeysetPagination(MaintenanceRequest, 'created_at')
+INVOICE_PAGINATION = KeysetPagination(Invoice, 'due_date')
+PAYMENT_PAGINATION = KeysetPagination(Payment, 'payment_date')
+NOTIFICATION_PAGINATION = KeysetPagination(Notification, 'created_at')
+
+def page_limit(limit: int = Query(settings.API_PAGE_SIZE, ge=1, le=settings.API_MAX_PAGE_SIZE)):
+    return limit
+
+def paginate(pagination: KeysetPagination, queryset, cursor: Optional[str], limit: int):
+    try:
+        return pagination.page(queryset, cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def list_response(rows: List[dict], next_cursor: Optional[str]) -> FastJSONResponse:
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return FastJSONResponse(rows, headers=headers)
+
+async def stream_ndjson(pagination: KeysetPagination, queryset, row_to_dict):
+    """
+    Stream every row of a ``.values()`` queryset as newline-delimited JSON,
+    shaped by ``row_to_dict``. Rows are read
+    in keyset-paginated chunks of API_EXPORT_CHUNK_SIZE, each one a separate
+    short query, so memory stays flat regardless of the result size and no
+    database cursor is held open while the client is reading.
+    """
+    chunk_size = settings.API_EXPORT_CHUNK_SIZE
+    cursor = None
+    while True:
+        rows = await fetch_all(pagination.page(queryset, cursor, chunk_size))
+        rows, cursor = pagination.split(rows, chunk_size)
+        if rows:
+            yield b"".join(dumps(row_to_dict(row)) + b"\n" for row in rows)
+        if not cursor:
+            break
+
 # API endpoints
+# Handlers that touch the ORM are plain functions wrapped with @db_endpoint, so
+# their bodies run on the bounded DB executor instead of the event loop.
 @app.get("/status")
 async def get_status():
 	return {"status": "ok"}
 
 @app.post("/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate(username=form_data.username, password=form_data.password)
-    if not user:
+async def login_for_access_token(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
+    ip_address = request.client.host if request.client else None
+    
+    # Reject throttled usernames/IPs before doing any database or hashing
+    # work. The attempt's slot is reserved, as a failure, before hashing, so
+    # concurrent attempts cannot exceed the limit between check and record.
+    retry_after, reservation = login_throttle.reserve(form_data.username, ip_address)
+    if retry_after:
+        login_attempts.record(
+            form_data.username, ip_address, request.headers.get("user-agent", ""), False
+        )
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, please try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+    
+    try:
+        user = await run_db(User.objects.filter(username=form_data.username).first)
+        if user is None:
+            # Hash anyway so unknown usernames take as long as wrong passwords,
+            # like Django's ModelBackend does
+            await run_hasher(make_password, form_data.password)
+            is_valid = False
+        else:
+            is_valid = await run_hasher(check_password, form_data.password, user.password)
+    except BaseException:
+        # The attempt never got an answer, e.g. the hashing pool was busy
+        login_throttle.cancel(reservation)
+        raise
+    
+    success = bool(is_valid and user.is_active)
+    if success:
+        login_throttle.succeeded(reservation)
+    login_attempts.record(
+        form_data.username, ip_address, request.headers.get("user-agent", ""), success
+    )
+    
+    if not success:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -370,15 +688,12 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
 
 @app.post("/users/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_user(user: UserCreate):
-    db_user = User.objects.filter(username=user.username).first()
-    if db_user:
+    if await run_db(User.objects.filter(username=user.username).exists):
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    db_user = User.objects.filter(email=user.email).first()
-    if db_user:
+    if await run_db(User.objects.filter(email=user.email).exists):
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -387,8 +702,8 @@ async def create_user(user: UserCreate):
         role=user.role,
         phone_number=user.phone_number
     )
-    db_user.set_password(user.password)
-    db_user.save()
+    db_user.password = await run_hasher(make_password, user.password)
+    await run_db(db_user.save)
     
     return user_to_response(db_user)
 
@@ -411,17 +726,18 @@ async def update_user(
     
     # Update password if provided
     if "password" in user_data and user_data["password"]:
-        current_user.set_password(user_data["password"])
+        current_user.password = await run_hasher(make_password, user_data["password"])
     
-    current_user.save()
+    await run_db(current_user.save)
     return user_to_response(current_user)
 
 @app.post("/users/me/profile-image/")
-async def upload_profile_image(
+@db_endpoint
+def upload_profile_image(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user)
 ):
-    content = await file.read()
+    content = file.file.read()
     current_user.profile_image.save(
         file.filename,
         ContentFile(content)
@@ -432,13 +748,29 @@ async def upload_profile_image(
 
 # Property endpoints
 @app.get("/properties/", response_model=List[PropertyResponse])
-async def list_properties(
+@cached_response(
+    tags=lambda available_from=None, available_to=None, **_: ["occupancy"] if available_from or available_to else [],
+    by_property_scope=True
+)
+@db_endpoint
+def list_properties(
     status: Optional[str] = None,
     category: Optional[str] = None,
     city: Optional[str] = None,
     min_bedrooms: Optional[int] = None,
     max_rent: Optional[float] = None,
-    current_user: User = Depends(get_current_user)
+    amenities: Optional[str] = None,
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    radius_km: Optional[float] = None,
+    bbox: Optional[str] = None,
+    available_from: Optional[date] = None,
+    available_to: Optional[date] = None,
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_limit),
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Base query
     query = Q()
@@ -446,7 +778,7 @@ async def list_properties(
     # Filter based on user role
     if current_user.is_tenant():
         # Tenants see available properties and their rented ones
-        query &= Q(status=Property.Status.AVAILABLE) | Q(leases__tenant=current_user, leases__is_active=True)
+        query &= Q(status=Property.Status.AVAILABLE) | scope.filter('id')
     elif current_user.is_property_manager():
         # Property managers see properties they manage
         query &= Q(property_manager=current_user)
@@ -466,12 +798,292 @@ async def list_properties(
         query &= Q(bedrooms__gte=min_bedrooms)
     if max_rent:
         query &= Q(monthly_rent__lte=max_rent)
+    if amenities:
+        # Every listed amenity, e.g. amenities=parking,pool
+        try:
+            mask = amenity_vocabulary.mask([code.strip() for code in amenities.split(",") if code.strip()])
+        except UnknownAmenity as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query &= Q(Exact(F("amenity_flags").bitand(mask), mask))
+    if available_from or available_to:
+        # Free of active leases for the whole period, from the occupancy
+        # index rather than the leases
+        try:
+            query &= occupancy.available_filter(*occupancy.period(available_from, available_to))
+        except occupancy.InvalidPeriod as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    terms = fulltext.query_terms(q) if q else []
+    # Without a full-text index every term must appear in one of the fields
+    if not fulltext.available():
+        for term in terms:
+            query &= (
+                Q(name__icontains=term) | Q(address__icontains=term)
+                | Q(description__icontains=term) | Q(amenities__icontains=term)
+            )
+    properties = Property.objects.filter(query)
     
-    properties = Property.objects.filter(query).distinct()
-    return [property_to_response(prop) for prop in properties]
+    # Areas: within radius_km of lat,lng and/or within bbox
+    try:
+        if bbox:
+            properties = properties.filter(geo.bbox_filter(bbox))
+        if radius_km is not None or lat is not None or lng is not None:
+            if radius_km is None or lat is None or lng is None:
+                raise geo.InvalidArea("lat, lng and radius_km go together")
+            properties = properties.filter(geo.radius_filter(lat, lng, radius_km))
+    except geo.InvalidArea as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if terms and fulltext.available():
+        return property_search_response(properties, terms, cursor, limit)
+    return property_list_response(properties, cursor, limit)
+
+def property_list_response(queryset, cursor: Optional[str], limit: int) -> FastJSONResponse:
+    properties = paginate(PROPERTY_PAGINATION, queryset.values(*PROPERTY_ROW_FIELDS), cursor, limit)
+    properties, next_cursor = PROPERTY_PAGINATION.split(properties, limit)
+    images = property_images_by_property([prop["id"] for prop in properties])
+    return list_response(
+        [property_row_to_dict(prop, images.get(prop["id"], [])) for prop in properties],
+        next_cursor
+    )
+
+def property_search_response(queryset, terms: List[str], cursor: Optional[str], limit: int) -> FastJSONResponse:
+    """
+    Properties of ``queryset`` matching every term of a full-text query, most
+    relevant first. Each row carries a "search" entry with its BM25 rank
+    (lower is better) and its name and a snippet of the matched text, with
+    the matched terms marked.
+    """
+    try:
+        matches = fulltext.ranked_matches(queryset, terms, cursor, limit)
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    next_cursor = None
+    if len(matches) > limit:
+        matches = matches[:limit]
+        next_cursor = fulltext.encode_cursor(matches[-1][1], matches[-1][0])
+    property_ids = [property_id for property_id, _, _, _ in matches]
+    rows = {row["id"]: row for row in Property.objects.filter(id__in=property_ids).values(*PROPERTY_ROW_FIELDS)}
+    images = property_images_by_property(property_ids)
+    properties = []
+    for property_id, rank, name, snippet in matches:
+        # A property deleted since the match was read is left out
+        if property_id in rows:
+            prop = property_row_to_dict(rows[property_id], images.get(property_id, []))
+            prop["search"] = {"rank": rank, "name": name, "snippet": snippet}
+            properties.append(prop)
+    return list_response(properties, next_cursor)
+
+# Shared catalogue of available properties
+#
+# The listing of available properties is the same for every user, so it is
+# served from an in-memory snapshot of the whole catalogue instead of being
+# queried per request. A snapshot is stamped with the version of the
+# response cache's "catalog" tag, which every Property and PropertyImage
+# write invalidates, and is rebuilt by the first request that sees a newer
+# version. Pages carry an ETag and may be kept by browsers and shared caches
+# for CATALOG_MAX_AGE seconds.
+CATALOG_MAX_CACHED_PAGES = 1024
+
+class CatalogSnapshot:
+    def __init__(self, version: Optional[str], rows: List[dict]):
+        self.version = version
+        # Rows in listing order, newest first, and their sort keys in
+        # ascending order for locating a cursor with bisect
+        self.rows = rows
+        self.keys = [(row["created_at"], row["id"]) for row in reversed(rows)]
+        # Rendered pages by request parameters: (body, etag, next_cursor)
+        self.pages: Dict[tuple, tuple] = {}
+
+    def page(self, cursor: Optional[str], limit: int, matches) -> List[dict]:
+        """Up to ``limit + 1`` matching rows after ``cursor``, as KeysetPagination.page fetches them."""
+        start = 0
+        if cursor:
+            start = len(self.keys) - bisect.bisect_left(self.keys, PROPERTY_PAGINATION.decode_cursor(cursor))
+        rows = []
+        for row in itertools.islice(self.rows, start, None):
+            if matches(row):
+                rows.append(row)
+                if len(rows) > limit:
+                    break
+        return rows
+
+def build_catalog_snapshot(version: Optional[str]) -> CatalogSnapshot:
+    available = Property.objects.filter(status=Property.Status.AVAILABLE)
+    properties = available.order_by('-created_at', '-id').values(*PROPERTY_ROW_FIELDS)
+    images = property_images_by_property(available.values('id'))
+    return CatalogSnapshot(version, [property_row_to_dict(prop, images.get(prop["id"], [])) for prop in properties])
+
+class AvailableCatalog:
+    def __init__(self):
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self.flights = SingleFlight()
+        self.builds = 0
+
+    async def current(self) -> CatalogSnapshot:
+        version = (await response_cache.tag_versions(["catalog"]))["catalog"]
+        snapshot = self.snapshot
+        # Without a version (e.g. a dummy cache backend) nothing can be reused
+        if snapshot is None or version is None or snapshot.version != version:
+            snapshot = await self.flights.run(version, lambda: self._build(version))
+        return snapshot
+
+    async def _build(self, version: Optional[str]) -> CatalogSnapshot:
+        snapshot = await run_db(build_catalog_snapshot, version)
+        self.builds += 1
+        self.snapshot = snapshot
+        return snapshot
+
+    def stats(self):
+        snapshot = self.snapshot
+        return {
+            "properties": len(snapshot.rows) if snapshot else 0,
+            "cached_pages": len(snapshot.pages) if snapshot else 0,
+            "builds": self.builds,
+        }
+
+available_catalog = AvailableCatalog()
+
+def catalog_filter(category: Optional[str], city: Optional[str], min_bedrooms: Optional[int], max_rent: Optional[float]):
+    # The same filters as list_properties, applied to snapshot rows
+    checks = []
+    if category:
+        checks.append(lambda row: row["category"] == category)
+    if city:
+        needle = city.casefold()
+        checks.append(lambda row: needle in row["city"].casefold())
+    if min_bedrooms:
+        checks.append(lambda row: row["bedrooms"] >= min_bedrooms)
+    if max_rent:
+        checks.append(lambda row: row["monthly_rent"] <= max_rent)
+    return lambda row: all(check(row) for check in checks)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+@app.get("/properties/available/", response_model=List[PropertyResponse])
+async def list_available_properties(
+    request: Request,
+    category: Optional[str] = None,
+    city: Optional[str] = None,
+    min_bedrooms: Optional[int] = None,
+    max_rent: Optional[float] = None,
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_limit)
+):
+    snapshot = await available_catalog.current()
+    key = (cursor, limit, category, city, min_bedrooms, max_rent)
+    page = snapshot.pages.get(key)
+    if page is None:
+        try:
+            rows = snapshot.page(cursor, limit, catalog_filter(category, city, min_bedrooms, max_rent))
+        except InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+        rows, next_cursor = PROPERTY_PAGINATION.split(rows, limit)
+        body = dumps(rows)
+        page = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"', next_cursor)
+        if len(snapshot.pages) >= CATALOG_MAX_CACHED_PAGES:
+            snapshot.pages.clear()
+        snapshot.pages[key] = page
+    
+    body, etag, next_cursor = page
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={settings.CATALOG_MAX_AGE}"}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/properties/rented/", response_model=List[PropertyResponse])
+@cached_response(by_property_scope=True)
+@db_endpoint
+def list_rented_properties(
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_limit),
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
+):
+    # The tenant's part of the property listing; available properties are
+    # served by the shared /properties/available/ listing
+    if not current_user.is_tenant():
+        raise HTTPException(status_code=403, detail="Only tenants have rented properties")
+    
+    return property_list_response(Property.objects.filter(scope.filter('id')), cursor, limit)
+
+def run_property_search(version: Optional[str], current_user: User, scope: PropertyScope, filters: Dict[str, Any],
+                        cursor: Optional[str], limit: int, facets: bool) -> FastJSONResponse:
+    search_index.sync(version)
+    
+    # Same role restrictions as list_properties
+    if current_user.is_tenant():
+        restriction = search_index.restriction(status=Property.Status.AVAILABLE, property_ids=scope.property_ids)
+    elif current_user.is_property_manager():
+        restriction = search_index.restriction(manager_id=current_user.id)
+    elif current_user.is_landlord():
+        restriction = search_index.restriction(owner_id=current_user.id)
+    else:
+        restriction = search_index.all_properties()
+    
+    try:
+        after = PROPERTY_PAGINATION.decode_cursor(cursor) if cursor else None
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    result = search_index.search(
+        restriction, filters, after=after, limit=limit,
+        facets=facets, facet_limit=settings.PROPERTY_SEARCH_FACET_LIMIT
+    )
+    
+    rows = {row["id"]: row for row in Property.objects.filter(id__in=result.ids).values(*PROPERTY_ROW_FIELDS)}
+    images = property_images_by_property(result.ids)
+    content = {
+        "count": result.total,
+        "results": [
+            property_row_to_dict(rows[property_id], images.get(property_id, []))
+            for property_id in result.ids if property_id in rows
+        ]
+    }
+    if facets:
+        content["facets"] = result.facets
+    
+    headers = None
+    if result.next_key:
+        created_at, property_id = result.next_key
+        headers = {"X-Next-Cursor": PROPERTY_PAGINATION.encode_cursor({"created_at": created_at, "id": property_id})}
+    return FastJSONResponse(content, headers=headers)
+
+@app.get("/properties/search/")
+@cached_response(by_property_scope=True)
+async def search_properties(
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    city: Optional[str] = None,
+    state: Optional[str] = None,
+    min_bedrooms: Optional[int] = None,
+    min_bathrooms: Optional[int] = None,
+    min_rent: Optional[float] = None,
+    max_rent: Optional[float] = None,
+    facets: bool = True,
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_limit),
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
+):
+    # Filtered from the bitmap indexes, with counts per value of each facet
+    # under the other filters; only the page itself is read from the database
+    filters = {
+        "status": status, "category": category, "city": city, "state": state,
+        "min_bedrooms": min_bedrooms, "min_bathrooms": min_bathrooms,
+        "min_rent": min_rent, "max_rent": max_rent,
+    }
+    version = (await response_cache.tag_versions(["catalog"]))["catalog"]
+    return await run_db(run_property_search, version, current_user, scope, filters, cursor, limit, facets)
 
 @app.post("/properties/", response_model=PropertyResponse, status_code=status.HTTP_201_CREATED)
-async def create_property(
+@db_endpoint
+def create_property(
     property_data: PropertyCreate,
     current_user: User = Depends(get_current_user)
 ):
@@ -496,31 +1108,31 @@ async def create_property(
         deposit_amount=property_data.deposit_amount,
         description=property_data.description,
         amenities=property_data.amenities,
+        latitude=property_data.latitude,
+        longitude=property_data.longitude,
         owner=current_user
     )
-    new_property.save()
+    with transaction.atomic():
+        new_property.save()
+        record_transition(Property, new_property, None, new_property.status)
     
     return property_to_response(new_property)
 
 @app.get("/properties/{property_id}/", response_model=PropertyResponse)
+@cached_response(tags=lambda property_id, **_: [f"property:{property_id}"], by_property_scope=True)
 async def get_property(
     property_id: int = Path(...),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
-    property = Property.objects.filter(id=property_id).first()
+    property = await fetch_first(PROPERTY_RESPONSE_PLAN.apply(Property.objects.filter(id=property_id)))
     if not property:
         raise HTTPException(status_code=404, detail="Property not found")
     
     # Check permissions based on role
     if current_user.is_tenant():
         # Tenants can only see available properties or ones they're renting
-        is_tenant_property = Lease.objects.filter(
-            property=property, 
-            tenant=current_user, 
-            is_active=True
-        ).exists()
-        
-        if not (property.status == Property.Status.AVAILABLE or is_tenant_property):
+        if not (property.status == Property.Status.AVAILABLE or scope.includes(property.id)):
             raise HTTPException(status_code=403, detail="Not authorized to view this property")
     
     elif current_user.is_property_manager() and property.property_manager_id != current_user.id:
@@ -532,13 +1144,14 @@ async def get_property(
     return property_to_response(property)
 
 @app.put("/properties/{property_id}/", response_model=PropertyResponse)
-async def update_property(
+@db_endpoint
+def update_property(
     property_id: int,
     property_data: dict = Body(...),
     current_user: User = Depends(get_current_user)
 ):
     # Get property
-    property = Property.objects.filter(id=property_id).first()
+    property = PROPERTY_RESPONSE_PLAN.apply(Property.objects.filter(id=property_id)).first()
     if not property:
         raise HTTPException(status_code=404, detail="Property not found")
     
@@ -552,18 +1165,36 @@ async def update_property(
     if current_user.is_tenant():
         raise HTTPException(status_code=403, detail="Tenants cannot update properties")
     
+    old_status = property.status
+    old_manager_id = property.property_manager_id
+    
     # Fields that can be updated
     updatable_fields = [
         "name", "address", "city", "state", "zip_code", "country",
         "category", "status", "bedrooms", "bathrooms", "square_feet",
-        "monthly_rent", "deposit_amount", "description", "amenities"
+        "monthly_rent", "deposit_amount", "description", "amenities",
+        "latitude", "longitude"
     ]
     
+    # Coordinates reach the geohash encoder, so they are range checked
+    coordinates = {field: property_data[field] for field in ("latitude", "longitude") if field in property_data}
+    if coordinates:
+        try:
+            property_data.update(PropertyCoordinates(**coordinates).model_dump(include=coordinates.keys()))
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=400, detail="; ".join(f"{error['loc'][0]}: {error['msg']}" for error in e.errors())
+            )
+    
     # Update fields
     for field in updatable_fields:
         if field in property_data:
             setattr(property, field, property_data[field])
     
+    # A new postal address is geocoded again unless coordinates were given
+    if {"zip_code", "country"} & property_data.keys() and not {"latitude", "longitude"} & property_data.keys():
+        property.latitude = property.longitude = None
+    
     # Update property_manager if provided
     if "property_manager_id" in property_data and current_user.is_landlord():
         if property_data["property_manager_id"]:
@@ -579,11 +1210,23 @@ async def update_property(
         else:
             property.property_manager = None
     
-    property.save()
+    with transaction.atomic():
+        property.save()
+        if property.property_manager_id != old_manager_id:
+            # The managers' counters take the status change along with the
+            # move, so each user's counters change once
+            move_property(
+                property, PortfolioCounters.Scope.MANAGER, old_manager_id, property.property_manager_id,
+                old_status, property.status
+            )
+            record_transition(Property, property, old_status, property.status, scopes=[PortfolioCounters.Scope.OWNER])
+        else:
+            record_transition(Property, property, old_status, property.status)
     return property_to_response(property)
 
 @app.post("/properties/{property_id}/images/")
-async def upload_property_image(
+@db_endpoint
+def upload_property_image(
     property_id: int,
     file: UploadFile = File(...),
     is_primary: bool = Form(False),
@@ -601,7 +1244,7 @@ async def upload_property_image(
         raise HTTPException(status_code=403, detail="Not authorized to upload images for this property")
     
     # Create image
-    content = await file.read()
+    content = file.file.read()
     property_image = PropertyImage(
         property=property,
         caption=caption,
@@ -620,7 +1263,8 @@ async def upload_property_image(
     return {"message": "Image uploaded successfully", "image_id": property_image.id}
 
 @app.post("/properties/{property_id}/documents/")
-async def upload_property_document(
+@db_endpoint
+def upload_property_document(
     property_id: int,
     file: UploadFile = File(...),
     title: str = Form(...),
@@ -638,7 +1282,7 @@ async def upload_property_document(
         raise HTTPException(status_code=403, detail="Not authorized to upload documents for this property")
     
     # Create document
-    content = await file.read()
+    content = file.file.read()
     property_document = PropertyDocument(
         property=property,
         title=title,
@@ -654,10 +1298,14 @@ async def upload_property_document(
 
 # Lease endpoints
 @app.get("/leases/", response_model=List[LeaseResponse])
+@cached_response()
 async def list_leases(
     is_active: Optional[bool] = None,
     property_id: Optional[int] = None,
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_limit),
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Base query
     query = Q()
@@ -666,9 +1314,9 @@ async def list_leases(
     if current_user.is_tenant():
         query &= Q(tenant=current_user)
     elif current_user.is_property_manager():
-        query &= Q(property__property_manager=current_user)
+        query &= scope.filter()
     elif current_user.is_landlord():
-        query &= Q(property__owner=current_user)
+        query &= scope.filter()
     # Admins see all
     
     # Apply filters
@@ -677,11 +1325,33 @@ async def list_leases(
     if property_id:
         query &= Q(property_id=property_id)
     
-    leases = Lease.objects.filter(query)
-    return [lease_to_response(lease) for lease in leases]
+    leases = await fetch_all(paginate(
+        LEASE_PAGINATION, Lease.objects.filter(query).values(*LEASE_ROW_FIELDS), cursor, limit
+    ))
+    leases, next_cursor = LEASE_PAGINATION.split(leases, limit)
+    return list_response([lease_row_to_dict(lease) for lease in leases], next_cursor)
+
+def checked_lease_period(start_date, end_date):
+    try:
+        return lease_period(start_date, end_date)
+    except InvalidLeasePeriod as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def check_lease_overlaps(property_id: int, period, exclude: Optional[int] = None):
+    """Reject an active lease sharing days with another active lease of the property."""
+    # Locking the property serializes concurrent checks for it where the
+    # database supports row locks
+    list(Property.objects.select_for_update().filter(id=property_id).values_list("id"))
+    conflicts = lease_conflicts(property_id, *period, exclude=exclude)
+    if conflicts:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Lease overlaps active lease(s) {', '.join(map(str, conflicts))} of this property"
+        )
 
 @app.post("/leases/", response_model=LeaseResponse, status_code=status.HTTP_201_CREATED)
-async def create_lease(
+@db_endpoint
+def create_lease(
     lease_data: LeaseCreate,
     current_user: User = Depends(get_current_user)
 ):
@@ -706,6 +1376,8 @@ async def create_lease(
     if not tenant:
         raise HTTPException(status_code=404, detail="Tenant not found")
     
+    period = checked_lease_period(lease_data.start_date, lease_data.end_date)
+    
     # Create lease
     new_lease = Lease(
         property=property,
@@ -716,22 +1388,61 @@ async def create_lease(
         deposit_amount=lease_data.deposit_amount,
         is_active=lease_data.is_active
     )
-    new_lease.save()
-    
-    # Update property status if lease is active
-    if new_lease.is_active:
-        property.status = Property.Status.RENTED
-        property.save()
+    with transaction.atomic():
+        if new_lease.is_active:
+            check_lease_overlaps(property.id, period)
+        new_lease.save()
+        
+        # Update property status if lease is active
+        if new_lease.is_active:
+            old_status = property.status
+            property.status = Property.Status.RENTED
+            property.save()
+            record_transition(Property, property, old_status, property.status)
     
     return lease_to_response(new_lease)
 
+@app.post("/leases/import/", status_code=status.HTTP_201_CREATED)
+@db_endpoint
+def import_lease_file(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    dry_run: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Create leases in bulk from a CSV file with a header row or an NDJSON
+    file, one lease per row or line with the fields of LeaseCreate. The
+    format is taken from the file name or content type unless given. Either
+    every lease is created or, with a 400, none: the response lists the
+    errors of each failing line.
+    """
+    if not (current_user.is_admin() or current_user.is_landlord() or current_user.is_property_manager()):
+        raise HTTPException(status_code=403, detail="Not authorized to create leases")
+    
+    try:
+        rows = read_rows(file.file.read(), format or upload_format(file.filename, file.content_type))
+        result = import_leases(rows, current_user, dry_run=dry_run)
+    except LeaseImportError as e:
+        if not e.errors:
+            raise HTTPException(status_code=400, detail=str(e))
+        raise HTTPException(
+            status_code=400,
+            detail={"message": str(e), "error_count": e.error_count, "errors": e.errors}
+        )
+    
+    return {**result, "dry_run": dry_run}
+
 @app.get("/leases/{lease_id}/", response_model=LeaseResponse)
-async def get_lease(
+@cached_response()
+@db_endpoint
+def get_lease(
     lease_id: int,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Get lease
-    lease = Lease.objects.filter(id=lease_id).first()
+    lease = LEASE_RESPONSE_PLAN.apply(Lease.objects.filter(id=lease_id)).first()
     if not lease:
         raise HTTPException(status_code=404, detail="Lease not found")
     
@@ -739,22 +1450,24 @@ async def get_lease(
     if current_user.is_tenant() and lease.tenant_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to view this lease")
     
-    if current_user.is_property_manager() and lease.property.property_manager_id != current_user.id:
+    if current_user.is_property_manager() and not scope.includes(lease.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to view this lease")
     
-    if current_user.is_landlord() and lease.property.owner_id != current_user.id:
+    if current_user.is_landlord() and not scope.includes(lease.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to view this lease")
     
     return lease_to_response(lease)
 
 @app.put("/leases/{lease_id}/", response_model=LeaseResponse)
-async def update_lease(
+@db_endpoint
+def update_lease(
     lease_id: int,
     lease_data: dict = Body(...),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Get lease
-    lease = Lease.objects.filter(id=lease_id).first()
+    lease = LEASE_RESPONSE_PLAN.apply(Lease.objects.filter(id=lease_id)).first()
     if not lease:
         raise HTTPException(status_code=404, detail="Lease not found")
     
@@ -762,10 +1475,10 @@ async def update_lease(
     if current_user.is_tenant():
         raise HTTPException(status_code=403, detail="Tenants cannot update leases")
     
-    if current_user.is_property_manager() and lease.property.property_manager_id != current_user.id:
+    if current_user.is_property_manager() and not scope.includes(lease.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to update this lease")
     
-    if current_user.is_landlord() and lease.property.owner_id != current_user.id:
+    if current_user.is_landlord() and not scope.includes(lease.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to update this lease")
     
     # Fields that can be updated
@@ -783,30 +1496,38 @@ async def update_lease(
             raise HTTPException(status_code=404, detail="Tenant not found")
         lease.tenant = tenant
     
-    lease.save()
-    
-    # Update property status based on lease status
-    if lease.is_active:
-        lease.property.status = Property.Status.RENTED
-    else:
-        # Check if there are other active leases for this property
-        other_active_leases = Lease.objects.filter(
-            property=lease.property, 
-            is_active=True
-        ).exclude(id=lease.id).exists()
+    period = checked_lease_period(lease.start_date, lease.end_date)
+    with transaction.atomic():
+        if lease.is_active:
+            check_lease_overlaps(lease.property_id, period, exclude=lease.id)
+        lease.save()
         
-        if not other_active_leases:
-            lease.property.status = Property.Status.AVAILABLE
-    
-    lease.property.save()
+        # Update property status based on lease status
+        old_status = lease.property.status
+        if lease.is_active:
+            lease.property.status = Property.Status.RENTED
+        else:
+            # Check if there are other active leases for this property
+            other_active_leases = Lease.objects.filter(
+                property=lease.property, 
+                is_active=True
+            ).exclude(id=lease.id).exists()
+            
+            if not other_active_leases:
+                lease.property.status = Property.Status.AVAILABLE
+        
+        lease.property.save()
+        record_transition(Property, lease.property, old_status, lease.property.status)
     
     return lease_to_response(lease)
 
 @app.post("/leases/{lease_id}/document/")
-async def upload_lease_document(
+@db_endpoint
+def upload_lease_document(
     lease_id: int,
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Get lease
     lease = Lease.objects.filter(id=lease_id).first()
@@ -817,15 +1538,15 @@ async def upload_lease_document(
     if current_user.is_tenant():
         raise HTTPException(status_code=403, detail="Tenants cannot upload lease documents")
     
-    if current_user.is_property_manager() and lease.property.property_manager_id != current_user.id:
+    if current_user.is_property_manager() and not scope.includes(lease.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to upload documents for this lease")
     
-    if current_user.is_landlord() and lease.property.owner_id != current_user.id:
+    if current_user.is_landlord() and not scope.includes(lease.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to upload documents for this lease")
     
     # Upload document
     # Upload document
-    content = await file.read()
+    content = file.file.read()
     lease.lease_document.save(
         file.filename,
         ContentFile(content)
@@ -836,11 +1557,16 @@ async def upload_lease_document(
 
 # Maintenance request endpoints
 @app.get("/maintenance-requests/", response_model=List[MaintenanceRequestResponse])
-async def list_maintenance_requests(
+@cached_response()
+@db_endpoint
+def list_maintenance_requests(
     status: Optional[str] = None,
     priority: Optional[str] = None,
     property_id: Optional[int] = None,
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_limit),
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Base query
     query = Q()
@@ -849,9 +1575,9 @@ async def list_maintenance_requests(
     if current_user.is_tenant():
         query &= Q(tenant=current_user)
     elif current_user.is_property_manager():
-        query &= Q(property__property_manager=current_user) | Q(assigned_to=current_user)
+        query &= scope.filter() | Q(assigned_to=current_user)
     elif current_user.is_landlord():
-        query &= Q(property__owner=current_user)
+        query &= scope.filter()
     # Admins see all
     
     # Apply filters
@@ -862,11 +1588,17 @@ async def list_maintenance_requests(
     if property_id:
         query &= Q(property_id=property_id)
     
-    requests = MaintenanceRequest.objects.filter(query).order_by('-created_at')
-    return [maintenance_to_response(req) for req in requests]
+    requests = paginate(
+        MAINTENANCE_PAGINATION,
+        MaintenanceRequest.objects.filter(query).values(*MAINTENANCE_ROW_FIELDS),
+        cursor, limit
+    )
+    requests, next_cursor = MAINTENANCE_PAGINATION.split(requests, limit)
+    return list_response([maintenance_row_to_dict(req) for req in requests], next_cursor)
 
 @app.post("/maintenance-requests/", response_model=MaintenanceRequestResponse, status_code=status.HTTP_201_CREATED)
-async def create_maintenance_request(
+@db_endpoint
+def create_maintenance_request(
     request_data: MaintenanceRequestCreate,
     current_user: User = Depends(get_current_user)
 ):
@@ -900,7 +1632,9 @@ async def create_maintenance_request(
         priority=request_data.priority,
         status=MaintenanceRequest.Status.PENDING
     )
-    new_request.save()
+    with transaction.atomic():
+        new_request.save()
+        record_transition(MaintenanceRequest, property, None, new_request.status)
     
     # Create notification for property manager if exists
     if property.property_manager:
@@ -926,12 +1660,15 @@ async def create_maintenance_request(
     return maintenance_to_response(new_request)
 
 @app.get("/maintenance-requests/{request_id}/", response_model=MaintenanceRequestResponse)
-async def get_maintenance_request(
+@cached_response()
+@db_endpoint
+def get_maintenance_request(
     request_id: int,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Get request
-    request = MaintenanceRequest.objects.filter(id=request_id).first()
+    request = MAINTENANCE_RESPONSE_PLAN.apply(MaintenanceRequest.objects.filter(id=request_id)).first()
     if not request:
         raise HTTPException(status_code=404, detail="Maintenance request not found")
     
@@ -940,23 +1677,25 @@ async def get_maintenance_request(
         raise HTTPException(status_code=403, detail="Not authorized to view this maintenance request")
     
     if current_user.is_property_manager() and \
-       request.property.property_manager_id != current_user.id and \
+       not scope.includes(request.property_id) and \
        request.assigned_to_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to view this maintenance request")
     
-    if current_user.is_landlord() and request.property.owner_id != current_user.id:
+    if current_user.is_landlord() and not scope.includes(request.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to view this maintenance request")
     
     return maintenance_to_response(request)
 
 @app.put("/maintenance-requests/{request_id}/", response_model=MaintenanceRequestResponse)
-async def update_maintenance_request(
+@db_endpoint
+def update_maintenance_request(
     request_id: int,
     request_data: dict = Body(...),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Get request
-    request = MaintenanceRequest.objects.filter(id=request_id).first()
+    request = MAINTENANCE_RESPONSE_PLAN.apply(MaintenanceRequest.objects.filter(id=request_id)).first()
     if not request:
         raise HTTPException(status_code=404, detail="Maintenance request not found")
     
@@ -965,11 +1704,11 @@ async def update_maintenance_request(
         raise HTTPException(status_code=403, detail="Not authorized to update this maintenance request")
     
     if current_user.is_property_manager() and \
-       request.property.property_manager_id != current_user.id and \
+       not scope.includes(request.property_id) and \
        request.assigned_to_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to update this maintenance request")
     
-    if current_user.is_landlord() and request.property.owner_id != current_user.id:
+    if current_user.is_landlord() and not scope.includes(request.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to update this maintenance request")
     
     # Fields that can be updated by tenants
@@ -983,6 +1722,7 @@ async def update_maintenance_request(
     
     # Determine which fields can be updated based on role
     updatable_fields = tenant_updatable_fields if current_user.is_tenant() else manager_updatable_fields
+    old_status = request.status
     
     # Update fields
     for field in updatable_fields:
@@ -1005,7 +1745,9 @@ async def update_maintenance_request(
     elif request.status != MaintenanceRequest.Status.RESOLVED:
         request.resolved_at = None
     
-    request.save()
+    with transaction.atomic():
+        request.save()
+        record_transition(MaintenanceRequest, request.property_id, old_status, request.status)
     
     # Create notification for tenant if status changes
     if "status" in request_data and request.tenant:
@@ -1021,10 +1763,12 @@ async def update_maintenance_request(
     return maintenance_to_response(request)
 
 @app.post("/maintenance-requests/{request_id}/comments/")
-async def add_maintenance_comment(
+@db_endpoint
+def add_maintenance_comment(
     request_id: int,
     comment: str = Body(..., embed=True),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Get request
     request = MaintenanceRequest.objects.filter(id=request_id).first()
@@ -1036,11 +1780,11 @@ async def add_maintenance_comment(
         raise HTTPException(status_code=403, detail="Not authorized to comment on this maintenance request")
     
     if current_user.is_property_manager() and \
-       request.property.property_manager_id != current_user.id and \
+       not scope.includes(request.property_id) and \
        request.assigned_to_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to comment on this maintenance request")
     
-    if current_user.is_landlord() and request.property.owner_id != current_user.id:
+    if current_user.is_landlord() and not scope.includes(request.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to comment on this maintenance request")
     
     # Create comment
@@ -1088,9 +1832,11 @@ async def add_maintenance_comment(
     }
 
 @app.get("/maintenance-requests/{request_id}/comments/")
-async def get_maintenance_comments(
+@db_endpoint
+def get_maintenance_comments(
     request_id: int,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Get request
     request = MaintenanceRequest.objects.filter(id=request_id).first()
@@ -1102,15 +1848,15 @@ async def get_maintenance_comments(
         raise HTTPException(status_code=403, detail="Not authorized to view comments for this maintenance request")
     
     if current_user.is_property_manager() and \
-       request.property.property_manager_id != current_user.id and \
+       not scope.includes(request.property_id) and \
        request.assigned_to_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to view comments for this maintenance request")
     
-    if current_user.is_landlord() and request.property.owner_id != current_user.id:
+    if current_user.is_landlord() and not scope.includes(request.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to view comments for this maintenance request")
     
     # Get comments
-    comments = MaintenanceComment.objects.filter(maintenance_request=request).order_by('created_at')
+    comments = MaintenanceComment.objects.filter(maintenance_request=request).select_related('user').order_by('created_at')
     
     # Format response
     response = []
@@ -1126,11 +1872,13 @@ async def get_maintenance_comments(
     return response
 
 @app.post("/maintenance-requests/{request_id}/images/")
-async def upload_maintenance_image(
+@db_endpoint
+def upload_maintenance_image(
     request_id: int,
     file: UploadFile = File(...),
     caption: str = Form(""),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Get request
     request = MaintenanceRequest.objects.filter(id=request_id).first()
@@ -1142,15 +1890,15 @@ async def upload_maintenance_image(
         raise HTTPException(status_code=403, detail="Not authorized to upload images for this maintenance request")
     
     if current_user.is_property_manager() and \
-       request.property.property_manager_id != current_user.id and \
+       not scope.includes(request.property_id) and \
        request.assigned_to_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to upload images for this maintenance request")
     
-    if current_user.is_landlord() and request.property.owner_id != current_user.id:
+    if current_user.is_landlord() and not scope.includes(request.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to upload images for this maintenance request")
     
     # Create image
-    content = await file.read()
+    content = file.file.read()
     maintenance_image = MaintenanceImage(
         maintenance_request=request,
         caption=caption
@@ -1164,13 +1912,7 @@ async def upload_maintenance_image(
     return {"message": "Image uploaded successfully", "image_id": maintenance_image.id}
 
 # Invoice endpoints
-@app.get("/invoices/", response_model=List[InvoiceResponse])
-async def list_invoices(
-    status: Optional[str] = None,
-    property_id: Optional[int] = None,
-    tenant_id: Optional[int] = None,
-    current_user: User = Depends(get_current_user)
-):
+def invoice_list_query(current_user: User, scope: PropertyScope, status: Optional[str], property_id: Optional[int], tenant_id: Optional[int]) -> Q:
     # Base query
     query = Q()
     
@@ -1178,9 +1920,9 @@ async def list_invoices(
     if current_user.is_tenant():
         query &= Q(tenant=current_user)
     elif current_user.is_property_manager():
-        query &= Q(property__property_manager=current_user)
+        query &= scope.filter()
     elif current_user.is_landlord():
-        query &= Q(property__owner=current_user)
+        query &= scope.filter()
     # Admins see all
     
     # Apply filters
@@ -1191,11 +1933,44 @@ async def list_invoices(
     if tenant_id and not current_user.is_tenant():
         query &= Q(tenant_id=tenant_id)
     
-    invoices = Invoice.objects.filter(query).order_by('-due_date')
-    return [invoice_to_response(invoice) for invoice in invoices]
+    return query
+
+@app.get("/invoices/", response_model=List[InvoiceResponse])
+@cached_response()
+async def list_invoices(
+    status: Optional[str] = None,
+    property_id: Optional[int] = None,
+    tenant_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_limit),
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
+):
+    query = invoice_list_query(current_user, scope, status, property_id, tenant_id)
+    invoices = await fetch_all(paginate(
+        INVOICE_PAGINATION, Invoice.objects.filter(query).values(*INVOICE_ROW_FIELDS), cursor, limit
+    ))
+    invoices, next_cursor = INVOICE_PAGINATION.split(invoices, limit)
+    return list_response([invoice_row_to_dict(invoice) for invoice in invoices], next_cursor)
+
+@app.get("/invoices/export/")
+async def export_invoices(
+    status: Optional[str] = None,
+    property_id: Optional[int] = None,
+    tenant_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
+):
+    query = invoice_list_query(current_user, scope, status, property_id, tenant_id)
+    queryset = Invoice.objects.filter(query).values(*INVOICE_ROW_FIELDS)
+    return StreamingResponse(
+        stream_ndjson(INVOICE_PAGINATION, queryset, invoice_row_to_dict),
+        media_type="application/x-ndjson"
+    )
 
 @app.post("/invoices/", response_model=InvoiceResponse, status_code=status.HTTP_201_CREATED)
-async def create_invoice(
+@db_endpoint
+def create_invoice(
     invoice_data: InvoiceCreate,
     current_user: User = Depends(get_current_user)
 ):
@@ -1239,7 +2014,9 @@ async def create_invoice(
         due_date=invoice_data.due_date,
         status=Invoice.Status.PENDING
     )
-    new_invoice.save()
+    with transaction.atomic():
+        new_invoice.save()
+        record_transition(Invoice, property, None, new_invoice.status)
     
     # Create notification for tenant
     Notification.objects.create(
@@ -1254,12 +2031,15 @@ async def create_invoice(
     return invoice_to_response(new_invoice)
 
 @app.get("/invoices/{invoice_id}/", response_model=InvoiceResponse)
-async def get_invoice(
+@cached_response()
+@db_endpoint
+def get_invoice(
     invoice_id: int,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Get invoice
-    invoice = Invoice.objects.filter(id=invoice_id).first()
+    invoice = INVOICE_RESPONSE_PLAN.apply(Invoice.objects.filter(id=invoice_id)).first()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
@@ -1267,22 +2047,24 @@ async def get_invoice(
     if current_user.is_tenant() and invoice.tenant_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to view this invoice")
     
-    if current_user.is_property_manager() and invoice.property.property_manager_id != current_user.id:
+    if current_user.is_property_manager() and not scope.includes(invoice.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to view this invoice")
     
-    if current_user.is_landlord() and invoice.property.owner_id != current_user.id:
+    if current_user.is_landlord() and not scope.includes(invoice.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to view this invoice")
     
     return invoice_to_response(invoice)
 
 @app.put("/invoices/{invoice_id}/", response_model=InvoiceResponse)
-async def update_invoice(
+@db_endpoint
+def update_invoice(
     invoice_id: int,
     invoice_data: dict = Body(...),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Get invoice
-    invoice = Invoice.objects.filter(id=invoice_id).first()
+    invoice = INVOICE_RESPONSE_PLAN.apply(Invoice.objects.filter(id=invoice_id)).first()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
@@ -1290,21 +2072,24 @@ async def update_invoice(
     if current_user.is_tenant():
         raise HTTPException(status_code=403, detail="Tenants cannot update invoices")
     
-    if current_user.is_property_manager() and invoice.property.property_manager_id != current_user.id:
+    if current_user.is_property_manager() and not scope.includes(invoice.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to update this invoice")
     
-    if current_user.is_landlord() and invoice.property.owner_id != current_user.id:
+    if current_user.is_landlord() and not scope.includes(invoice.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to update this invoice")
     
     # Fields that can be updated
     updatable_fields = ["amount", "description", "due_date", "status"]
+    old_status = invoice.status
     
     # Update fields
     for field in updatable_fields:
         if field in invoice_data:
             setattr(invoice, field, invoice_data[field])
     
-    invoice.save()
+    with transaction.atomic():
+        invoice.save()
+        record_transition(Invoice, invoice.property, old_status, invoice.status)
     
     # Create notification for tenant if status changes
     if "status" in invoice_data:
@@ -1320,13 +2105,7 @@ async def update_invoice(
     return invoice_to_response(invoice)
 
 # Payment endpoints
-@app.get("/payments/", response_model=List[PaymentResponse])
-async def list_payments(
-    invoice_id: Optional[int] = None,
-    property_id: Optional[int] = None,
-    tenant_id: Optional[int] = None,
-    current_user: User = Depends(get_current_user)
-):
+def payment_list_query(current_user: User, scope: PropertyScope, invoice_id: Optional[int], property_id: Optional[int], tenant_id: Optional[int]) -> Q:
     # Base query
     query = Q()
     
@@ -1334,9 +2113,9 @@ async def list_payments(
     if current_user.is_tenant():
         query &= Q(invoice__tenant=current_user)
     elif current_user.is_property_manager():
-        query &= Q(invoice__property__property_manager=current_user)
+        query &= scope.filter('invoice__property_id')
     elif current_user.is_landlord():
-        query &= Q(invoice__property__owner=current_user)
+        query &= scope.filter('invoice__property_id')
     # Admins see all
     
     # Apply filters
@@ -1347,16 +2126,50 @@ async def list_payments(
     if tenant_id and not current_user.is_tenant():
         query &= Q(invoice__tenant_id=tenant_id)
     
-    payments = Payment.objects.filter(query).order_by('-payment_date')
-    return [payment_to_response(payment) for payment in payments]
+    return query
+
+@app.get("/payments/", response_model=List[PaymentResponse])
+@cached_response()
+async def list_payments(
+    invoice_id: Optional[int] = None,
+    property_id: Optional[int] = None,
+    tenant_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_limit),
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
+):
+    query = payment_list_query(current_user, scope, invoice_id, property_id, tenant_id)
+    payments = await fetch_all(paginate(
+        PAYMENT_PAGINATION, Payment.objects.filter(query).values(*PAYMENT_ROW_FIELDS), cursor, limit
+    ))
+    payments, next_cursor = PAYMENT_PAGINATION.split(payments, limit)
+    return list_response([payment_row_to_dict(payment) for payment in payments], next_cursor)
+
+@app.get("/payments/export/")
+async def export_payments(
+    invoice_id: Optional[int] = None,
+    property_id: Optional[int] = None,
+    tenant_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
+):
+    query = payment_list_query(current_user, scope, invoice_id, property_id, tenant_id)
+    queryset = Payment.objects.filter(query).values(*PAYMENT_ROW_FIELDS)
+    return StreamingResponse(
+        stream_ndjson(PAYMENT_PAGINATION, queryset, payment_row_to_dict),
+        media_type="application/x-ndjson"
+    )
 
 @app.post("/payments/", response_model=PaymentResponse, status_code=status.HTTP_201_CREATED)
-async def create_payment(
+@db_endpoint
+def create_payment(
     payment_data: PaymentCreate,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Get invoice
-    invoice = Invoice.objects.filter(id=payment_data.invoice_id).first()
+    invoice = INVOICE_RESPONSE_PLAN.apply(Invoice.objects.filter(id=payment_data.invoice_id)).first()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     
@@ -1364,10 +2177,10 @@ async def create_payment(
     if current_user.is_tenant() and invoice.tenant_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to make payment for this invoice")
     
-    if current_user.is_property_manager() and invoice.property.property_manager_id != current_user.id:
+    if current_user.is_property_manager() and not scope.includes(invoice.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to record payment for this invoice")
     
-    if current_user.is_landlord() and invoice.property.owner_id != current_user.id:
+    if current_user.is_landlord() and not scope.includes(invoice.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to record payment for this invoice")
     
     # Create payment
@@ -1379,13 +2192,16 @@ async def create_payment(
         transaction_id=payment_data.transaction_id,
         notes=payment_data.notes
     )
-    new_payment.save()
-    
-    # Update invoice status if paid in full
-    total_paid = Payment.objects.filter(invoice=invoice).aggregate(Sum('amount'))['amount__sum'] or 0
-    if total_paid >= invoice.amount:
-        invoice.status = Invoice.Status.PAID
-        invoice.save()
+    with transaction.atomic():
+        new_payment.save()
+        
+        # Update invoice status if paid in full
+        total_paid = Payment.objects.filter(invoice=invoice).aggregate(Sum('amount'))['amount__sum'] or 0
+        if total_paid >= invoice.amount:
+            old_status = invoice.status
+            invoice.status = Invoice.Status.PAID
+            invoice.save()
+            record_transition(Invoice, invoice.property, old_status, invoice.status)
     
     # Create notifications
     if current_user.is_tenant():
@@ -1423,12 +2239,15 @@ async def create_payment(
     return payment_to_response(new_payment)
 
 @app.get("/payments/{payment_id}/", response_model=PaymentResponse)
-async def get_payment(
+@cached_response()
+@db_endpoint
+def get_payment(
     payment_id: int,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Get payment
-    payment = Payment.objects.filter(id=payment_id).first()
+    payment = PAYMENT_RESPONSE_PLAN.apply(Payment.objects.filter(id=payment_id)).first()
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
     
@@ -1436,18 +2255,21 @@ async def get_payment(
     if current_user.is_tenant() and payment.invoice.tenant_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to view this payment")
     
-    if current_user.is_property_manager() and payment.invoice.property.property_manager_id != current_user.id:
+    if current_user.is_property_manager() and not scope.includes(payment.invoice.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to view this payment")
     
-    if current_user.is_landlord() and payment.invoice.property.owner_id != current_user.id:
+    if current_user.is_landlord() and not scope.includes(payment.invoice.property_id):
         raise HTTPException(status_code=403, detail="Not authorized to view this payment")
     
     return payment_to_response(payment)
 
 # Notification endpoints
 @app.get("/notifications/")
+@cached_response(tags=lambda current_user, **_: [f"notifications:{current_user.id}"], per_user=True)
 async def list_notifications(
     is_read: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = Depends(page_limit),
     current_user: User = Depends(get_current_user)
 ):
     # Base query
@@ -1457,26 +2279,18 @@ async def list_notifications(
     if is_read is not None:
         query &= Q(is_read=is_read)
     
-    notifications = Notification.objects.filter(query).order_by('-created_at')
-    
-    # Format response
-    response = []
-    for notification in notifications:
-        response.append({
-            "id": notification.id,
-            "type": notification.type,
-            "title": notification.title,
-            "message": notification.message,
-            "is_read": notification.is_read,
-            "content_type": notification.content_type,
-            "object_id": notification.object_id,
-            "created_at": notification.created_at
-        })
-    
-    return response
+    # Rows already have the response shape
+    notifications = await fetch_all(paginate(
+        NOTIFICATION_PAGINATION,
+        Notification.objects.filter(query).values(*NOTIFICATION_ROW_FIELDS),
+        cursor, limit
+    ))
+    notifications, next_cursor = NOTIFICATION_PAGINATION.split(notifications, limit)
+    return list_response(notifications, next_cursor)
 
 @app.put("/notifications/{notification_id}/read/")
-async def mark_notification_read(
+@db_endpoint
+def mark_notification_read(
     notification_id: int,
     current_user: User = Depends(get_current_user)
 ):
@@ -1496,18 +2310,28 @@ async def mark_notification_read(
     return {"message": "Notification marked as read"}
 
 @app.put("/notifications/read-all/")
-async def mark_all_notifications_read(
+@db_endpoint
+def mark_all_notifications_read(
     current_user: User = Depends(get_current_user)
 ):
     # Mark all user's notifications as read
     Notification.objects.filter(user=current_user, is_read=False).update(is_read=True)
+    # Bulk updates send no signals
+    response_cache.invalidate_tags([f"notifications:{current_user.id}"])
     
     return {"message": "All notifications marked as read"}
 
 # Dashboard endpoints
+async def count_by_status(queryset) -> Dict[str, int]:
+    """Row counts of ``queryset`` grouped by its ``status`` column."""
+    rows = await fetch_all(queryset.values('status').annotate(count=Count('id')).order_by())
+    return {row['status']: row['count'] for row in rows}
+
 @app.get("/dashboard/landlord-summary/")
+@cached_response()
 async def landlord_dashboard_summary(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Check permissions
     if not current_user.is_landlord() and not current_user.is_admin():
@@ -1518,62 +2342,71 @@ async def landlord_dashboard_summary(
     if current_user.is_landlord():
         property_query &= Q(owner=current_user)
     
-    # Get summary data
-    total_properties = Property.objects.filter(property_query).count()
-    occupied_properties = Property.objects.filter(property_query, status=Property.Status.RENTED).count()
-    available_properties = Property.objects.filter(property_query, status=Property.Status.AVAILABLE).count()
-    maintenance_properties = Property.objects.filter(property_query, status=Property.Status.MAINTENANCE).count()
-    
-    # Get pending/overdue payments
-    pending_invoices = Invoice.objects.filter(
-        property__in=Property.objects.filter(property_query),
-        status=Invoice.Status.PENDING
-    ).count()
-    
-    overdue_invoices = Invoice.objects.filter(
-        property__in=Property.objects.filter(property_query),
-        status=Invoice.Status.OVERDUE
-    ).count()
-    
-    # Get maintenance requests
-    pending_maintenance = MaintenanceRequest.objects.filter(
-        property__in=Property.objects.filter(property_query),
-        status=MaintenanceRequest.Status.PENDING
-    ).count()
+    # Landlords read their maintained status counters; admins (and landlords
+    # without a counters row yet) get one grouped query per table
+    counters = None
+    if current_user.is_landlord():
+        counters = await fetch_first(counters_query(PortfolioCounters.Scope.OWNER, current_user.id))
     
-    in_progress_maintenance = MaintenanceRequest.objects.filter(
-        property__in=Property.objects.filter(property_query),
-        status=MaintenanceRequest.Status.IN_PROGRESS
-    ).count()
+    if counters is not None:
+        properties_by_status = status_counts(counters, Property)
+        invoices_by_status = status_counts(counters, Invoice)
+        maintenance_by_status = status_counts(counters, MaintenanceRequest)
+    else:
+        properties_by_status = await count_by_status(Property.objects.filter(property_query))
+        
+        # Get pending/overdue payments
+        invoices_by_status = await count_by_status(Invoice.objects.filter(
+            scope.filter(),
+            status__in=[Invoice.Status.PENDING, Invoice.Status.OVERDUE]
+        ))
+        
+        # Get maintenance requests
+        maintenance_by_status = await count_by_status(MaintenanceRequest.objects.filter(
+            scope.filter(),
+            status__in=[MaintenanceRequest.Status.PENDING, MaintenanceRequest.Status.IN_PROGRESS]
+        ))
+    
+    total_properties = sum(properties_by_status.values())
+    occupied_properties = properties_by_status.get(Property.Status.RENTED, 0)
+    
+    # Portfolio totals from the maintained analytics rollups
+    rollup_totals = await fetch_aggregate(
+        PropertyAnalytics.objects.filter(scope.filter()),
+        total_income=Sum('total_income'),
+        maintenance_costs=Sum('maintenance_costs')
+    )
     
     # Calculate occupancy rate
     occupancy_rate = (occupied_properties / total_properties * 100) if total_properties > 0 else 0
     
     # Get recent activities
-    recent_leases = Lease.objects.filter(
-        property__in=Property.objects.filter(property_query)
-    ).order_by('-created_at')[:5]
+    recent_leases = await fetch_all(Lease.objects.filter(
+        scope.filter()
+    ).select_related('property', 'tenant').order_by('-created_at')[:5])
     
-    recent_payments = Payment.objects.filter(
-        invoice__property__in=Property.objects.filter(property_query)
-    ).order_by('-payment_date')[:5]
+    recent_payments = await fetch_all(Payment.objects.filter(
+        scope.filter('invoice__property_id')
+    ).select_related('invoice__tenant').order_by('-payment_date')[:5])
     
     # Format response
     return {
         "properties_summary": {
             "total": total_properties,
             "occupied": occupied_properties,
-            "available": available_properties,
-            "under_maintenance": maintenance_properties,
+            "available": properties_by_status.get(Property.Status.AVAILABLE, 0),
+            "under_maintenance": properties_by_status.get(Property.Status.MAINTENANCE, 0),
             "occupancy_rate": round(occupancy_rate, 2)
         },
         "financial_summary": {
-            "pending_invoices": pending_invoices,
-            "overdue_invoices": overdue_invoices,
+            "pending_invoices": invoices_by_status.get(Invoice.Status.PENDING, 0),
+            "overdue_invoices": invoices_by_status.get(Invoice.Status.OVERDUE, 0),
+            "total_income": rollup_totals['total_income'] or 0,
         },
         "maintenance_summary": {
-            "pending_requests": pending_maintenance,
-            "in_progress_requests": in_progress_maintenance,
+            "pending_requests": maintenance_by_status.get(MaintenanceRequest.Status.PENDING, 0),
+            "in_progress_requests": maintenance_by_status.get(MaintenanceRequest.Status.IN_PROGRESS, 0),
+            "maintenance_costs": rollup_totals['maintenance_costs'] or 0,
         },
         "recent_leases": [
             {
@@ -1601,6 +2434,7 @@ async def landlord_dashboard_summary(
     }
 
 @app.get("/dashboard/tenant-summary/")
+@cached_response(tags=lambda current_user, **_: [f"notifications:{current_user.id}"])
 async def tenant_dashboard_summary(
     current_user: User = Depends(get_current_user)
 ):
@@ -1609,28 +2443,30 @@ async def tenant_dashboard_summary(
         raise HTTPException(status_code=403, detail="Not authorized to access tenant dashboard")
     
     # Get active leases
-    active_leases = Lease.objects.filter(tenant=current_user, is_active=True)
+    active_leases = await fetch_all(
+        Lease.objects.filter(tenant=current_user, is_active=True).select_related('property')
+    )
     
     # Get pending invoices
-    pending_invoices = Invoice.objects.filter(
+    pending_invoices = await fetch_all(Invoice.objects.filter(
         tenant=current_user,
         status=Invoice.Status.PENDING
-    ).order_by('due_date')
+    ).select_related('property').order_by('due_date'))
     
     # Get pending maintenance requests
-    maintenance_requests = MaintenanceRequest.objects.filter(
+    maintenance_requests = await fetch_all(MaintenanceRequest.objects.filter(
         tenant=current_user
-    ).order_by('-created_at')
+    ).select_related('property').order_by('-created_at'))
     
     # Get recent payments
-    recent_payments = Payment.objects.filter(
+    recent_payments = await fetch_all(Payment.objects.filter(
         invoice__tenant=current_user
-    ).order_by('-payment_date')[:5]
+    ).select_related('invoice__property').order_by('-payment_date')[:5])
     
     # Get recent notifications
-    recent_notifications = Notification.objects.filter(
+    recent_notifications = await fetch_all(Notification.objects.filter(
         user=current_user
-    ).order_by('-created_at')[:5]
+    ).order_by('-created_at')[:5])
     
     # Format response
     return {
@@ -1692,8 +2528,10 @@ async def tenant_dashboard_summary(
     }
 
 @app.get("/dashboard/property-manager-summary/")
+@cached_response()
 async def property_manager_dashboard_summary(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
 ):
     # Check permissions
     if not current_user.is_property_manager() and not current_user.is_admin():
@@ -1704,53 +2542,57 @@ async def property_manager_dashboard_summary(
     if current_user.is_property_manager():
         property_query &= Q(property_manager=current_user)
     
-    # Get managed properties
-    managed_properties = Property.objects.filter(property_query).count()
-    
-    # Get maintenance requests
-    pending_maintenance = MaintenanceRequest.objects.filter(
-        property__in=Property.objects.filter(property_query),
-        status=MaintenanceRequest.Status.PENDING
-    ).count()
-    
-    in_progress_maintenance = MaintenanceRequest.objects.filter(
-        property__in=Property.objects.filter(property_query),
-        status=MaintenanceRequest.Status.IN_PROGRESS
-    ).count()
+    # Property managers read their maintained status counters
+    counters = None
+    if current_user.is_property_manager():
+        counters = await fetch_first(counters_query(PortfolioCounters.Scope.MANAGER, current_user.id))
     
-    resolved_maintenance = MaintenanceRequest.objects.filter(
-        property__in=Property.objects.filter(property_query),
-        status=MaintenanceRequest.Status.RESOLVED
-    ).count()
+    if counters is not None:
+        managed_properties = sum(status_counts(counters, Property).values())
+        maintenance_by_status = status_counts(counters, MaintenanceRequest)
+    else:
+        # Get managed properties
+        managed_properties = await fetch_count(Property.objects.filter(property_query))
+        
+        # Get maintenance requests
+        maintenance_by_status = await count_by_status(MaintenanceRequest.objects.filter(
+            scope.filter(),
+            status__in=[
+                MaintenanceRequest.Status.PENDING,
+                MaintenanceRequest.Status.IN_PROGRESS,
+                MaintenanceRequest.Status.RESOLVED
+            ]
+        ))
     
     # Get lease information
-    active_leases = Lease.objects.filter(
-        property__in=Property.objects.filter(property_query),
-        is_active=True
-    ).count()
+    lease_counts = await fetch_aggregate(
+        Lease.objects.filter(scope.filter(), is_active=True),
+        active=Count('id'),
+        expiring=Count('id', filter=Q(end_date__lte=timezone.now().date() + timezone.timedelta(days=30)))
+    )
     
-    expiring_leases = Lease.objects.filter(
-        property__in=Property.objects.filter(property_query),
-        is_active=True,
-        end_date__lte=timezone.now().date() + timezone.timedelta(days=30)
-    ).count()
+    maintenance_costs = await fetch_aggregate(
+        PropertyAnalytics.objects.filter(scope.filter()),
+        total=Sum('maintenance_costs')
+    )
     
     # Get recent maintenance requests
-    recent_maintenance = MaintenanceRequest.objects.filter(
-        property__in=Property.objects.filter(property_query)
-    ).order_by('-created_at')[:5]
+    recent_maintenance = await fetch_all(MaintenanceRequest.objects.filter(
+        scope.filter()
+    ).select_related('property', 'tenant').order_by('-created_at')[:5])
     
     # Format response
     return {
         "properties_summary": {
             "managed_properties": managed_properties,
-            "active_leases": active_leases,
-            "expiring_leases": expiring_leases
+            "active_leases": lease_counts['active'],
+            "expiring_leases": lease_counts['expiring']
         },
         "maintenance_summary": {
-            "pending_requests": pending_maintenance,
-            "in_progress_requests": in_progress_maintenance,
-            "resolved_requests": resolved_maintenance,
+            "pending_requests": maintenance_by_status.get(MaintenanceRequest.Status.PENDING, 0),
+            "in_progress_requests": maintenance_by_status.get(MaintenanceRequest.Status.IN_PROGRESS, 0),
+            "resolved_requests": maintenance_by_status.get(MaintenanceRequest.Status.RESOLVED, 0),
+            "maintenance_costs": maintenance_costs['total'] or 0,
         },
         "recent_maintenance_requests": [
             {
@@ -1768,7 +2610,8 @@ async def property_manager_dashboard_summary(
 
 # User search endpoints (for selecting users when assigning roles)
 @app.get("/users/search/")
-async def search_users(
+@db_endpoint
+def search_users(
     role: Optional[str] = None,
     query: str = Query(None, min_length=2),
     current_user: User = Depends(get_current_user)
@@ -1809,9 +2652,83 @@ async def search_users(
     
     return response
 
-# Property statistics endpoint
+# Property statistics
+def property_statistics(property_ids) -> Dict[int, Dict[str, Any]]:
+    """
+    Lease, financial and maintenance statistics for each of ``property_ids``.
+
+    Lease totals, income and maintenance costs are read from the maintained
+    PropertyAnalytics rollups; the remaining figures come from conditional
+    aggregation grouped by property. The cost is four queries however many
+    properties are requested, with resolution times summed by the database.
+    """
+    property_ids = list(property_ids)
+    Priority = MaintenanceRequest.Priority
+    Status = MaintenanceRequest.Status
+    
+    rollups = load_rollups(property_ids)
+    current_leases = dict(Lease.objects.filter(property_id__in=property_ids, is_active=True).values('property_id').annotate(
+        total=Count('id')
+    ).values_list('property_id', 'total'))
+    invoiced = dict(Invoice.objects.filter(property_id__in=property_ids).values('property_id').annotate(
+        total=Sum('amount')
+    ).values_list('property_id', 'total'))
+    
+    # Resolution time is counted in whole (UTC) calendar days
+    resolved = Q(status=Status.RESOLVED, resolved_at__isnull=False)
+    resolution = ExpressionWrapper(
+        TruncDate('resolved_at', tzinfo=dt_timezone.utc) - TruncDate('created_at', tzinfo=dt_timezone.utc),
+        output_field=DurationField()
+    )
+    maintenance_rows = MaintenanceRequest.objects.filter(property_id__in=property_ids).values('property_id').annotate(
+        total=Count('id'),
+        resolved=Count('id', filter=resolved),
+        resolution_time=Sum(resolution, filter=resolved),
+        **{f'priority_{value}': Count('id', filter=Q(priority=value)) for value in Priority.values},
+        **{f'status_{value}': Count('id', filter=Q(status=value)) for value in Status.values},
+    )
+    maintenance = {row['property_id']: row for row in maintenance_rows}
+    
+    statistics = {}
+    for property_id in property_ids:
+        rollup = rollups[property_id]
+        total_invoiced = invoiced.get(property_id) or 0
+        total_collected = rollup['total_income'] or 0
+        
+        requests = maintenance.get(property_id, {})
+        resolved_count = requests.get('resolved', 0)
+        resolution_days = requests['resolution_time'].days if requests.get('resolution_time') else 0
+        
+        statistics[property_id] = {
+            "lease_statistics": {
+                "total_leases": rollup['lease_count'],
+                "current_leases": current_leases.get(property_id, 0),
+                "average_lease_duration_days": rollup['average_tenant_stay']
+            },
+            "financial_statistics": {
+                "total_invoiced": total_invoiced,
+                "total_collected": total_collected,
+                "collection_rate": round(total_collected / total_invoiced * 100, 2) if total_invoiced > 0 else 0
+            },
+            "maintenance_statistics": {
+                "total_requests": requests.get('total', 0),
+                "requests_by_priority": {
+                    priority: requests.get(f'priority_{priority.value}', 0) for priority in Priority
+                },
+                "requests_by_status": {
+                    request_status: requests.get(f'status_{request_status.value}', 0) for request_status in Status
+                },
+                "average_resolution_days": resolution_days // resolved_count if resolved_count > 0 else 0,
+                "total_maintenance_cost": rollup['maintenance_costs'] or 0
+            }
+        }
+    
+    return statistics
+
 @app.get("/properties/{property_id}/statistics/")
-async def get_property_statistics(
+@cached_response(tags=lambda property_id, **_: [f"property:{property_id}"])
+@db_endpoint
+def get_property_statistics(
     property_id: int,
     current_user: User = Depends(get_current_user)
 ):
@@ -1830,71 +2747,51 @@ async def get_property_statistics(
     if current_user.is_landlord() and property.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to view statistics for this property")
     
-    # Calculate statistics
-    
-    # Lease history
-    total_leases = Lease.objects.filter(property=property).count()
-    current_leases = Lease.objects.filter(property=property, is_active=True).count()
-    
-    # Financial data
-    total_invoiced = Invoice.objects.filter(property=property).aggregate(Sum('amount'))['amount__sum'] or 0
-    total_collected = Payment.objects.filter(invoice__property=property).aggregate(Sum('amount'))['amount__sum'] or 0
-    
-    # Calculate average lease duration in days
-    leases = Lease.objects.filter(property=property)
-    total_days = 0
-    for lease in leases:
-        total_days += (lease.end_date - lease.start_date).days
-    
-    avg_lease_duration = total_days // total_leases if total_leases > 0 else 0
-    
-    # Maintenance statistics
-    maintenance_requests = MaintenanceRequest.objects.filter(property=property)
-    total_maintenance = maintenance_requests.count()
-    
-    maintenance_by_priority = {
-        MaintenanceRequest.Priority.LOW: maintenance_requests.filter(priority=MaintenanceRequest.Priority.LOW).count(),
-        MaintenanceRequest.Priority.MEDIUM: maintenance_requests.filter(priority=MaintenanceRequest.Priority.MEDIUM).count(),
-        MaintenanceRequest.Priority.HIGH: maintenance_requests.filter(priority=MaintenanceRequest.Priority.HIGH).count(),
-        MaintenanceRequest.Priority.EMERGENCY: maintenance_requests.filter(priority=MaintenanceRequest.Priority.EMERGENCY).count()
-    }
+    return property_statistics([property.id])[property.id]
+
+# Portfolio statistics: POST so the id list is not bound by URL length and the
+# path does not collide with GET /properties/{property_id}/
+@app.post("/properties/statistics/")
+@db_endpoint
+def get_portfolio_statistics(
+    property_ids: List[int] = Body(..., embed=True),
+    current_user: User = Depends(get_current_user),
+    scope: PropertyScope = Depends(get_current_scope)
+):
+    if current_user.is_tenant():
+        raise HTTPException(status_code=403, detail="Not authorized to view property statistics")
     
-    maintenance_by_status = {
-        MaintenanceRequest.Status.PENDING: maintenance_requests.filter(status=MaintenanceRequest.Status.PENDING).count(),
-        MaintenanceRequest.Status.IN_PROGRESS: maintenance_requests.filter(status=MaintenanceRequest.Status.IN_PROGRESS).count(),
-        MaintenanceRequest.Status.RESOLVED: maintenance_requests.filter(status=MaintenanceRequest.Status.RESOLVED).count(),
-        MaintenanceRequest.Status.CANCELLED: maintenance_requests.filter(status=MaintenanceRequest.Status.CANCELLED).count()
-    }
+    property_ids = list(dict.fromkeys(property_ids))
+    if len(property_ids) > settings.API_MAX_STATISTICS_PROPERTIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.API_MAX_STATISTICS_PROPERTIES} properties can be requested at once"
+        )
     
-    # Calculate average days to resolve maintenance requests
-    resolved_requests = maintenance_requests.filter(status=MaintenanceRequest.Status.RESOLVED, resolved_at__isnull=False)
-    total_resolution_days = 0
-    for req in resolved_requests:
-        total_resolution_days += (req.resolved_at.date() - req.created_at.date()).days
+    found = set(Property.objects.filter(id__in=property_ids).values_list('id', flat=True))
+    missing = [property_id for property_id in property_ids if property_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Properties not found: {missing}")
     
-    avg_resolution_days = total_resolution_days // resolved_requests.count() if resolved_requests.count() > 0 else 0
+    if not all(scope.includes(property_id) for property_id in property_ids):
+        raise HTTPException(status_code=403, detail="Not authorized to view statistics for these properties")
     
-    total_maintenance_cost = maintenance_requests.aggregate(Sum('actual_cost'))['actual_cost__sum'] or 0
+    return property_statistics(property_ids)
+
+# Runtime metrics for the in-process caches
+@app.get("/metrics/")
+async def get_metrics(current_user: User = Depends(get_current_user)):
+    if not current_user.is_admin():
+        raise HTTPException(status_code=403, detail="Not authorized to view metrics")
     
-    # Format response
     return {
-        "lease_statistics": {
-            "total_leases": total_leases,
-            "current_leases": current_leases,
-            "average_lease_duration_days": avg_lease_duration
-        },
-        "financial_statistics": {
-            "total_invoiced": total_invoiced,
-            "total_collected": total_collected,
-            "collection_rate": round(total_collected / total_invoiced * 100, 2) if total_invoiced > 0 else 0
-        },
-        "maintenance_statistics": {
-            "total_requests": total_maintenance,
-            "requests_by_priority": maintenance_by_priority,
-            "requests_by_status": maintenance_by_status,
-            "average_resolution_days": avg_resolution_days,
-            "total_maintenance_cost": total_maintenance_cost
-        }
+        "auth_user_cache": user_cache.stats(),
+        "property_scopes": scope_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "response_coalescing": response_flights.stats(),
+        "available_catalog": available_catalog.stats(),
+        "property_search": search_index.stats(),
+        "login_throttle": login_throttle.stats()
     }
 
 # Health check endpoint
@@ -28,6 +28,12 @@ class Notification(models.Model):
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # Notifications are always listed per user, newest first
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_user_created_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.title} for {self.user.username}"
 
@@ -72,6 +78,11 @@ class MaintenanceRequest(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     resolved_at = models.DateTimeField(null=True, blank=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='maintenance_created_id_idx'),
+        ]
+    
     def __str__(self):
         return f"Maintenance Request #{self.id} - {self.property.name} - {self.title}"
 
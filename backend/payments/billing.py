@@ -0,0 +1,231 @@
+"""
+Recurring rent invoices.
+
+Every month, the billing period, stored as its first day, each active lease
+covering a day of it gets one PENDING invoice for its rent, prorated by day
+for a lease starting or ending within the month, and its tenant gets a
+PAYMENT_DUE notification. ``generate_invoices`` scans the leases in id order
+BILLING_CHUNK_SIZE at a time and writes each chunk with two ``bulk_create``
+calls in one transaction, keeping the portfolio counters and response cache
+current as ``create_invoice`` does for a single invoice.
+
+Runs are idempotent: leases already invoiced for the period are skipped,
+and the ``invoice_lease_period_uniq`` constraint rejects a chunk that a
+concurrent run billed first, which is then retried without those leases
+until it is written.
+A period can be split into property id ranges (see ``property_ranges``)
+billed by separate processes.
+"""
+
+import calendar
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+
+import django
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Exists, OuterRef
+
+from analytics.counters import record_transitions
+from api.models import Lease
+from notifications.models import Notification
+from rentalhub.response_cache import response_cache
+from .models import Invoice
+
+CENTS = Decimal('0.01')
+
+LEASE_FIELDS = (
+    'id', 'tenant_id', 'property_id', 'property__owner_id', 'property__property_manager_id',
+    'start_date', 'end_date', 'rent_amount',
+)
+
+
+class InvalidBillingPeriod(ValueError):
+    pass
+
+
+def billing_period(value):
+    """The period of a date, or of a "YYYY-MM" string: the month's first day."""
+    if isinstance(value, str):
+        try:
+            year, month = (int(part) for part in value.split('-')[:2])
+            value = date(year, month, 1)
+        except ValueError:
+            raise InvalidBillingPeriod("Billing period must be YYYY-MM")
+    return value.replace(day=1)
+
+
+def period_end(period):
+    return period.replace(day=calendar.monthrange(period.year, period.month)[1])
+
+
+def due_date(period):
+    return period.replace(day=min(max(settings.BILLING_DUE_DAY, 1), period_end(period).day))
+
+
+def rent_due(rent, start_date, end_date, period):
+    """
+    ``(amount, days)`` billed for ``period`` to a lease of monthly ``rent``
+    running from ``start_date`` to ``end_date``, or None if the lease
+    covers no day of it.
+    """
+    last = period_end(period)
+    days = (min(end_date, last) - max(start_date, period)).days + 1
+    if days <= 0:
+        return None
+    if days == last.day:
+        return rent, days
+    return (rent * days / last.day).quantize(CENTS, rounding=ROUND_HALF_UP), days
+
+
+def billable_leases(period, min_property_id=None, max_property_id=None):
+    """Active leases covering a day of ``period`` and not yet invoiced for it."""
+    invoiced = Invoice.objects.filter(lease_id=OuterRef('pk'), billing_period=period)
+    leases = Lease.objects.filter(
+        is_active=True, start_date__lte=period_end(period), end_date__gte=period
+    ).filter(~Exists(invoiced))
+    if min_property_id is not None:
+        leases = leases.filter(property_id__gte=min_property_id)
+    if max_property_id is not None:
+        leases = leases.filter(property_id__lte=max_property_id)
+    return leases
+
+
+def _write(period, leases):
+    due = due_date(period)
+    days_in_period = period_end(period).day
+    invoices, billed = [], []
+    for lease in leases:
+        due_rent = rent_due(lease['rent_amount'], lease['start_date'], lease['end_date'], period)
+        if due_rent is None:
+            continue
+        amount, days = due_rent
+        billed.append(lease)
+        description = f"Rent for {period:%B %Y}"
+        if days < days_in_period:
+            description += f" ({days} of {days_in_period} days)"
+        invoices.append(Invoice(
+            tenant_id=lease['tenant_id'],
+            property_id=lease['property_id'],
+            lease_id=lease['id'],
+            amount=amount,
+            description=description,
+            due_date=due,
+            status=Invoice.Status.PENDING,
+            billing_period=period,
+        ))
+    if not invoices:
+        return 0
+
+    Invoice.objects.bulk_create(invoices)
+    if any(invoice.pk is None for invoice in invoices):
+        # Backends that cannot return the ids of bulk inserted rows
+        ids = dict(Invoice.objects.filter(
+            billing_period=period, lease_id__in=[invoice.lease_id for invoice in invoices]
+        ).values_list('lease_id', 'id'))
+        for invoice in invoices:
+            invoice.pk = ids[invoice.lease_id]
+
+    Notification.objects.bulk_create(
+        Notification(
+            user_id=invoice.tenant_id,
+            type=Notification.Type.PAYMENT_DUE,
+            title="New invoice",
+            message=f"You have a new invoice of ${invoice.amount} due on {invoice.due_date}",
+            content_type="invoice",
+            object_id=invoice.pk,
+        )
+        for invoice in invoices
+    )
+    record_transitions(Invoice, [
+        (lease['property__owner_id'], lease['property__property_manager_id'], None, Invoice.Status.PENDING)
+        for lease in billed
+    ])
+
+    tags = {'all'}
+    for lease in billed:
+        tags.update({
+            f"property:{lease['property_id']}", f"owner:{lease['property__owner_id']}",
+            f"tenant:{lease['tenant_id']}", f"notifications:{lease['tenant_id']}",
+        })
+        if lease['property__property_manager_id'] is not None:
+            tags.add(f"manager:{lease['property__property_manager_id']}")
+    transaction.on_commit(lambda: response_cache.invalidate_tags(tags))
+    return len(invoices)
+
+
+def _unbilled(period, leases):
+    """The ``leases`` without an invoice for ``period``."""
+    billed = set(Invoice.objects.filter(
+        billing_period=period, lease_id__in=[lease['id'] for lease in leases]
+    ).values_list('lease_id', flat=True))
+    return [lease for lease in leases if lease['id'] not in billed]
+
+
+def _bill(period, leases):
+    while True:
+        try:
+            with transaction.atomic():
+                return _write(period, leases)
+        except IntegrityError:
+            # Another run billed some of these leases since they were read,
+            # and may bill more before the retry. Each retry drops at least
+            # one lease; an error with none billed elsewhere is no race.
+            unbilled = _unbilled(period, leases)
+            if len(unbilled) == len(leases):
+                raise
+            leases = unbilled
+
+
+def generate_invoices(period, min_property_id=None, max_property_id=None, chunk_size=None):
+    """
+    Invoice ``period`` to every billable lease, optionally only of the
+    properties with ids from ``min_property_id`` to ``max_property_id``.
+    Returns the number of invoices created.
+    """
+    period = billing_period(period)
+    chunk_size = chunk_size or settings.BILLING_CHUNK_SIZE
+    leases = billable_leases(period, min_property_id, max_property_id).order_by('id').values(*LEASE_FIELDS)
+    created, last_id = 0, 0
+    while True:
+        chunk = list(leases.filter(id__gt=last_id)[:chunk_size])
+        if not chunk:
+            return created
+        last_id = chunk[-1]['id']
+        created += _bill(period, chunk)
+
+
+def property_ranges(workers):
+    """
+    Up to ``workers`` ``(min_property_id, max_property_id)`` ranges sharing
+    the properties with active leases evenly.
+    """
+    property_ids = list(
+        Lease.objects.filter(is_active=True).order_by('property_id').values_list('property_id', flat=True).distinct()
+    )
+    size = -(-len(property_ids) // max(workers, 1))
+    return [
+        (property_ids[offset], property_ids[min(offset + size, len(property_ids)) - 1])
+        for offset in range(0, len(property_ids), size or 1)
+    ]
+
+
+def generate_invoices_in_parallel(period, workers, chunk_size=None):
+    """
+    ``generate_invoices`` over ``workers`` processes, one property id range
+    each. Meant for databases with concurrent writers; SQLite serializes
+    the writes anyway.
+    """
+    period = billing_period(period)
+    ranges = property_ranges(workers)
+    if len(ranges) <= 1:
+        return generate_invoices(period, chunk_size=chunk_size)
+    # Workers must not share the parent's database connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=len(ranges), initializer=django.setup) as pool:
+        futures = [
+            pool.submit(generate_invoices, period, min_property_id, max_property_id, chunk_size)
+            for min_property_id, max_property_id in ranges
+        ]
+        return sum(future.result() for future in futures)
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from payments.billing import InvalidBillingPeriod, billing_period, generate_invoices, generate_invoices_in_parallel
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the month's rent invoices and PAYMENT_DUE notifications for "
+        "every active lease. Leases already invoiced for the month are skipped, "
+        "so the command can be re-run safely."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--period",
+            help="Month to bill as YYYY-MM; defaults to the current month.",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Processes billing separate property id ranges in parallel.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.BILLING_CHUNK_SIZE,
+            help="Leases invoiced per batch.",
+        )
+
+    def handle(self, *args, period=None, workers=1, batch_size=None, **options):
+        try:
+            period = billing_period(period or timezone.now().date())
+        except InvalidBillingPeriod as e:
+            raise CommandError(str(e))
+
+        if workers > 1:
+            created = generate_invoices_in_parallel(period, workers, chunk_size=batch_size)
+        else:
+            created = generate_invoices(period, chunk_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"{created} invoices created for {period:%B %Y}"))
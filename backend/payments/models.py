@@ -21,11 +21,23 @@ class Invoice(models.Model):
     description = models.TextField()
     due_date = models.DateField()
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    # First day of the month billed by a recurring rent invoice (see
+    # payments/billing.py); empty for invoices created by hand
+    billing_period = models.DateField(null=True, blank=True, editable=False)
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-due_date', '-id'], name='invoice_due_id_idx'),
+        ]
+        constraints = [
+            # One rent invoice per lease and period, whoever generates it
+            models.UniqueConstraint(fields=['lease', 'billing_period'], name='invoice_lease_period_uniq'),
+        ]
+    
     def __str__(self):
         return f"Invoice #{self.id} - {self.tenant.username} - {self.amount}"
     
@@ -53,5 +65,10 @@ class Payment(models.Model):
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-payment_date', '-id'], name='payment_date_id_idx'),
+        ]
+    
     def __str__(self):
         return f"Payment #{self.id} for Invoice #{self.invoice.id} - {self.amount}"
\ No newline at end of file
@@ -1,3 +1,95 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError
 from django.test import TestCase
 
-# Create your tests here.
+from api.models import Lease, Property
+from notifications.models import Notification
+from payments import billing
+from payments.billing import LEASE_FIELDS, generate_invoices
+from payments.models import Invoice
+from users.models import User
+
+
+class GenerateInvoicesTests(TestCase):
+    def setUp(self):
+        self.landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        self.tenant = User.objects.create_user('tenant', 'tenant@example.com', 'pw', role=User.Role.TENANT)
+        self.leases = [self.add_lease(n) for n in range(3)]
+
+    def add_lease(self, n, start_date=date(2026, 1, 1)):
+        property = Property.objects.create(
+            name=f'Unit {n}', address=f'{n} Main St', city='Cape Town', state='WC', zip_code='8001',
+            monthly_rent=1000, deposit_amount=500, owner=self.landlord,
+        )
+        return Lease.objects.create(
+            property=property, tenant=self.tenant, start_date=start_date, end_date=date(2026, 12, 31),
+            rent_amount=1000, deposit_amount=500,
+        )
+
+    def billed(self):
+        return (
+            Invoice.objects.filter(billing_period=date(2026, 3, 1)).count(),
+            Notification.objects.filter(type=Notification.Type.PAYMENT_DUE, content_type='invoice').count(),
+        )
+
+    def run_command(self):
+        out = StringIO()
+        call_command('generate_invoices', period='2026-03', stdout=out)
+        return out.getvalue().strip()
+
+    def test_rerunning_a_period_creates_nothing(self):
+        self.assertEqual(self.run_command(), '3 invoices created for March 2026')
+        self.assertEqual(self.billed(), (3, 3))
+        self.assertEqual(self.run_command(), '0 invoices created for March 2026')
+        self.assertEqual(self.billed(), (3, 3))
+
+    def test_rerun_bills_only_the_leases_added_since(self):
+        generate_invoices(date(2026, 3, 1), chunk_size=2)
+        added = self.add_lease(3, start_date=date(2026, 3, 16))
+        self.assertEqual(generate_invoices(date(2026, 3, 1), chunk_size=2), 1)
+        self.assertEqual(self.billed(), (4, 4))
+        invoice = Invoice.objects.get(lease=added)
+        self.assertEqual(invoice.amount, Decimal('516.13'))
+        self.assertEqual(invoice.description, 'Rent for March 2026 (16 of 31 days)')
+
+    def test_other_periods_are_billed_separately(self):
+        generate_invoices(date(2026, 3, 1))
+        self.assertEqual(generate_invoices(date(2026, 4, 1)), 3)
+        self.assertEqual(Invoice.objects.filter(lease=self.leases[0]).count(), 2)
+
+    def concurrent_invoice(self, lease):
+        """The invoice another run writes for ``lease``."""
+        Invoice.objects.create(
+            tenant=self.tenant, property=lease.property, lease=lease, amount=1000, description='Rent',
+            due_date=date(2026, 3, 1), billing_period=date(2026, 3, 1),
+        )
+
+    def test_chunk_is_retried_until_written(self):
+        # Read before another run bills the first lease, and the second one
+        # between the first retry's read and its write
+        chunk = list(Lease.objects.order_by('id').values(*LEASE_FIELDS))
+        self.concurrent_invoice(self.leases[0])
+        unbilled, reads = billing._unbilled, []
+
+        def read_then_bill(period, leases):
+            reads.append(leases)
+            remaining = unbilled(period, leases)
+            if len(reads) == 1:
+                self.concurrent_invoice(self.leases[1])
+            return remaining
+
+        with mock.patch.object(billing, '_unbilled', side_effect=read_then_bill):
+            self.assertEqual(billing._bill(date(2026, 3, 1), chunk), 1)
+        self.assertEqual(len(reads), 2)
+        self.assertEqual(Invoice.objects.filter(billing_period=date(2026, 3, 1)).count(), 3)
+
+    def test_other_integrity_errors_are_raised(self):
+        chunk = list(Lease.objects.order_by('id').values(*LEASE_FIELDS))
+        with mock.patch.object(Invoice.objects, 'bulk_create', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                billing._bill(date(2026, 3, 1), chunk)
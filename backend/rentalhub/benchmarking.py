@@ -0,0 +1,61 @@
+"""
+Helpers shared by the benchmark_* management commands.
+
+The commands drive the FastAPI app in process through httpx's ASGI
+transport, so timings cover the handlers and the database but no server or
+network. Each command builds its synthetic data in the configured database
+and deletes it again afterwards; run them against a scratch copy, with
+settings whose AUTH_USER_MODEL is users.User like rentalhub.test_settings.
+"""
+
+import time
+from concurrent.futures import Executor, Future
+from contextlib import asynccontextmanager
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def summarize(timings):
+    """Median, p95 and p99 of ``timings`` in ms, formatted for one output line."""
+    return (
+        f"median {percentile(timings, 50):8.2f} ms  p95 {percentile(timings, 95):8.2f} ms  "
+        f"p99 {percentile(timings, 99):8.2f} ms"
+    )
+
+
+def auth_headers(user):
+    import main
+
+    return {"Authorization": f"Bearer {main.create_access_token({'sub': user.username})}"}
+
+
+class InlineExecutor(Executor):
+    """Runs each job on the submitting thread, i.e. on the event loop."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+@asynccontextmanager
+async def api_client(client_address=("127.0.0.1", 123)):
+    import httpx
+    import main
+
+    transport = httpx.ASGITransport(app=main.app, client=client_address)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        yield client
+
+
+async def timed(send):
+    """Await ``send()`` and return its result with the elapsed time in ms."""
+    started = time.perf_counter()
+    result = await send()
+    return result, (time.perf_counter() - started) * 1000
@@ -0,0 +1,95 @@
+"""
+Bounded executor for running Django ORM work outside the FastAPI event loop.
+
+The Django ORM is synchronous, so every query issued from an ``async def``
+handler would block the uvicorn worker. All ORM work is instead dispatched to a
+dedicated thread pool sized to the database connection budget
+(``DB_EXECUTOR_MAX_WORKERS``). Django connections are thread-local, so the pool
+size is also the upper bound on open connections held by the API process.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+db_executor = ThreadPoolExecutor(
+    max_workers=settings.DB_EXECUTOR_MAX_WORKERS,
+    thread_name_prefix="db",
+)
+
+
+def _call_with_connection_cleanup(func, args, kwargs):
+    # Mirror Django's request_started/request_finished handling for each unit
+    # of work: drop unusable or expired connections before and after the call.
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_db(func, *args, **kwargs):
+    """Run a synchronous ORM callable on the DB executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        db_executor,
+        functools.partial(_call_with_connection_cleanup, func, args, kwargs),
+    )
+
+
+def db_endpoint(func):
+    """
+    Decorator turning a synchronous FastAPI handler into an async one whose
+    body runs on the DB executor. ``functools.wraps`` keeps the original
+    signature visible to FastAPI's dependency injection.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_db(func, *args, **kwargs)
+    return wrapper
+
+
+def shutdown_db_executor():
+    """Wait for in-flight ORM work to finish and stop the pool."""
+    db_executor.shutdown(wait=True)
+
+
+# Read helpers used by the read-heavy endpoints. By default the sync call is
+# dispatched to the DB executor like any other ORM work. With ASYNC_ORM_READS
+# they use Django's native async queryset API instead, which in Django 5.1
+# still runs every query on asgiref's one thread-sensitive thread, outside
+# the executor's connection bound and close_old_connections handling.
+# Related objects the caller touches afterwards must be loaded up front with
+# select_related/prefetch_related.
+
+async def fetch_all(queryset):
+    if settings.ASYNC_ORM_READS:
+        return [obj async for obj in queryset]
+    return await run_db(list, queryset)
+
+
+async def fetch_first(queryset):
+    if settings.ASYNC_ORM_READS:
+        return await queryset.afirst()
+    return await run_db(queryset.first)
+
+
+async def fetch_count(queryset):
+    if settings.ASYNC_ORM_READS:
+        return await queryset.acount()
+    return await run_db(queryset.count)
+
+
+async def fetch_exists(queryset):
+    if settings.ASYNC_ORM_READS:
+        return await queryset.aexists()
+    return await run_db(queryset.exists)
+
+
+async def fetch_aggregate(queryset, **aggregates):
+    if settings.ASYNC_ORM_READS:
+        return await queryset.aaggregate(**aggregates)
+    return await run_db(queryset.aggregate, **aggregates)
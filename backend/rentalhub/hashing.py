@@ -0,0 +1,51 @@
+"""
+Bounded worker pool for password hashing.
+
+PBKDF2/bcrypt verification is deliberately expensive. Running it on the event
+loop freezes every other request during a login burst, so hashing runs on its
+own thread pool (hashlib releases the GIL while hashing). The number of
+waiting jobs is capped: once the queue is full, callers get ``HashingPoolBusy``
+immediately instead of piling up behind the backlog.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class HashingPoolBusy(Exception):
+    pass
+
+
+class HashingPool:
+    def __init__(self, workers, max_queue):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hash")
+        self._pending = 0
+
+    @property
+    def queue_depth(self):
+        return max(self._pending - self.workers, 0)
+
+    async def run(self, func, *args, **kwargs):
+        # Only touched from the event loop, so no lock is needed
+        if self._pending >= self.workers + self.max_queue:
+            raise HashingPoolBusy("Password hashing queue is full")
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+hashing_pool = HashingPool(
+    workers=settings.PASSWORD_HASHER_WORKERS,
+    max_queue=settings.PASSWORD_HASHER_MAX_QUEUE,
+)
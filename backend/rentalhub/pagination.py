@@ -0,0 +1,66 @@
+"""
+Keyset (cursor) pagination for the FastAPI list endpoints.
+
+Each list is ordered by one column descending with ``id`` as a tie-breaker.
+A page is fetched with ``WHERE (column, id) < (last_column, last_id)`` instead
+of an OFFSET, so every page costs the same as the first one. The cursor handed
+to clients is an opaque, URL-safe encoding of the last row's sort key.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPagination:
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+
+    def encode_cursor(self, obj):
+        # Rows are model instances or .values() dicts
+        if isinstance(obj, dict):
+            value, pk = obj[self.field], obj['id']
+        else:
+            value, pk = getattr(obj, self.field), obj.pk
+        payload = json.dumps([value.isoformat(), pk], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            value = self.model._meta.get_field(self.field).to_python(value)
+            pk = int(pk)
+        except (ValueError, TypeError, ValidationError):
+            raise InvalidCursor("Invalid pagination cursor")
+        if value is None:
+            raise InvalidCursor("Invalid pagination cursor")
+        return value, pk
+
+    def page(self, queryset, cursor=None, limit=20):
+        """
+        Order and slice ``queryset`` to one page. One extra row is fetched so
+        ``split`` can tell whether another page follows.
+        """
+        queryset = queryset.order_by(f'-{self.field}', '-id')
+        if cursor:
+            value, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(**{f'{self.field}__lt': value}) | Q(**{self.field: value, 'id__lt': pk})
+            )
+        return queryset[:limit + 1]
+
+    def split(self, rows, limit):
+        """Return the rows of the page and the cursor of the next page, if any."""
+        rows = list(rows)
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, self.encode_cursor(rows[-1])
@@ -0,0 +1,248 @@
+"""
+Tag-invalidated cache of rendered GET responses.
+
+Responses are stored in the ``responses`` cache alias (see CACHES in
+settings), keyed by handler, request parameters and the authorization scope
+of the requesting user. The default local-memory backend is per process; a
+shared backend such as Redis serves every worker from one copy.
+
+Each entry records the version of each of its tags, e.g. ``property:42`` or
+``owner:7``, as read before the response was computed. ``invalidate_tags``
+gives a tag a new version, so every entry carrying it misses from then on.
+The receivers in ``api.signals`` invalidate the tags of each saved or deleted
+row once its transaction commits.
+
+Tags used by the API:
+
+* ``property:<id>``: the property and its images, leases, invoices, payments
+  and maintenance requests
+* ``owner:<id>`` / ``manager:<id>`` / ``tenant:<id>``: rows in the portfolio
+  of a landlord or property manager, or concerning a tenant
+* ``user:<id>``: the user's profile and maintenance requests assigned to them
+* ``notifications:<id>``: the user's notifications
+* ``catalog``: any property; tenants see every available property
+* ``occupancy``: any lease; listings filtered by availability dates
+* ``users``: any user's name, which is embedded in most responses
+* ``all``: any row; admins see everything
+"""
+
+import functools
+import hashlib
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.responses import Response
+
+from .responses import dumps
+from .singleflight import SingleFlight
+
+ENTRY_PREFIX = 'response:'
+TAG_PREFIX = 'response-tag:'
+
+# Handler arguments that identify the requester rather than the request; the
+# requester is represented by the scope part of the key instead.
+REQUESTER_ARGUMENTS = ('current_user', 'scope')
+
+
+def role_scope(user):
+    """
+    The cache scope and tags of a user's role-filtered responses. Admins see
+    the same data, so they share one scope.
+    """
+    if user.is_admin():
+        return 'admin', ['all', 'users']
+    tags = [f'user:{user.id}', 'users']
+    if user.is_landlord():
+        tags.append(f'owner:{user.id}')
+    elif user.is_property_manager():
+        tags.append(f'manager:{user.id}')
+    elif user.is_tenant():
+        tags += [f'tenant:{user.id}', 'catalog']
+    return f'{user.role}:{user.id}', tags
+
+
+def property_scope(user, scope):
+    """
+    The cache scope and tags of responses that depend only on the user's
+    role and PropertyScope. Tenants leasing the same properties, including
+    those leasing none, see the same property listings and pages.
+    """
+    if not user.is_tenant():
+        return role_scope(user)
+    property_ids = ','.join(map(str, sorted(scope.property_ids)))
+    return f'tenant-scope:{hashlib.sha256(property_ids.encode()).hexdigest()}', ['catalog']
+
+
+def render(result):
+    """
+    A Response for a handler result, encoded as FastAPI would encode it:
+    response models in JSON mode, anything else through jsonable_encoder.
+    """
+    if isinstance(result, Response):
+        return result
+    if isinstance(result, BaseModel):
+        content = result.model_dump(mode='json')
+    else:
+        content = jsonable_encoder(result)
+    return Response(dumps(content), media_type='application/json')
+
+
+def response_headers(response):
+    """The headers of a rendered response, without the computed content length."""
+    return {
+        name.decode('latin-1'): value.decode('latin-1')
+        for name, value in response.raw_headers if name != b'content-length'
+    }
+
+
+class ResponseCache:
+    def __init__(self, alias):
+        self.backend = caches.create_connection(alias)
+        # Local memory is read in place; other backends do network or disk
+        # I/O, which is kept off the event loop.
+        self._inline = isinstance(self.backend, LocMemCache)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def _call(self, method, *args, **kwargs):
+        if self._inline:
+            return method(*args, **kwargs)
+        return await sync_to_async(method, thread_sensitive=False)(*args, **kwargs)
+
+    def key(self, name, scope, params):
+        # Dates are part of the key because handlers compute figures such as
+        # days until due relative to today.
+        raw = repr((name, scope, timezone.now().date(), sorted(params.items())))
+        return ENTRY_PREFIX + hashlib.sha256(raw.encode()).hexdigest()
+
+    async def lookup(self, key, tags):
+        """
+        Return ``(response, versions)``: the cached response, or None if it
+        is missing or a tag changed, and the current versions of ``tags`` to
+        store a freshly computed response with.
+        """
+        tag_keys = [TAG_PREFIX + tag for tag in tags]
+        found = await self._call(self.backend.get_many, [key, *tag_keys])
+        versions = {tag_key: found.get(tag_key) for tag_key in tag_keys}
+        entry = found.get(key)
+        if entry is not None and entry[0] == versions:
+            self.hits += 1
+            status_code, headers, body = entry[1:]
+            return Response(body, status_code=status_code, headers=headers), versions
+
+        self.misses += 1
+        await self._assign_missing(versions)
+        return None, versions
+
+    async def tag_versions(self, tags):
+        """``{tag: version}`` of ``tags``; a version changes whenever its tag is invalidated."""
+        tag_keys = [TAG_PREFIX + tag for tag in tags]
+        found = await self._call(self.backend.get_many, tag_keys)
+        versions = {tag_key: found.get(tag_key) for tag_key in tag_keys}
+        await self._assign_missing(versions)
+        return {tag: versions[TAG_PREFIX + tag] for tag in tags}
+
+    async def _assign_missing(self, versions):
+        missing = [tag_key for tag_key, version in versions.items() if version is None]
+        if missing:
+            # A tag without a version gets one before it is relied on, so
+            # losing it to eviction later turns into a miss
+            for tag_key in missing:
+                await self._call(self.backend.add, tag_key, uuid.uuid4().hex, timeout=None)
+            versions.update(await self._call(self.backend.get_many, missing))
+
+    async def store(self, key, versions, response):
+        entry = (versions, response.status_code, response_headers(response), bytes(response.body))
+        await self._call(self.backend.set, key, entry)
+
+    def invalidate_tags(self, tags):
+        tags = set(tags)
+        if not tags:
+            return
+        self.invalidations += len(tags)
+        version = uuid.uuid4().hex
+        self.backend.set_many({TAG_PREFIX + tag: version for tag in tags}, timeout=None)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "invalidated_tags": self.invalidations,
+        }
+
+
+response_cache = ResponseCache('responses')
+response_flights = SingleFlight()
+
+
+def cached_response(tags=None, per_user=False, by_property_scope=False):
+    """
+    Decorator caching the 200 responses of an async GET handler.
+
+    Responses are scoped to the requester's role (see ``role_scope``), or to
+    the requester alone with ``per_user``, in which case only the extra tags
+    apply. With ``by_property_scope`` the response depends only on the role
+    and the ``scope`` argument, so tenants with the same leased properties
+    share entries (see ``property_scope``). ``tags`` maps the handler's
+    keyword arguments to extra tags, e.g. the ``property:<id>`` of a detail
+    page.
+
+    Identical requests arriving while a response is being computed within
+    the same scope, and with the same tag versions, wait for that response
+    instead of running the handler again.
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            if not (settings.RESPONSE_CACHE_ENABLED or settings.RESPONSE_COALESCING_ENABLED):
+                return await func(**kwargs)
+            user = kwargs['current_user']
+            if per_user:
+                scope, entry_tags = f'user:{user.id}', []
+            elif by_property_scope:
+                scope, entry_tags = property_scope(user, kwargs['scope'])
+            else:
+                scope, entry_tags = role_scope(user)
+            if tags is not None:
+                entry_tags = entry_tags + list(tags(**kwargs))
+            params = {arg: value for arg, value in kwargs.items() if arg not in REQUESTER_ARGUMENTS}
+            key = response_cache.key(name, scope, params)
+
+            if settings.RESPONSE_CACHE_ENABLED:
+                response, versions = await response_cache.lookup(key, entry_tags)
+                if response is not None:
+                    return response
+            else:
+                # Coalescing alone still keys flights by the tag versions
+                versions = await response_cache.tag_versions(entry_tags)
+
+            async def compute():
+                response = render(await func(**kwargs))
+                if settings.RESPONSE_CACHE_ENABLED and response.status_code == 200:
+                    await response_cache.store(key, versions, response)
+                return response
+
+            if not settings.RESPONSE_COALESCING_ENABLED:
+                return await compute()
+            # Requests that saw other tag versions, e.g. after a write
+            # committed, do not join a computation started before it
+            response = await response_flights.run((key, tuple(sorted(versions.items()))), compute)
+            # Every caller gets its own copy of the shared response
+            return Response(response.body, status_code=response.status_code, headers=response_headers(response))
+        return wrapper
+    return decorator
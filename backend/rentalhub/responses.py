@@ -0,0 +1,28 @@
+"""
+orjson-backed JSON encoding for the FastAPI list and export endpoints.
+
+The output matches what FastAPI produces from the Pydantic response models:
+compact separators, UTC datetimes with a ``Z`` suffix and ``Decimal`` values
+as strings, so rows built from ``.values()`` dicts can skip model
+construction without changing the wire format.
+"""
+
+from decimal import Decimal
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
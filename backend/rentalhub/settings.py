@@ -57,7 +57,7 @@ INSTALLED_APPS = [
     'notifications',
     'files',
     'analytics',
-    #'security',
+    'security',
 ]
 
 MIDDLEWARE = [
@@ -102,6 +102,34 @@ DATABASES = {
     }
 }
 
+# Size of the thread pool the FastAPI app uses for ORM work (see rentalhub/db.py).
+# Each worker thread holds at most one connection, so keep this within the
+# database connection budget of a single API process.
+DB_EXECUTOR_MAX_WORKERS = int(os.environ.get('DB_EXECUTOR_MAX_WORKERS', 10))
+
+# Password hashing pool used by /token and /users/ (see rentalhub/hashing.py).
+# Requests beyond PASSWORD_HASHER_MAX_QUEUE waiting jobs are rejected with 503.
+PASSWORD_HASHER_WORKERS = int(os.environ.get('PASSWORD_HASHER_WORKERS', 4))
+PASSWORD_HASHER_MAX_QUEUE = int(os.environ.get('PASSWORD_HASHER_MAX_QUEUE', 64))
+
+# Sliding-window throttling of failed logins on /token (see security/throttling.py).
+# Once a username or client IP reaches its limit of failures within the window,
+# further attempts are rejected with 429 before any password hashing.
+LOGIN_THROTTLE_WINDOW = int(os.environ.get('LOGIN_THROTTLE_WINDOW', 300))  # seconds
+LOGIN_THROTTLE_USERNAME_LIMIT = int(os.environ.get('LOGIN_THROTTLE_USERNAME_LIMIT', 5))
+LOGIN_THROTTLE_IP_LIMIT = int(os.environ.get('LOGIN_THROTTLE_IP_LIMIT', 20))
+
+# Login attempts are persisted to security.LoginAttempt in batches
+LOGIN_ATTEMPT_FLUSH_INTERVAL = float(os.environ.get('LOGIN_ATTEMPT_FLUSH_INTERVAL', 2))  # seconds
+LOGIN_ATTEMPT_BATCH_SIZE = int(os.environ.get('LOGIN_ATTEMPT_BATCH_SIZE', 500))
+
+# Serve the read-heavy endpoints through Django's native async queryset API
+# instead of the DB executor. Off by default: Django 5.1 runs each async
+# query through asgiref's single thread-sensitive thread, so reads queue
+# behind one another and skip the executor's connection bound and cleanup.
+# Turn it on to benchmark both paths side by side.
+ASYNC_ORM_READS = os.environ.get('ASYNC_ORM_READS', 'False') == 'True'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -198,6 +226,88 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
 }
 
+# Page size for the FastAPI list endpoints (keyset pagination, see
+# rentalhub/pagination.py). Clients may ask for up to API_MAX_PAGE_SIZE rows.
+API_PAGE_SIZE = REST_FRAMEWORK['PAGE_SIZE']
+API_MAX_PAGE_SIZE = 100
+
+# Seconds browsers and shared caches may reuse a page of the public
+# /properties/available/ listing before revalidating it with its ETag.
+CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE', 60))
+
+# Upper bound on the number of properties per portfolio statistics request.
+API_MAX_STATISTICS_PROPERTIES = int(os.environ.get('API_MAX_STATISTICS_PROPERTIES', 500))
+
+# Rows fetched per query by the streaming NDJSON export endpoints.
+API_EXPORT_CHUNK_SIZE = int(os.environ.get('API_EXPORT_CHUNK_SIZE', 1000))
+
+# Bulk lease onboarding through /leases/import/ (see api/lease_import.py).
+# Uploads hold at most LEASE_IMPORT_MAX_ROWS leases, inserted in batches of
+# LEASE_IMPORT_BATCH_SIZE; a rejected import reports the errors of at most
+# LEASE_IMPORT_MAX_ERRORS lines.
+LEASE_IMPORT_MAX_ROWS = int(os.environ.get('LEASE_IMPORT_MAX_ROWS', 100000))
+LEASE_IMPORT_BATCH_SIZE = int(os.environ.get('LEASE_IMPORT_BATCH_SIZE', 2000))
+LEASE_IMPORT_MAX_ERRORS = int(os.environ.get('LEASE_IMPORT_MAX_ERRORS', 100))
+
+# Recurring rent invoices (see payments/billing.py and the generate_invoices
+# command). Active leases are billed BILLING_CHUNK_SIZE at a time; invoices
+# fall due on BILLING_DUE_DAY of their month, or its last day if shorter.
+BILLING_CHUNK_SIZE = int(os.environ.get('BILLING_CHUNK_SIZE', 2000))
+BILLING_DUE_DAY = int(os.environ.get('BILLING_DUE_DAY', 1))
+
+# In-process cache of authenticated users used by the FastAPI app
+# (see users/cache.py). Entries are invalidated on save/delete.
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 60))  # seconds
+AUTH_USER_CACHE_SIZE = int(os.environ.get('AUTH_USER_CACHE_SIZE', 10000))
+
+# Cached per-user sets of accessible property ids (see api/scopes.py). Scopes
+# larger than PROPERTY_SCOPE_MAX_INLINE_IDS are filtered with a subquery
+# instead of an inline IN list. Each process caches its own scopes; the
+# per-user generations that expire them everywhere on a change live in the
+# PROPERTY_SCOPE_GENERATION_CACHE alias, which must be shared by all workers
+# (e.g. RESPONSE_CACHE_BACKEND set to Redis or Memcached) when running more
+# than one.
+PROPERTY_SCOPE_CACHE_TTL = int(os.environ.get('PROPERTY_SCOPE_CACHE_TTL', 300))  # seconds
+PROPERTY_SCOPE_GENERATION_CACHE = os.environ.get('PROPERTY_SCOPE_GENERATION_CACHE', 'responses')
+PROPERTY_SCOPE_MAX_INLINE_IDS = int(os.environ.get('PROPERTY_SCOPE_MAX_INLINE_IDS', 500))
+
+# In-memory bitmap indexes behind /properties/search/ (see api/search.py).
+# Rents are indexed in bands of PROPERTY_SEARCH_RENT_BAND; each facet
+# returns at most PROPERTY_SEARCH_FACET_LIMIT values.
+PROPERTY_SEARCH_RENT_BAND = int(os.environ.get('PROPERTY_SEARCH_RENT_BAND', 500))
+PROPERTY_SEARCH_FACET_LIMIT = int(os.environ.get('PROPERTY_SEARCH_FACET_LIMIT', 20))
+
+# Radius and bounding box filters of /properties/ (see api/geo.py). Areas are
+# narrowed to at most PROPERTY_GEO_MAX_CELLS geohash cells before the exact
+# check; radius_km is capped at PROPERTY_GEO_MAX_RADIUS_KM.
+PROPERTY_GEO_MAX_CELLS = int(os.environ.get('PROPERTY_GEO_MAX_CELLS', 32))
+PROPERTY_GEO_MAX_RADIUS_KM = float(os.environ.get('PROPERTY_GEO_MAX_RADIUS_KM', 500))
+
+# Tag-invalidated cache of GET responses (see rentalhub/response_cache.py),
+# stored in the 'responses' alias. Local memory is per worker process; with
+# several workers point RESPONSE_CACHE_BACKEND at a shared backend, e.g.
+# django.core.cache.backends.redis.RedisCache with a redis:// location.
+RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'True') == 'True'
+# Identical GETs in flight at the same time share one handler execution
+RESPONSE_COALESCING_ENABLED = os.environ.get('RESPONSE_COALESCING_ENABLED', 'True') == 'True'
+RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': RESPONSE_CACHE_BACKEND,
+        'LOCATION': os.environ.get('RESPONSE_CACHE_LOCATION', 'rentalhub-responses'),
+        'TIMEOUT': int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300)),  # seconds
+        'KEY_PREFIX': 'rentalhub',
+    },
+}
+if RESPONSE_CACHE_BACKEND.endswith(('LocMemCache', 'FileBasedCache')):
+    CACHES['responses']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 10000)),
+    }
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -0,0 +1,48 @@
+"""
+In-process coalescing of identical concurrent computations.
+
+When several requests need the same result at once (a burst of tenants
+opening the same listing, say), only the first runs the computation; the
+others await its outcome, including any exception it raises. The
+computation runs as its own task, so a caller that disconnects does not
+cancel it for the callers still waiting.
+"""
+
+import asyncio
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights = {}
+        self.executions = 0
+        self.saved_executions = 0
+
+    async def run(self, key, compute):
+        """
+        Return the result of ``compute()``, an awaitable factory, sharing an
+        in-flight computation started under the same ``key``.
+        """
+        task = self._flights.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(compute())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.saved_executions += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        # Retrieve the outcome so an exception nobody awaited any more is
+        # not reported as unhandled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        return {
+            "in_flight": len(self._flights),
+            "executions": self.executions,
+            "saved_executions": self.saved_executions,
+        }
@@ -0,0 +1,14 @@
+"""
+Settings for the test suite:
+
+    python manage.py test --settings=rentalhub.test_settings
+
+The API authenticates and relates rows to ``users.User``, so the user
+foreign keys point at it here.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+AUTH_USER_MODEL = 'users.User'
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
@@ -0,0 +1,93 @@
+"""
+Test helpers for driving the FastAPI app inside a Django test case.
+
+The app runs ORM work on the DB executor threads (see rentalhub/db.py) and
+the Starlette test client runs the app on an event loop thread of its own,
+so neither sees the test case's transaction or its captured queries.
+``ApiTestCase`` instead sends requests through an ASGI transport on an event
+loop in the test thread and runs DB executor work on one thread sharing the
+test's connection, as LiveServerTestCase does. The response cache is
+disabled so every request reaches its handler.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import httpx
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+
+def _share_connection(conn):
+    connections[DEFAULT_DB_ALIAS] = conn
+
+
+def shared_connection_executor():
+    """A one-thread executor whose ORM work uses the calling thread's connection."""
+    conn = connections[DEFAULT_DB_ALIAS]
+    conn.inc_thread_sharing()
+    executor = ThreadPoolExecutor(max_workers=1, initializer=_share_connection, initargs=(conn,))
+
+    def shutdown():
+        executor.shutdown(wait=True)
+        conn.dec_thread_sharing()
+
+    return executor, shutdown
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=False, RESPONSE_COALESCING_ENABLED=False, ASYNC_ORM_READS=False)
+class ApiTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        import main
+        from api.scopes import scope_cache
+        from users.cache import user_cache
+
+        self.main = main
+        executor, shutdown = shared_connection_executor()
+        self.addCleanup(shutdown)
+        for patcher in (
+            mock.patch('rentalhub.db.db_executor', executor),
+            # The test transaction must survive the per-call connection cleanup
+            mock.patch('rentalhub.db.close_old_connections', lambda: None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        user_cache.clear()
+        scope_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.addCleanup(scope_cache.clear)
+
+    def request(self, method, path, user=None, **kwargs):
+        headers = kwargs.pop('headers', {})
+        if user is not None:
+            headers['Authorization'] = f"Bearer {self.main.create_access_token({'sub': user.username})}"
+
+        async def send():
+            transport = httpx.ASGITransport(app=self.main.app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+                return await client.request(method, path, headers=headers, **kwargs)
+
+        return asyncio.run(send())
+
+    def get(self, path, user=None, **kwargs):
+        return self.request('GET', path, user, **kwargs)
+
+    def put(self, path, user=None, **kwargs):
+        return self.request('PUT', path, user, **kwargs)
+
+    def post(self, path, user=None, **kwargs):
+        return self.request('POST', path, user, **kwargs)
+
+    def count_queries(self, method, path, user=None, **kwargs):
+        """``(response, number of queries)`` of a request made with cold in-process caches."""
+        from api.scopes import scope_cache
+        from users.cache import user_cache
+
+        user_cache.clear()
+        scope_cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.request(method, path, user, **kwargs)
+        return response, len(queries)
@@ -0,0 +1,238 @@
+import asyncio
+import threading
+from datetime import date, timedelta
+from unittest import mock
+
+import httpx
+
+from django.contrib.auth.models import update_last_login
+from django.test import TestCase, override_settings
+
+from api.models import Lease, Property
+from rentalhub import db
+from rentalhub.response_cache import response_cache, response_flights
+from rentalhub.singleflight import SingleFlight
+from rentalhub.testing import ApiTestCase
+from users.models import User
+
+
+@override_settings(RESPONSE_CACHE_ENABLED=True)
+class ResponseCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+        self.landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        self.tenant = User.objects.create_user(
+            'tenant', 'tenant@example.com', 'pw', role=User.Role.TENANT, first_name='Thandi', last_name='Moyo'
+        )
+        self.property = Property.objects.create(
+            name='Flat', address='1 Main St', city='Cape Town', state='WC', zip_code='8001',
+            monthly_rent=1000, deposit_amount=500, owner=self.landlord,
+        )
+        self.lease = Lease.objects.create(
+            property=self.property, tenant=self.tenant, start_date=date.today(),
+            end_date=date.today() + timedelta(days=365), rent_amount=1000, deposit_amount=500,
+        )
+
+    def cached(self, path, user):
+        """Whether ``path`` is answered from the cache."""
+        hits = response_cache.hits
+        response = self.get(path, user)
+        self.assertEqual(response.status_code, 200)
+        return response_cache.hits > hits
+
+    def test_repeated_request_is_served_from_the_cache(self):
+        self.assertFalse(self.cached('/leases/', self.landlord))
+        self.assertTrue(self.cached('/leases/', self.landlord))
+
+    def test_saved_row_invalidates_its_tags(self):
+        self.get('/leases/', self.landlord)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lease.rent_amount = 1200
+            self.lease.save()
+        self.assertFalse(self.cached('/leases/', self.landlord))
+        self.assertEqual(self.get('/leases/', self.landlord).json()[0]['rent_amount'], '1200.00')
+
+    def test_other_portfolios_stay_cached(self):
+        other = User.objects.create_user('other', 'other@example.com', 'pw', role=User.Role.LANDLORD)
+        self.get('/leases/', self.landlord)
+        with self.captureOnCommitCallbacks(execute=True):
+            Property.objects.create(
+                name='House', address='2 Main St', city='Cape Town', state='WC', zip_code='8001',
+                monthly_rent=1000, deposit_amount=500, owner=other,
+            )
+        self.assertTrue(self.cached('/leases/', self.landlord))
+
+    def test_renamed_tenant_invalidates_embedded_names(self):
+        self.get('/leases/', self.landlord)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tenant.last_name = 'Dube'
+            self.tenant.save()
+        self.assertEqual(self.get('/leases/', self.landlord).json()[0]['tenant_name'], 'Thandi Dube')
+
+    def test_user_saves_without_embedded_changes_keep_entries(self):
+        self.get('/leases/', self.landlord)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user('newcomer', 'newcomer@example.com', 'pw')
+            update_last_login(None, self.tenant)
+            self.tenant.phone_number = '0215550100'
+            self.tenant.save()
+        self.assertTrue(self.cached('/leases/', self.landlord))
+
+    def test_deleted_user_invalidates_embedded_names(self):
+        manager = User.objects.create_user('manager', 'manager@example.com', 'pw', role=User.Role.PROPERTY_MANAGER)
+        self.get('/leases/', self.landlord)
+        with self.captureOnCommitCallbacks(execute=True):
+            manager.delete()
+        self.assertFalse(self.cached('/leases/', self.landlord))
+
+
+class SingleFlightTests(TestCase):
+    def run_concurrently(self, flights, calls):
+        async def gather():
+            return await asyncio.gather(*(flights.run(key, compute) for key, compute in calls), return_exceptions=True)
+        return asyncio.run(gather())
+
+    def test_identical_calls_share_one_execution(self):
+        flights = SingleFlight()
+        executions = []
+
+        async def compute():
+            executions.append(1)
+            await asyncio.sleep(0)
+            return object()
+
+        first, second, third = self.run_concurrently(flights, [('a', compute)] * 3)
+        self.assertEqual(len(executions), 1)
+        self.assertIs(first, second)
+        self.assertIs(first, third)
+        self.assertEqual(flights.stats(), {'in_flight': 0, 'executions': 1, 'saved_executions': 2})
+
+    def test_other_keys_and_later_calls_execute_again(self):
+        flights = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0)
+            return 'done'
+
+        self.run_concurrently(flights, [('a', compute), ('b', compute)])
+        self.run_concurrently(flights, [('a', compute)])
+        self.assertEqual(flights.stats()['executions'], 3)
+
+    def test_failures_reach_every_caller(self):
+        flights = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0)
+            raise ValueError('boom')
+
+        results = self.run_concurrently(flights, [('a', compute)] * 2)
+        self.assertEqual([type(result) for result in results], [ValueError, ValueError])
+        self.assertEqual(flights.stats()['executions'], 1)
+
+    def test_cancelled_caller_leaves_the_flight_running(self):
+        flights = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.01)
+            return 'done'
+
+        async def scenario():
+            leaver = asyncio.ensure_future(flights.run('a', compute))
+            stayer = asyncio.ensure_future(flights.run('a', compute))
+            await asyncio.sleep(0)
+            leaver.cancel()
+            return await stayer
+
+        self.assertEqual(asyncio.run(scenario()), 'done')
+
+
+@override_settings(RESPONSE_COALESCING_ENABLED=True)
+class RequestCoalescingTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.landlord = User.objects.create_user('landlord', 'landlord@example.com', 'pw', role=User.Role.LANDLORD)
+        Property.objects.create(
+            name='Flat', address='1 Main St', city='Cape Town', state='WC', zip_code='8001',
+            monthly_rent=1000, deposit_amount=500, owner=self.landlord,
+        )
+
+    def send_concurrently(self, requests):
+        """
+        Send ``(path, user)`` requests at once. The DB executor is held until
+        every request is past authentication and waiting, so the first
+        computation cannot finish before the others arrive.
+        """
+        for path, user in requests:
+            # Warm the user and scope caches: authentication then needs no DB work
+            self.get(path, user)
+        response_flights.executions = response_flights.saved_executions = 0
+        release = threading.Event()
+        db.db_executor.submit(release.wait, 5)
+
+        async def send():
+            transport = httpx.ASGITransport(app=self.main.app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+                sent = [
+                    asyncio.ensure_future(client.get(path, headers={
+                        'Authorization': f"Bearer {self.main.create_access_token({'sub': user.username})}"
+                    }))
+                    for path, user in requests
+                ]
+                while sum(response_flights.stats()[name] for name in ('executions', 'saved_executions')) < len(sent):
+                    await asyncio.sleep(0.001)
+                release.set()
+                return await asyncio.gather(*sent)
+
+        try:
+            return asyncio.run(asyncio.wait_for(send(), 5))
+        finally:
+            release.set()
+
+    def test_identical_requests_share_one_execution(self):
+        responses = self.send_concurrently([('/properties/?status=AVAILABLE', self.landlord)] * 5)
+        self.assertEqual({response.status_code for response in responses}, {200})
+        self.assertEqual(len({response.content for response in responses}), 1)
+        self.assertEqual(len(responses[0].json()), 1)
+        self.assertEqual(response_flights.stats()['executions'], 1)
+        self.assertEqual(response_flights.stats()['saved_executions'], 4)
+
+    def test_other_scopes_and_parameters_execute_separately(self):
+        other = User.objects.create_user('other', 'other@example.com', 'pw', role=User.Role.LANDLORD)
+        responses = self.send_concurrently([
+            ('/properties/?status=AVAILABLE', self.landlord),
+            ('/properties/?status=AVAILABLE', other),
+            ('/properties/?status=RENTED', self.landlord),
+        ])
+        self.assertEqual([len(response.json()) for response in responses], [1, 0, 0])
+        self.assertEqual(response_flights.stats()['executions'], 3)
+
+    def test_savings_are_reported_in_the_metrics(self):
+        self.send_concurrently([('/properties/', self.landlord)] * 3)
+        admin = User.objects.create_user('admin', 'admin@example.com', 'pw', role=User.Role.ADMIN)
+        metrics = self.get('/metrics/', admin).json()
+        self.assertEqual(metrics['response_coalescing']['saved_executions'], 2)
+
+    def flight_keys(self, *paths):
+        keys = []
+        run = response_flights.run
+
+        async def record(key, compute):
+            keys.append(key)
+            return await run(key, compute)
+
+        with mock.patch.object(response_flights, 'run', record):
+            for path in paths:
+                self.assertEqual(self.get(path, self.landlord).status_code, 200)
+        return keys
+
+    def test_flights_after_a_write_do_not_join_earlier_ones(self):
+        for enabled in (True, False):
+            with self.subTest(cache=enabled), override_settings(RESPONSE_CACHE_ENABLED=enabled):
+                response_cache.clear()
+                before, = self.flight_keys('/leases/')
+                response_cache.invalidate_tags([f'owner:{self.landlord.id}'])
+                after, = self.flight_keys('/leases/')
+                self.assertEqual(before[0], after[0])
+                self.assertNotEqual(before, after)
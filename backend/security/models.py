@@ -1,6 +1,7 @@
 # security/models.py
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -10,7 +11,8 @@ class LoginAttempt(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
     success = models.BooleanField(default=False)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the attempt happens; attempts are written in delayed batches
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     
     class Meta:
         ordering = ['-timestamp']
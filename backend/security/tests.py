@@ -1,3 +1,63 @@
-from django.test import TestCase
+import asyncio
+from unittest import mock
 
-# Create your tests here.
+import httpx
+
+from rentalhub.testing import ApiTestCase
+from security.throttling import LoginAttemptRecorder, LoginThrottle
+from users.models import User
+
+
+class LoginThrottleTests(ApiTestCase):
+    USERNAME_LIMIT = 5
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('tenant', 'tenant@example.com', 'right-password')
+        self.throttle = LoginThrottle(window=300, username_limit=self.USERNAME_LIMIT, ip_limit=100)
+        self.hashes = 0
+        for patcher in (
+            mock.patch('main.login_throttle', self.throttle),
+            mock.patch('main.login_attempts', LoginAttemptRecorder(flush_interval=60, batch_size=10000)),
+            mock.patch('main.run_hasher', self.slow_hasher),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def slow_hasher(self, func, *args):
+        # Hashing takes long enough for every request of a burst to be in flight
+        self.hashes += 1
+        await asyncio.sleep(0.05)
+        return func(*args)
+
+    def login_burst(self, passwords):
+        async def send():
+            transport = httpx.ASGITransport(app=self.main.app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://testserver') as client:
+                return await asyncio.gather(*(
+                    client.post('/token', data={'username': 'tenant', 'password': password})
+                    for password in passwords
+                ))
+
+        return [response.status_code for response in asyncio.run(send())]
+
+    def test_parallel_failures_hash_at_most_the_limit(self):
+        statuses = self.login_burst(['wrong'] * 20)
+        self.assertEqual(self.hashes, self.USERNAME_LIMIT)
+        self.assertEqual(statuses.count(401), self.USERNAME_LIMIT)
+        self.assertEqual(statuses.count(429), 20 - self.USERNAME_LIMIT)
+
+    def test_success_releases_the_reserved_slots(self):
+        statuses = self.login_burst(['wrong'] * (self.USERNAME_LIMIT - 1) + ['right-password'])
+        self.assertEqual(statuses.count(200), 1)
+        # The success cleared the username's failures
+        self.assertEqual(self.login_burst(['wrong'] * self.USERNAME_LIMIT).count(401), self.USERNAME_LIMIT)
+        self.assertEqual(len(self.throttle.by_ip._events['127.0.0.1']), 2 * self.USERNAME_LIMIT - 1)
+
+    def test_errors_give_the_slot_back(self):
+        with mock.patch('main.run_hasher', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.login_burst(['wrong'])
+        self.assertEqual(self.throttle.by_username.retry_after('tenant'), 0)
+        self.assertEqual(len(self.throttle.by_username), 0)
+        self.assertEqual(len(self.throttle.by_ip), 0)
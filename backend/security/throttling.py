@@ -0,0 +1,207 @@
+import asyncio
+import ipaddress
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+
+from rentalhub.db import run_db
+from .models import LoginAttempt
+
+logger = logging.getLogger(__name__)
+
+
+class SlidingWindowLimiter:
+    """
+    Counts events per key over a sliding time window.
+
+    Not thread-safe on its own; ``LoginThrottle`` serializes access. Keys
+    whose events have all expired are dropped lazily so memory stays
+    proportional to the number of recently active keys.
+    """
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self._events = defaultdict(deque)
+        self._last_sweep = time.monotonic()
+
+    def _prune(self, key, now):
+        events = self._events.get(key)
+        if events is None:
+            return None
+        while events and events[0] <= now - self.window:
+            events.popleft()
+        if not events:
+            del self._events[key]
+            return None
+        return events
+
+    def retry_after(self, key):
+        """Seconds until ``key`` is allowed again, or 0 if it is not limited."""
+        now = time.monotonic()
+        events = self._prune(key, now)
+        if events is None or len(events) < self.limit:
+            return 0
+        return max(int(events[0] + self.window - now) + 1, 1)
+
+    def hit(self, key):
+        """Count an event for ``key`` and return its timestamp."""
+        now = time.monotonic()
+        self._events[key].append(now)
+        if now - self._last_sweep > self.window:
+            self._last_sweep = now
+            for stale in list(self._events):
+                self._prune(stale, now)
+        return now
+
+    def remove(self, key, timestamp):
+        """Uncount the event of ``key`` counted at ``timestamp``, if still in the window."""
+        events = self._events.get(key)
+        if events is None:
+            return
+        try:
+            events.remove(timestamp)
+        except ValueError:
+            return
+        if not events:
+            del self._events[key]
+
+    def reset(self, key):
+        self._events.pop(key, None)
+
+    def __len__(self):
+        return len(self._events)
+
+
+class LoginReservation:
+    """An attempt counted in advance as a failure by ``LoginThrottle.reserve``."""
+    __slots__ = ('username', 'ip_address', 'username_hit', 'ip_hit')
+
+    def __init__(self, username, ip_address, username_hit, ip_hit):
+        self.username = username
+        self.ip_address = ip_address
+        self.username_hit = username_hit
+        self.ip_hit = ip_hit
+
+
+class LoginThrottle:
+    """
+    Failed-login limits per username and per client IP.
+
+    Each attempt reserves a slot, counted as a failure, before any password
+    is hashed: the limits are checked and the slot taken under one lock, so
+    concurrent attempts cannot all pass the check and hash in parallel. A
+    successful login clears the username's failures and gives the IP slot
+    back; an attempt that ends in an error gives both back.
+    """
+    def __init__(self, window, username_limit, ip_limit):
+        self.by_username = SlidingWindowLimiter(username_limit, window)
+        self.by_ip = SlidingWindowLimiter(ip_limit, window)
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, username, ip_address):
+        """
+        ``(retry_after, reservation)``: seconds until the username or IP may
+        try again and None if either is limited, else 0 and the reservation.
+        """
+        username = username.casefold()
+        with self._lock:
+            wait = max(
+                self.by_username.retry_after(username),
+                self.by_ip.retry_after(ip_address) if ip_address else 0,
+            )
+            if wait:
+                self.rejected += 1
+                return wait, None
+            return 0, LoginReservation(
+                username, ip_address,
+                self.by_username.hit(username),
+                self.by_ip.hit(ip_address) if ip_address else None,
+            )
+
+    def succeeded(self, reservation):
+        with self._lock:
+            self.by_username.reset(reservation.username)
+            if reservation.ip_address:
+                self.by_ip.remove(reservation.ip_address, reservation.ip_hit)
+
+    def cancel(self, reservation):
+        with self._lock:
+            self.by_username.remove(reservation.username, reservation.username_hit)
+            if reservation.ip_address:
+                self.by_ip.remove(reservation.ip_address, reservation.ip_hit)
+
+    def stats(self):
+        return {
+            "rejected": self.rejected,
+            "tracked_usernames": len(self.by_username),
+            "tracked_ips": len(self.by_ip),
+        }
+
+
+class LoginAttemptRecorder:
+    """
+    Buffers LoginAttempt rows and writes them with bulk_create, either every
+    ``flush_interval`` seconds from the background task or as soon as a full
+    batch is waiting.
+    """
+    def __init__(self, flush_interval, batch_size):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._buffer = []
+        self._task = None
+        self._pending_flushes = set()
+
+    def record(self, username, ip_address, user_agent, success):
+        try:
+            ipaddress.ip_address(ip_address)
+        except ValueError:
+            ip_address = None
+        self._buffer.append(LoginAttempt(
+            username=username[:255],
+            ip_address=ip_address,
+            user_agent=user_agent,
+            success=success,
+        ))
+        if len(self._buffer) >= self.batch_size:
+            task = asyncio.get_running_loop().create_task(self.flush())
+            self._pending_flushes.add(task)
+            task.add_done_callback(self._pending_flushes.discard)
+
+    async def flush(self):
+        batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        try:
+            await run_db(LoginAttempt.objects.bulk_create, batch, batch_size=self.batch_size)
+        except Exception:
+            logger.exception("Failed to persist %d login attempts", len(batch))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+
+login_throttle = LoginThrottle(
+    window=settings.LOGIN_THROTTLE_WINDOW,
+    username_limit=settings.LOGIN_THROTTLE_USERNAME_LIMIT,
+    ip_limit=settings.LOGIN_THROTTLE_IP_LIMIT,
+)
+
+login_attempts = LoginAttemptRecorder(
+    flush_interval=settings.LOGIN_ATTEMPT_FLUSH_INTERVAL,
+    batch_size=settings.LOGIN_ATTEMPT_BATCH_SIZE,
+)
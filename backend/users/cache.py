@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import User
+
+
+class UserCache:
+    """
+    In-process TTL/LRU cache of authenticated users keyed by username.
+
+    Entries hold the raw field values rather than a model instance, and every
+    hit builds a fresh ``User`` with ``User.from_db`` so handlers that modify
+    ``current_user`` never share state across requests. Entries are dropped by
+    the ``users.signals`` receivers whenever a user is saved or deleted.
+    """
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._usernames = {}  # pk -> cached username, so renames are evicted too
+        self._lock = threading.Lock()
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.started_at = time.monotonic()
+
+    def version(self):
+        """Invalidation counter; pass it to ``set`` to avoid caching stale reads."""
+        return self._version
+
+    def get(self, username):
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._evict(username)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(username)
+            self.hits += 1
+            _, pk, db, field_names, values = entry
+        return User.from_db(db, field_names, values)
+
+    def set(self, user, version):
+        field_names = [field.attname for field in User._meta.concrete_fields]
+        values = tuple(getattr(user, name) for name in field_names)
+        with self._lock:
+            # A save or delete happened while the user was being loaded
+            if version != self._version:
+                return
+            self._entries[user.username] = (time.monotonic() + self.ttl, user.pk, user._state.db, field_names, values)
+            self._entries.move_to_end(user.username)
+            self._usernames[user.pk] = user.username
+            while len(self._entries) > self.max_size:
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, username):
+        entry = self._entries.pop(username, None)
+        if entry is not None:
+            self._usernames.pop(entry[1], None)
+
+    def invalidate(self, user):
+        with self._lock:
+            self._version += 1
+            self._evict(user.username)
+            previous_username = self._usernames.get(user.pk)
+            if previous_username is not None:
+                self._evict(previous_username)
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._usernames.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        uptime = time.monotonic() - self.started_at
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            # Every hit is one User query that did not reach the database
+            "saved_queries_per_second": round(self.hits / uptime, 2) if uptime else 0,
+        }
+
+
+user_cache = UserCache(
+    ttl=settings.AUTH_USER_CACHE_TTL,
+    max_size=settings.AUTH_USER_CACHE_SIZE,
+)
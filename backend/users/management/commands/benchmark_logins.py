@@ -0,0 +1,118 @@
+import asyncio
+import time
+import uuid
+from collections import Counter
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+
+from rentalhub.benchmarking import InlineExecutor, api_client, summarize, timed
+from rentalhub.hashing import HashingPool
+from security.models import LoginAttempt
+from users.models import User
+
+PASSWORD = "benchmark-password"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure /token throughput during a login burst with password hashing "
+        "on the event loop, as before the hashing pool, and on the bounded "
+        "hashing pool, along with how late /status requests sent every 10 ms "
+        "meanwhile are answered. Uses the configured PASSWORD_HASHERS. The users are "
+        "created in the configured database and deleted again afterwards; run "
+        "it against a scratch copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=50,
+            help="Users logging in concurrently, each from its own IP address.",
+        )
+        parser.add_argument(
+            "--logins", type=int, default=5,
+            help="Logins sent in turn by each user.",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=settings.PASSWORD_HASHER_WORKERS,
+            help="Hashing pool workers (default: PASSWORD_HASHER_WORKERS).",
+        )
+
+    def handle(self, *args, users=50, logins=5, workers=settings.PASSWORD_HASHER_WORKERS, **options):
+        prefix = f"bench-login-{uuid.uuid4().hex[:8]}-"
+        # One hash for everyone: creating the users should not take as long as the benchmark
+        password = make_password(PASSWORD)
+        accounts = User.objects.bulk_create([
+            User(username=f"{prefix}{n}", password=password, role=User.Role.TENANT) for n in range(users)
+        ])
+        try:
+            for mode in ("event loop", "pool"):
+                pool = HashingPool(workers=workers, max_queue=settings.PASSWORD_HASHER_MAX_QUEUE)
+                if mode == "event loop":
+                    pool._executor.shutdown()
+                    pool._executor = InlineExecutor()
+                try:
+                    timings, statuses, probes, elapsed = self.measure(pool, accounts, logins)
+                finally:
+                    pool.shutdown()
+                label = mode if mode == "event loop" else f"pool x{workers}"
+                self.stdout.write(
+                    f"{label:<10} /token  {summarize(timings)}  {len(timings) / elapsed:7.1f} logins/s  "
+                    f"{dict(sorted(statuses.items()))}"
+                )
+                self.stdout.write(f"{'':<10} /status {summarize(probes)}")
+        finally:
+            LoginAttempt.objects.filter(username__startswith=prefix).delete()
+            User.objects.filter(username__startswith=prefix).delete()
+
+    def measure(self, pool, accounts, logins):
+        """
+        /token latencies in ms, response status counts, /status latencies in
+        ms during the burst, and the wall time of the burst in seconds.
+        """
+        import main
+        from security.throttling import login_attempts, login_throttle
+
+        statuses = Counter()
+
+        async def log_in(n, account):
+            # A distinct address per user keeps the per-IP throttle out of the way
+            timings = []
+            async with api_client(client_address=(f"10.0.{n // 250}.{n % 250 + 1}", 1234)) as client:
+                for _ in range(logins):
+                    response, elapsed = await timed(lambda: client.post(
+                        "/token", data={"username": account.username, "password": PASSWORD}
+                    ))
+                    statuses[response.status_code] += 1
+                    timings.append(elapsed)
+            return timings
+
+        async def probe(done):
+            # Each probe is due 10 ms after the previous one; a blocked event
+            # loop shows up as the time it ran late plus the request itself
+            timings = []
+            async with api_client() as client:
+                while not done.is_set():
+                    due = time.perf_counter() + 0.01
+                    await asyncio.sleep(0.01)
+                    (await client.get("/status")).raise_for_status()
+                    timings.append((time.perf_counter() - due) * 1000)
+            return timings
+
+        async def send():
+            done = asyncio.Event()
+            probing = asyncio.create_task(probe(done))
+            results, elapsed = await timed(
+                lambda: asyncio.gather(*(log_in(n, account) for n, account in enumerate(accounts)))
+            )
+            done.set()
+            await login_attempts.flush()
+            return [timing for timings in results for timing in timings], await probing, elapsed / 1000
+
+        with mock.patch.object(main, "hashing_pool", pool):
+            timings, probes, elapsed = asyncio.run(send())
+        for account in accounts:
+            login_throttle.by_username.reset(account.username.casefold())
+        return timings, statuses, probes, elapsed
@@ -1,3 +1,48 @@
-from django.test import TestCase
+from rentalhub.testing import ApiTestCase
+from users.cache import user_cache
+from users.models import User
 
-# Create your tests here.
+
+class UserCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('tenant', 'tenant@example.com', 'pw', role=User.Role.TENANT)
+        # Sign the token before any change, as a client holding it would
+        self.token = {'Authorization': f"Bearer {self.main.create_access_token({'sub': 'tenant'})}"}
+
+    def me(self, token=None):
+        return self.get('/users/me/', headers=dict(token or self.token))
+
+    def test_repeated_requests_hit_the_cache(self):
+        self.me()
+        hits = user_cache.hits
+        self.assertEqual(self.me().status_code, 200)
+        self.assertEqual(user_cache.hits, hits + 1)
+
+    def test_role_change_is_seen_by_the_next_request(self):
+        self.assertEqual(self.me().json()['role'], User.Role.TENANT)
+        self.user.role = User.Role.LANDLORD
+        self.user.save()
+        self.assertEqual(self.me().json()['role'], User.Role.LANDLORD)
+
+    def test_rename_evicts_the_previous_username(self):
+        self.me()
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertEqual(self.me().status_code, 401)
+        renamed = {'Authorization': f"Bearer {self.main.create_access_token({'sub': 'renamed'})}"}
+        self.assertEqual(self.me(renamed).json()['username'], 'renamed')
+
+    def test_deleted_user_is_rejected(self):
+        self.me()
+        self.user.delete()
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_stale_read_is_not_cached(self):
+        # Loaded before a save that lands while the request is still running
+        version = user_cache.version()
+        stale = User.objects.get(pk=self.user.pk)
+        self.user.role = User.Role.LANDLORD
+        self.user.save()
+        user_cache.set(stale, version)
+        self.assertIsNone(user_cache.get('tenant'))